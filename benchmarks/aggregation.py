@@ -0,0 +1,76 @@
+"""Measures how the portfolio aggregation scales with the number of balance rows.
+
+Compares Portfolio.aggregate_balances with the previous groupby().apply() based
+implementation on synthetic balances, spread over many symbols and sub-accounts.
+
+Usage:
+    python benchmarks/aggregation.py [--rows 1000 10000 100000 1000000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from cryptonaire_reports.reports.portfolio import Portfolio
+
+
+def generate_balances(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Random balances with roughly one symbol every 10 rows and one sub-account
+    every 50 rows, like a consolidated report of many accounts."""
+    rng = np.random.default_rng(seed)
+    symbols = np.array([f"COIN{i}" for i in range(max(1, rows // 10))])
+    sources = np.array(
+        [f"Exchange {i % 5}:account{i} (Spot)" for i in range(max(1, rows // 50))]
+    )
+    return pd.DataFrame(
+        {
+            "source": rng.choice(sources, size=rows),
+            "symbol": rng.choice(symbols, size=rows),
+            "balance": rng.random(rows) * 1000,
+        }
+    )
+
+
+def previous_aggregation(balances_pdf: pd.DataFrame) -> pd.DataFrame:
+    def combine_balances(row: pd.DataFrame) -> pd.Series:
+        result = {}
+        result["source"] = "|".join(set(row["source"]))
+        result["balance"] = row["balance"].sum()
+        return pd.Series(result, index=["source", "balance"])
+
+    return balances_pdf.groupby(by=["symbol"]).apply(combine_balances)
+
+
+def measure(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument(
+        "--skip-previous",
+        action="store_true",
+        help="Only measure the current implementation",
+    )
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'current':>10} {'previous':>10}")
+    for rows in args.rows:
+        balances_pdf = generate_balances(rows)
+        current = measure(Portfolio.aggregate_balances, balances_pdf)
+        previous = (
+            "-"
+            if args.skip_previous
+            else f"{measure(previous_aggregation, balances_pdf):.3f}s"
+        )
+        print(f"{rows:>10} {current:>9.3f}s {previous:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Local stand-in for an Ethereum JSON-RPC node.
+
+It answers the calls made by the RPC path of the Ethereum network: eth_getBalance, and
+eth_call to Multicall3.aggregate3 with the symbol, decimals and balanceOf of ERC-20
+tokens. Requests can be single calls or batches, like on a real node. The state
+(ETH balances and tokens) is kept in memory, and can be built from the Ethplorer
+responses of a cassette so both paths report the same balances.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+from cryptonaire_reports.utils.evm import AGGREGATE3_SELECTOR
+from cryptonaire_reports.utils.evm import BALANCE_OF_SELECTOR
+from cryptonaire_reports.utils.evm import DECIMALS_SELECTOR
+from cryptonaire_reports.utils.evm import MULTICALL3_ADDRESS
+from cryptonaire_reports.utils.evm import SYMBOL_SELECTOR
+from cryptonaire_reports.utils.evm import WORD_SIZE
+from replay import ETHEREUM
+from replay import Cassette
+
+
+def _word(value: int) -> bytes:
+    return value.to_bytes(WORD_SIZE, "big")
+
+
+def _uint(data: bytes, position: int) -> int:
+    return int.from_bytes(data[position : position + WORD_SIZE], "big")
+
+
+def _encode_bytes(data: bytes) -> bytes:
+    return _word(len(data)) + data + b"\x00" * (-len(data) % WORD_SIZE)
+
+
+class EvmNode:
+    """In-memory node, served on localhost while used as a context manager.
+
+    Args:
+        balances (Dict[str, int]): Wei held by each address.
+        tokens (Dict[str, Tuple[str, int, Dict[str, int]]]): (symbol, decimals,
+            units held by each address) of each token contract.
+    """
+
+    def __init__(
+        self,
+        balances: Optional[Dict[str, int]] = None,
+        tokens: Optional[Dict[str, Tuple[str, int, Dict[str, int]]]] = None,
+    ) -> None:
+        self.balances = {
+            address.lower(): wei for address, wei in (balances or {}).items()
+        }
+        self.tokens = {
+            contract.lower(): (
+                symbol,
+                decimals,
+                {address.lower(): units for address, units in holders.items()},
+            )
+            for contract, (symbol, decimals, holders) in (tokens or {}).items()
+        }
+        # Number of HTTP requests and of calls inside them
+        self.requests = 0
+        self.calls = 0
+        self.url = ""
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @classmethod
+    def from_cassette(cls, cassette: Cassette) -> "EvmNode":
+        """Builds the state from the Ethplorer getAddressInfo responses."""
+        balances: Dict[str, int] = {}
+        tokens: Dict[str, Tuple[str, int, Dict[str, int]]] = {}
+        for requests_by_key in cassette.responses.get(ETHEREUM, {}).values():
+            for key, address_info in requests_by_key.items():
+                if "/getAddressInfo/" not in key:
+                    continue
+                address = address_info["address"]
+                eth = address_info["ETH"]
+                balances[address] = int(
+                    eth.get("rawBalance", round(eth["balance"] * 10**18))
+                )
+                for token in address_info.get("tokens", []):
+                    info = token["tokenInfo"]
+                    _, _, holders = tokens.setdefault(
+                        info["address"], (info["symbol"], int(info["decimals"]), {})
+                    )
+                    holders[address] = int(token.get("rawBalance", token["balance"]))
+        return cls(balances, tokens)
+
+    def __enter__(self) -> "EvmNode":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.node = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle(self, request: Dict) -> Dict:
+        self.calls += 1
+        answer = {"jsonrpc": "2.0", "id": request.get("id")}
+        method, params = request.get("method"), request.get("params", [])
+        try:
+            if method == "eth_getBalance":
+                answer["result"] = hex(self.balances.get(params[0].lower(), 0))
+            elif method == "eth_call" and params[0]["to"] == MULTICALL3_ADDRESS:
+                answer["result"] = "0x" + self.aggregate3(params[0]["data"]).hex()
+            else:
+                answer["error"] = {"code": -32601, "message": "Method not found"}
+        except Exception as e:
+            answer["error"] = {"code": -32000, "message": str(e)}
+        return answer
+
+    def aggregate3(self, data: str) -> bytes:
+        """Runs every call of an aggregate3 call and encodes the results."""
+        data = bytes.fromhex(data[2:])
+        if data[:4].hex() != AGGREGATE3_SELECTOR:
+            raise ValueError("Only aggregate3 is supported")
+        data = data[4:]
+        array = _uint(data, 0)
+        length = _uint(data, array)
+        results = []
+        for index in range(length):
+            item = array + WORD_SIZE + _uint(data, array + WORD_SIZE * (index + 1))
+            target = "0x" + data[item + 12 : item + WORD_SIZE].hex()
+            call_data = item + _uint(data, item + 2 * WORD_SIZE)
+            size = _uint(data, call_data)
+            start = call_data + WORD_SIZE
+            results.append(self.token_call(target, data[start : start + size]))
+        encoded = [
+            _word(1 if result is not None else 0)
+            + _word(2 * WORD_SIZE)
+            + _encode_bytes(result or b"")
+            for result in results
+        ]
+        offsets, position = [], len(results) * WORD_SIZE
+        for encoded_result in encoded:
+            offsets.append(_word(position))
+            position += len(encoded_result)
+        return _word(WORD_SIZE) + _word(len(results)) + b"".join(offsets + encoded)
+
+    def token_call(self, contract: str, call_data: bytes) -> Optional[bytes]:
+        """Return data of an ERC-20 call, or None if it reverts."""
+        if contract not in self.tokens:
+            return None
+        symbol, decimals, holders = self.tokens[contract]
+        selector = call_data[:4].hex()
+        if selector == SYMBOL_SELECTOR:
+            return _word(WORD_SIZE) + _encode_bytes(symbol.encode())
+        if selector == DECIMALS_SELECTOR:
+            return _word(decimals)
+        if selector == BALANCE_OF_SELECTOR:
+            return _word(holders.get("0x" + call_data[16:36].hex(), 0))
+        return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        node: EvmNode = self.server.node
+        node.requests += 1
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if isinstance(payload, list):
+            answer = [node.handle(request) for request in payload]
+        else:
+            answer = node.handle(payload)
+        content = json.dumps(answer).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
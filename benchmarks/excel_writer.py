@@ -0,0 +1,87 @@
+"""Measures the time and memory needed to write the XLSX portfolio report.
+
+Compares the streaming writer (XlsxWriter in constant_memory mode) with the previous
+pd.ExcelWriter based implementation. Memory is the peak traced by tracemalloc while
+writing, which also makes both writers several times slower than usual.
+
+Usage:
+    python benchmarks/excel_writer.py [--rows 10000 100000]
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from cryptonaire_reports.utils.excel import write_excel
+
+
+def generate_report(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Random report with the columns of the portfolio report, and some coins
+    without price."""
+    rng = np.random.default_rng(seed)
+    prices = rng.random(rows) * 1000
+    prices[rng.random(rows) < 0.1] = np.nan
+    balances = rng.random(rows) * 100
+    return pd.DataFrame(
+        {
+            "Exchange(s) / Network(s)": rng.choice(
+                ["Binance (Spot)", "Binance (Spot)|Gate (Earn)", "ETHEREUM"], rows
+            ),
+            "Symbol": [f"COIN{i}" for i in range(rows)],
+            "Full Name": [f"Coin number {i}" for i in range(rows)],
+            "Coin Rank": rng.integers(1, 10_000, rows),
+            "Balance": balances,
+            "Price (USD)": prices,
+            "Total Value (USD)": balances * prices,
+        }
+    )
+
+
+def previous_writer(report_pdf: pd.DataFrame, path: Path) -> None:
+    writer = pd.ExcelWriter(path, engine="xlsxwriter")
+    report_pdf.to_excel(writer, sheet_name="Portfolio", index=False, header=True)
+    worksheet = writer.sheets["Portfolio"]
+    for idx, col in enumerate(report_pdf):
+        series = report_pdf[col]
+        max_len = max(series.map(lambda value: len(str(value))).max(), len(col)) + 3
+        worksheet.set_column(idx, idx, max_len)
+    writer.close()
+
+
+def streaming_writer(report_pdf: pd.DataFrame, path: Path) -> None:
+    write_excel({"Portfolio": report_pdf}, path)
+
+
+def measure(writer, report_pdf: pd.DataFrame, directory: Path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    writer(report_pdf, directory / f"{writer.__name__}.xlsx")
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024**2
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'writer':>10} {'time':>10} {'peak memory':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            report_pdf = generate_report(rows)
+            for name, writer in [
+                ("streaming", streaming_writer),
+                ("previous", previous_writer),
+            ]:
+                elapsed, peak = measure(writer, report_pdf, Path(directory))
+                print(f"{rows:>10} {name:>10} {elapsed:>9.2f}s {peak:>10.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
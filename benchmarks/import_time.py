@@ -0,0 +1,104 @@
+"""Measures the startup cost of the CLI.
+
+Each scenario runs in a fresh interpreter, so nothing is cached between runs. Besides
+the wall time, it reports which heavy third-party packages ended up imported, which
+is what usually makes startup slow.
+
+Usage:
+    python benchmarks/import_time.py [--runs N]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = [
+    "pandas",
+    "pyarrow",
+    "binance",
+    "pybit",
+    "gate_api",
+    "coinmarketcapapi",
+]
+
+SCENARIOS = {
+    "crypto-report --help": (
+        "import sys\n"
+        "from cryptonaire_reports.cli import crypto_report\n"
+        "sys.argv = ['crypto-report', '--help']\n"
+        "try:\n"
+        "    crypto_report()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+    ),
+    "crypto-report portfolio -e gate (source loading)": (
+        "from cryptonaire_reports.utils.parse_functions import parse_exchanges\n"
+        "from cryptonaire_reports.utils.registry import EXCHANGES_GROUP, load_source\n"
+        "parse_exchanges('gate')\n"
+        "load_source(EXCHANGES_GROUP, 'gate')\n"
+    ),
+}
+
+# Modules that a scenario must not import. The help and the history commands only
+# need the CLI, pandas and pyarrow are loaded once a report is generated
+FORBIDDEN_MODULES = {"crypto-report --help": ["pandas", "pyarrow"]}
+
+REPORT_LOADED_MODULES = (
+    "\nimport json, sys\n"
+    "print(json.dumps([m for m in {heavy} if m in sys.modules]))\n"
+)
+
+
+def run_scenario(code: str, runs: int):
+    timings = []
+    loaded = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                code + REPORT_LOADED_MODULES.format(heavy=HEAVY_MODULES),
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        timings.append(time.perf_counter() - start)
+        loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return timings, loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    baseline, _ = run_scenario("", args.runs)
+    print(f"{'scenario':<52} {'median':>8} {'min':>8}  heavy modules loaded")
+    print(
+        f"{'python (empty interpreter)':<52} "
+        f"{statistics.median(baseline) * 1000:>6.0f}ms {min(baseline) * 1000:>6.0f}ms"
+    )
+    failures = []
+    for name, code in SCENARIOS.items():
+        timings, loaded = run_scenario(code, args.runs)
+        print(
+            f"{name:<52} {statistics.median(timings) * 1000:>6.0f}ms "
+            f"{min(timings) * 1000:>6.0f}ms  {', '.join(loaded) or '-'}"
+        )
+        failures += [
+            f"{name} imports {module}"
+            for module in FORBIDDEN_MODULES.get(name, [])
+            if module in loaded
+        ]
+    if failures:
+        print("\n" + "\n".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
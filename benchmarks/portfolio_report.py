@@ -0,0 +1,244 @@
+"""Runs Portfolio.report end to end against local stand-ins of every API.
+
+Exchanges, networks and CoinMarketCap are answered by the replay server (see
+replay.py), from a synthetic portfolio or from a recorded cassette, so the benchmark
+runs offline and without credentials. Rate limits are lifted unless
+--keep-rate-limits is given, so the time left is the time spent in our own code:
+client init, parsing, aggregation, enrichment and writing. The first run starts with
+empty caches, the following ones reuse the CoinMarketCap map cache like a real re-run.
+
+Usage:
+    python benchmarks/portfolio_report.py [--symbols 10000 --accounts 1000]
+    python benchmarks/portfolio_report.py --cassette portfolio.json.gz
+    python benchmarks/portfolio_report.py --record portfolio.json.gz \\
+        --config cryptonaire_reports.config
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from cryptonaire_reports.reports.portfolio import Portfolio
+from cryptonaire_reports.utils.chains import EVM_CHAINS
+from cryptonaire_reports.utils.config import load_config
+from cryptonaire_reports.utils.fetcher import ENGINES
+from cryptonaire_reports.utils.fetcher import THREADS_ENGINE
+from cryptonaire_reports.utils.formats import REPORT_FORMATS
+from cryptonaire_reports.utils.formats import XLSX_FORMAT
+from cryptonaire_reports.utils.logger import LoggerConfig
+from cryptonaire_reports.utils.timings import TOTAL
+from cryptonaire_reports.utils.timings import Timings
+from evm_node import EvmNode
+from replay import Cassette
+from replay import ReplayServer
+from synthetic import generate_cassette
+
+# Config section of each exchange host
+EXCHANGE_SECTIONS = {
+    "binance": "Binance",
+    "bing_x": "BingX",
+    "bybit": "ByBit",
+    "gate": "Gate",
+}
+UNLIMITED_REQUESTS_PER_MINUTE = 10**9
+
+
+def write_replay_config(
+    cassette: Cassette,
+    path: Path,
+    rate_limits: bool,
+    nodes: Optional[Dict[str, EvmNode]] = None,
+    min_balance: Optional[float] = None,
+) -> None:
+    """Writes a config with an account per account of the cassette. The API key of
+    each account is its placeholder name, which is how the replay server finds its
+    responses. The addresses of the cassette are read from every chain with a node
+    in nodes, and Ethereum reads them from the Ethplorer stand-in if it has none.
+    Symbols with a total balance under min_balance are filtered out."""
+    nodes = nodes or {}
+    lines = ["[CoinMarketCap]", "API_KEY = replay"]
+    if not rate_limits:
+        # 0 disables the CoinMarketCap rate limiter
+        lines.append("REQUESTS_PER_MINUTE = 0")
+    for host, section in EXCHANGE_SECTIONS.items():
+        for account in cassette.accounts(host):
+            lines += [
+                "",
+                f"[{section}:{account}]",
+                f"API_KEY = {account}",
+                "SECRET_KEY = replay",
+            ]
+            if not rate_limits:
+                lines.append(f"REQUESTS_PER_MINUTE = {UNLIMITED_REQUESTS_PER_MINUTE}")
+    if cassette.addresses():
+        # Read from a file, like large address lists usually are
+        addresses_path = path.parent / "addresses.txt"
+        addresses_path.write_text("\n".join(cassette.addresses()))
+        chains = ["Ethereum"] + [chain for chain in nodes if chain != "Ethereum"]
+        lines += ["", "[Networks]"]
+        lines += [f"{chain.upper()} = {addresses_path}" for chain in chains]
+        for chain in chains:
+            lines += ["", f"[{chain}]"]
+            if not rate_limits:
+                lines.append("REQUESTS_PER_MINUTE = 0")
+            if chain in nodes:
+                lines += [
+                    f"RPC_URL = {nodes[chain].url}",
+                    f"TOKENS = {' '.join(nodes[chain].tokens)}",
+                ]
+    if min_balance is not None:
+        lines += ["", "[Filters]", f"MIN_BALANCE = {min_balance}"]
+    lines += ["", "[History]", "ENABLED = false", ""]
+    path.write_text("\n".join(lines))
+
+
+def run_report(server: ReplayServer, args: argparse.Namespace) -> None:
+    portfolio = Portfolio(
+        exchanges=["all"],
+        networks=["all"],
+        max_workers=args.max_workers,
+        engine=args.engine,
+        output_format=args.format,
+        save_history=False,
+    )
+    server.redirect_portfolio(portfolio)
+    start = time.perf_counter()
+    portfolio.report()
+    Timings().record(TOTAL, "", time.perf_counter() - start)
+
+
+def stage_totals() -> List[Tuple[str, int, float, float]]:
+    """(stage, calls, total seconds, slowest call) of every stage of the last run."""
+    stages: Dict[str, List[float]] = defaultdict(list)
+    for stage, _, seconds in Timings().records:
+        stages[stage].append(seconds)
+    return [
+        (stage, len(seconds), sum(seconds), max(seconds))
+        for stage, seconds in stages.items()
+    ]
+
+
+def print_stage_totals(run: int) -> None:
+    print(f"\nRun {run} {'(empty caches)' if run == 1 else ''}")
+    print(f"{'stage':<14} {'calls':>7} {'total':>10} {'slowest':>10}")
+    for stage, calls, total, slowest in stage_totals():
+        print(f"{stage:<14} {calls:>7} {total:>9.3f}s {slowest:>9.3f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=1_000)
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--holdings", type=int, default=20, help="Coins per account")
+    parser.add_argument("--addresses", type=int, default=1, help="Ethereum addresses")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cassette", type=Path, help="Replays a recorded cassette")
+    parser.add_argument(
+        "--save-cassette", type=Path, help="Saves the synthetic cassette to a file"
+    )
+    parser.add_argument(
+        "--record",
+        type=Path,
+        help="Runs against the real APIs with --config and records a cassette",
+    )
+    parser.add_argument("--config", type=Path, help="Config used by --record")
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--engine", choices=ENGINES, default=THREADS_ENGINE)
+    parser.add_argument("--format", choices=REPORT_FORMATS, default=XLSX_FORMAT)
+    parser.add_argument("--max-workers", type=int, default=8)
+    parser.add_argument("--keep-rate-limits", action="store_true")
+    parser.add_argument(
+        "--rpc",
+        action="store_true",
+        help="Reads Ethereum balances from a stand-in JSON-RPC node",
+    )
+    parser.add_argument(
+        "--chains",
+        type=lambda chains: [chain.strip().upper() for chain in chains.split(",")],
+        default=[],
+        help="Other EVM chains holding the same addresses, e.g. arbitrum,base,bsc",
+    )
+    parser.add_argument(
+        "--min-balance",
+        type=float,
+        help="Filters out the symbols with a smaller total balance",
+    )
+    parser.add_argument("--log-level", default="error")
+    args = parser.parse_args()
+
+    if args.record and not args.config:
+        parser.error("--record requires --config")
+    if args.record and (args.rpc or args.chains):
+        parser.error("--rpc and --chains can't be recorded, nodes are stand-ins")
+    unknown_chains = set(args.chains) - set(EVM_CHAINS) - {"ETHEREUM"}
+    if unknown_chains:
+        parser.error(f"Unknown chains: {', '.join(sorted(unknown_chains))}")
+    LoggerConfig(log_level=args.log_level)
+    if args.record:
+        cassette = Cassette()
+        config_path = args.config.resolve()
+        record_path = args.record.resolve()
+    elif args.cassette:
+        cassette = Cassette.load(args.cassette)
+    else:
+        cassette = generate_cassette(
+            symbols=args.symbols,
+            accounts=args.accounts,
+            holdings=args.holdings,
+            addresses=args.addresses,
+            seed=args.seed,
+        )
+        if args.save_cassette:
+            cassette.save(args.save_cassette)
+
+    working_dir = os.getcwd()
+    # One node per chain, all of them with the Ethereum balances of the cassette
+    chains = (["ETHEREUM"] if args.rpc else []) + [
+        chain for chain in args.chains if chain != "ETHEREUM"
+    ]
+    nodes = {
+        EVM_CHAINS[chain].name: EvmNode.from_cassette(cassette) for chain in chains
+    }
+    with tempfile.TemporaryDirectory() as directory, ExitStack() as stack:
+        for node in nodes.values():
+            stack.enter_context(node)
+        # Caches, reports and the replay config stay in the temporary directory
+        os.chdir(directory)
+        try:
+            if not args.record:
+                config_path = Path(directory) / "replay.config"
+                write_replay_config(
+                    cassette,
+                    config_path,
+                    args.keep_rate_limits,
+                    nodes,
+                    args.min_balance,
+                )
+            load_config(str(config_path))
+            with ReplayServer(cassette, record=bool(args.record)) as server:
+                for run in range(1, (1 if args.record else args.repeat) + 1):
+                    Timings().reset()
+                    run_report(server, args)
+                    print_stage_totals(run)
+            for chain, node in nodes.items():
+                print(
+                    f"\n{chain} JSON-RPC node: {node.requests} requests, "
+                    f"{node.calls} calls"
+                )
+            if server.misses:
+                print(f"\n{len(server.misses)} requests not found in the cassette:")
+                print("\n".join(server.misses[:10]))
+            if args.record:
+                cassette.save(record_path)
+                print(f"\nCassette saved to {record_path}")
+        finally:
+            os.chdir(working_dir)
+
+
+if __name__ == "__main__":
+    main()
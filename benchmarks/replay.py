@@ -0,0 +1,295 @@
+"""Local stand-in for the APIs used by the exchanges, networks and CoinMarketCap.
+
+Every host gets its own HTTP server on localhost, so the request paths (which are part
+of the signature of most exchanges) are the same ones sent to the real API. The
+servers answer from a cassette, a JSON file with the recorded responses:
+- exchanges and networks: one response per account and request. Accounts are told
+  apart by the API key header, and requests by their method, path and query, without
+  the parameters that change on every call (timestamps and signatures).
+- CoinMarketCap: the map entry of every symbol and the quote of every id, so any
+  combination of symbols and ids can be answered, whatever the chunking.
+
+In record mode, requests are forwarded to the real APIs and their responses stored in
+the cassette. API keys are never stored: every account is saved with a placeholder
+name, and replaying the cassette uses those names as API keys.
+"""
+
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+
+import requests
+from cryptonaire_reports.exchanges import binance
+from cryptonaire_reports.exchanges import binance_async
+from cryptonaire_reports.exchanges import bing_x
+from cryptonaire_reports.exchanges import gate
+from cryptonaire_reports.exchanges.bybit import ByBit
+from cryptonaire_reports.networks import ethereum
+
+COIN_MARKET_CAP = "coin_market_cap"
+ETHEREUM = "ethereum"
+
+HOSTS = {
+    "binance": "https://api.binance.com",
+    "bing_x": "https://open-api.bingx.com",
+    "bybit": "https://api.bybit.com",
+    "gate": "https://api.gateio.ws",
+    ETHEREUM: "https://api.ethplorer.io",
+    COIN_MARKET_CAP: "https://pro-api.coinmarketcap.com",
+}
+# Header with the API key of each exchange
+ACCOUNT_HEADERS = {
+    "binance": "X-MBX-APIKEY",
+    "bing_x": "X-BX-APIKEY",
+    "bybit": "X-BAPI-API-KEY",
+    "gate": "KEY",
+}
+# Query parameters that change on every request, or that identify the caller
+VOLATILE_PARAMS = {"timestamp", "signature", "recvWindow", "apiKey"}
+
+CMC_MAP_PATH = "/v1/cryptocurrency/map"
+CMC_QUOTES_PATH = "/v2/cryptocurrency/quotes/latest"
+
+
+def request_key(method: str, path: str, query: str) -> str:
+    """Identifies a request by its method, path and stable query parameters."""
+    params = sorted(
+        (name, value)
+        for name, value in parse_qsl(query, keep_blank_values=True)
+        if name not in VOLATILE_PARAMS
+    )
+    return f"{method} {path}" + (f"?{urlencode(params)}" if params else "")
+
+
+class Cassette:
+    """Recorded responses, see the module docstring."""
+
+    def __init__(
+        self,
+        responses: Optional[Dict[str, Dict[str, Dict[str, object]]]] = None,
+        coins: Optional[Dict[str, Dict[str, Dict]]] = None,
+    ) -> None:
+        # Host -> account -> request key -> JSON body
+        self.responses = responses or {}
+        # "map": symbol -> map entry, "quotes": id -> quote
+        self.coins = coins or {"map": {}, "quotes": {}}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path) -> "Cassette":
+        opener = gzip.open if str(path).endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as cassette_file:
+            content = json.load(cassette_file)
+        return cls(content["responses"], content["coins"])
+
+    def save(self, path: Path) -> None:
+        opener = gzip.open if str(path).endswith(".gz") else open
+        with opener(path, "wt", encoding="utf-8") as cassette_file:
+            json.dump({"responses": self.responses, "coins": self.coins}, cassette_file)
+
+    def add(self, host: str, account: str, key: str, body: object) -> None:
+        with self._lock:
+            self.responses.setdefault(host, {}).setdefault(account, {})[key] = body
+
+    def get(self, host: str, account: str, key: str) -> Optional[object]:
+        return self.responses.get(host, {}).get(account, {}).get(key)
+
+    def accounts(self, host: str) -> List[str]:
+        return list(self.responses.get(host, {}))
+
+    def addresses(self) -> List[str]:
+        """Ethereum addresses of the recorded getAddressInfo requests."""
+        return sorted(
+            {
+                key.split("/getAddressInfo/")[1].split("?")[0]
+                for requests_by_key in self.responses.get(ETHEREUM, {}).values()
+                for key in requests_by_key
+                if "/getAddressInfo/" in key
+            }
+        )
+
+    def add_coins(self, path: str, data: object) -> None:
+        with self._lock:
+            if path == CMC_MAP_PATH:
+                for entry in data:
+                    self.coins["map"].setdefault(entry["symbol"].upper(), entry)
+            elif path == CMC_QUOTES_PATH:
+                self.coins["quotes"].update(data)
+
+    def cmc_response(self, path: str, query: str) -> Tuple[int, Dict]:
+        """Builds the response of the map or quotes endpoint from the stored coins,
+        like CoinMarketCap would."""
+        params = dict(parse_qsl(query))
+        if path == CMC_MAP_PATH:
+            symbols = params.get("symbol", "").split(",")
+            unknown = [s for s in symbols if s.upper() not in self.coins["map"]]
+            if unknown:
+                message = f'Invalid value for "symbol": "{",".join(unknown)}"'
+                return 400, _cmc_body(None, error_code=400, error_message=message)
+            return 200, _cmc_body([self.coins["map"][s.upper()] for s in symbols])
+        if path == CMC_QUOTES_PATH:
+            ids = params.get("id", "").split(",")
+            quotes = self.coins["quotes"]
+            return 200, _cmc_body({i: quotes[i] for i in ids if i in quotes})
+        return 404, _cmc_body(None, error_code=404, error_message="Not recorded")
+
+
+def _cmc_body(
+    data: object, error_code: int = 0, error_message: Optional[str] = None
+) -> Dict:
+    status = {
+        "error_code": error_code,
+        "error_message": error_message,
+        "credit_count": 1,
+        "elapsed": 0,
+    }
+    return {"status": status, "data": data}
+
+
+class ReplayServer:
+    """Runs one stand-in server per host of HOSTS.
+
+    Args:
+        cassette (Cassette): Responses to replay, or where the recorded ones are
+            stored.
+        record (bool): Forwards the requests to the real APIs and records the
+            responses, instead of replaying them.
+    """
+
+    def __init__(self, cassette: Cassette, record: bool = False) -> None:
+        self.cassette = cassette
+        self.record = record
+        # Requests that weren't found in the cassette
+        self.misses: List[str] = []
+        self.urls: Dict[str, str] = {}
+        self._servers: List[ThreadingHTTPServer] = []
+        # API key -> placeholder name, so keys are never written to the cassette
+        self._accounts: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "ReplayServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        for host in HOSTS:
+            server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+            server.daemon_threads = True
+            server.replay = self
+            server.host = host
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self._servers.append(server)
+            self.urls[host] = f"http://127.0.0.1:{server.server_port}"
+        self.redirect_sources()
+
+    def stop(self) -> None:
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+    def redirect_sources(self) -> None:
+        """Points the sources whose base URL is a module constant to the servers.
+        ByBit and CoinMarketCap clients are redirected once created, with
+        redirect_portfolio."""
+        binance.API_URL = self.urls["binance"]
+        binance_async.API_URL = self.urls["binance"]
+        bing_x.API_URL = self.urls["bing_x"]
+        gate.API_URL = f"{self.urls['gate']}/api/v4"
+        ethereum.API_URL = self.urls[ETHEREUM]
+
+    def redirect_portfolio(self, portfolio) -> None:
+        for exchange in portfolio.exchanges:
+            if isinstance(exchange, ByBit):
+                exchange.client.endpoint = self.urls["bybit"]
+        # python-coinmarketcap has no option for the base URL
+        portfolio.coin_market_cap.api._CoinMarketCapAPI__base_url = (
+            f"{self.urls[COIN_MARKET_CAP]}/"
+        )
+
+    def account(self, host: str, headers) -> str:
+        header = ACCOUNT_HEADERS.get(host)
+        api_key = headers.get(header, "") if header else ""
+        if not self.record or not api_key:
+            return api_key
+        with self._lock:
+            if api_key not in self._accounts:
+                self._accounts[api_key] = f"account-{len(self._accounts) + 1:04d}"
+            return self._accounts[api_key]
+
+    def respond(
+        self, host: str, method: str, target: str, headers, body: bytes
+    ) -> Tuple[int, bytes]:
+        url = urlsplit(target)
+        if self.record:
+            return self._forward(host, method, target, headers, body)
+        if host == COIN_MARKET_CAP:
+            status, content = self.cassette.cmc_response(url.path, url.query)
+            return status, json.dumps(content).encode()
+        account = self.account(host, headers)
+        key = request_key(method, url.path, url.query)
+        content = self.cassette.get(host, account, key)
+        if content is None:
+            self.misses.append(f"{host} {account} {key}")
+            return 404, json.dumps({"msg": f"{key} not recorded"}).encode()
+        return 200, json.dumps(content).encode()
+
+    def _forward(
+        self, host: str, method: str, target: str, headers, body: bytes
+    ) -> Tuple[int, bytes]:
+        forwarded_headers = {
+            name: value
+            for name, value in headers.items()
+            if name.lower() not in ["host", "content-length", "accept-encoding"]
+        }
+        response = requests.request(
+            method,
+            HOSTS[host] + target,
+            headers=forwarded_headers,
+            data=body or None,
+            timeout=60,
+        )
+        if response.ok:
+            url = urlsplit(target)
+            if host == COIN_MARKET_CAP:
+                self.cassette.add_coins(url.path, response.json().get("data"))
+            else:
+                self.cassette.add(
+                    host,
+                    self.account(host, headers),
+                    request_key(method, url.path, url.query),
+                    response.json(),
+                )
+        return response.status_code, response.content
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _handle(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        status, content = self.server.replay.respond(
+            self.server.host, self.command, self.path, self.headers, body
+        )
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = _handle
+    do_POST = _handle
+    do_DELETE = _handle
@@ -0,0 +1,222 @@
+"""Synthetic cassettes for the replay server, with any number of symbols and accounts.
+
+Responses have the shape of the real APIs, so they go through the same parsing as
+recorded ones. Accounts are spread over Binance, BingX, ByBit and Gate, and every
+account holds a random sample of the symbols.
+"""
+
+import random
+from typing import List
+
+from cryptonaire_reports.exchanges.binance import EARN_PAGE_SIZE
+from cryptonaire_reports.utils.addresses import to_checksum_address
+from replay import Cassette
+from replay import ETHEREUM
+
+EXCHANGE_HOSTS = ["binance", "bing_x", "bybit", "gate"]
+
+
+def generate_cassette(
+    symbols: int = 1_000,
+    accounts: int = 100,
+    holdings: int = 20,
+    addresses: int = 1,
+    seed: int = 0,
+) -> Cassette:
+    """Generates the responses of every API for a synthetic portfolio.
+
+    Args:
+        symbols (int): Number of different coins, all of them known by CoinMarketCap.
+        accounts (int): Number of exchange accounts, spread over the exchanges.
+        holdings (int): Coins held by each account and address.
+        addresses (int): Number of Ethereum addresses.
+        seed (int): Seed of the random balances and prices.
+
+    Returns:
+        Cassette: Cassette to replay with ReplayServer.
+    """
+    rng = random.Random(seed)
+    universe = [f"C{index:05d}" for index in range(symbols)]
+    cassette = Cassette()
+    for index, symbol in enumerate(universe, 1):
+        _add_coin(cassette, rng, index, symbol)
+    # Native coin of the Ethereum addresses
+    _add_coin(cassette, rng, symbols + 1, "ETH")
+    for index in range(accounts):
+        host = EXCHANGE_HOSTS[index % len(EXCHANGE_HOSTS)]
+        account = f"account-{index // len(EXCHANGE_HOSTS) + 1:04d}"
+        coins = rng.sample(universe, min(holdings, symbols))
+        ADD_ACCOUNT[host](cassette, rng, account, coins)
+    for index in range(addresses):
+        coins = rng.sample(universe, min(holdings, symbols))
+        # Same address as the one requested by the network, with its checksum
+        address = to_checksum_address(f"0x{index + 1:040x}")
+        _add_ethereum_address(cassette, rng, address, coins)
+    return cassette
+
+
+def _amount(rng: random.Random) -> str:
+    return f"{rng.lognormvariate(0, 3):.8f}"
+
+
+def _add_coin(cassette: Cassette, rng: random.Random, coin_id: int, symbol: str):
+    supply = rng.randint(10**6, 10**12)
+    price = rng.lognormvariate(0, 4)
+    cassette.coins["map"][symbol] = {
+        "id": coin_id,
+        "rank": coin_id,
+        "name": f"Synthetic coin {coin_id}",
+        "symbol": symbol,
+        "is_active": 1,
+    }
+    cassette.coins["quotes"][str(coin_id)] = {
+        "id": coin_id,
+        "name": f"Synthetic coin {coin_id}",
+        "symbol": symbol,
+        "cmc_rank": coin_id,
+        "max_supply": supply if rng.random() < 0.5 else None,
+        "circulating_supply": supply * 0.8,
+        "total_supply": supply,
+        "quote": {"USD": {"price": price, "market_cap": price * supply * 0.8}},
+    }
+
+
+def _add_binance_account(
+    cassette: Cassette, rng: random.Random, account: str, coins: List[str]
+):
+    spot, flexible, locked = coins[0::3], coins[1::3], coins[2::3]
+    cassette.add(
+        "binance",
+        account,
+        "GET /api/v3/account?omitZeroBalances=true",
+        {
+            "balances": [
+                {"asset": coin, "free": _amount(rng), "locked": "0.00000000"}
+                for coin in spot
+            ]
+        },
+    )
+    for product, rows, amount_key in [
+        ("flexible", flexible, "totalAmount"),
+        ("locked", locked, "amount"),
+    ]:
+        pages = max(1, -(-len(rows) // EARN_PAGE_SIZE))
+        for page in range(1, pages + 1):
+            page_rows = rows[(page - 1) * EARN_PAGE_SIZE : page * EARN_PAGE_SIZE]
+            cassette.add(
+                "binance",
+                account,
+                f"GET /sapi/v1/simple-earn/{product}/position?current={page}"
+                f"&size={EARN_PAGE_SIZE}",
+                {
+                    "total": len(rows),
+                    "rows": [
+                        {"asset": coin, amount_key: _amount(rng)} for coin in page_rows
+                    ],
+                },
+            )
+
+
+def _add_bing_x_account(
+    cassette: Cassette, rng: random.Random, account: str, coins: List[str]
+):
+    cassette.add(
+        "bing_x",
+        account,
+        "GET /openApi/spot/v1/account/balance",
+        {
+            "code": 0,
+            "msg": "",
+            "data": {
+                "balances": [
+                    {"asset": coin, "free": _amount(rng), "locked": "0"}
+                    for coin in coins
+                ]
+            },
+        },
+    )
+
+
+def _add_bybit_account(
+    cassette: Cassette, rng: random.Random, account: str, coins: List[str]
+):
+    cassette.add(
+        "bybit",
+        account,
+        "GET /v5/account/wallet-balance?accountType=UNIFIED",
+        {
+            "retCode": 0,
+            "retMsg": "OK",
+            "result": {
+                "list": [
+                    {
+                        "accountType": "UNIFIED",
+                        "coin": [
+                            {"coin": coin, "equity": _amount(rng)} for coin in coins
+                        ],
+                    }
+                ]
+            },
+            "retExtInfo": {},
+            "time": 0,
+        },
+    )
+
+
+def _add_gate_account(
+    cassette: Cassette, rng: random.Random, account: str, coins: List[str]
+):
+    spot, earn = coins[0::2], coins[1::2]
+    cassette.add(
+        "gate",
+        account,
+        "GET /api/v4/spot/accounts",
+        [{"currency": coin, "available": _amount(rng), "locked": "0"} for coin in spot],
+    )
+    cassette.add(
+        "gate",
+        account,
+        "GET /api/v4/earn/uni/lends",
+        [{"currency": coin, "amount": _amount(rng)} for coin in earn],
+    )
+
+
+def _add_ethereum_address(
+    cassette: Cassette, rng: random.Random, address: str, coins: List[str]
+):
+    eth_balance = float(_amount(rng))
+    token_units = [int(float(_amount(rng)) * 10**18) for _ in coins]
+    cassette.add(
+        ETHEREUM,
+        "",
+        f"GET /getAddressInfo/{address}",
+        {
+            "address": address,
+            "ETH": {
+                "balance": eth_balance,
+                "rawBalance": str(int(eth_balance * 10**18)),
+            },
+            "tokens": [
+                {
+                    "tokenInfo": {
+                        # Same contract for the same coin in every address
+                        "address": f"0x{int(coin[1:]) + 1:040x}",
+                        "symbol": coin,
+                        "name": coin,
+                        "decimals": "18",
+                    },
+                    "balance": float(units),
+                    "rawBalance": str(units),
+                }
+                for coin, units in zip(coins, token_units)
+            ],
+        },
+    )
+
+
+ADD_ACCOUNT = {
+    "binance": _add_binance_account,
+    "bing_x": _add_bing_x_account,
+    "bybit": _add_bybit_account,
+    "gate": _add_gate_account,
+}
@@ -1,9 +1,24 @@
+import cProfile
+import time
+from datetime import datetime
+from pathlib import Path
+
 import click
 
-from cryptonaire_reports.reports.portfolio import Portfolio
+from cryptonaire_reports.utils.config import load_config
+from cryptonaire_reports.utils.fetcher import DEFAULT_MAX_WORKERS
+from cryptonaire_reports.utils.fetcher import DEFAULT_TIMEOUT
+from cryptonaire_reports.utils.fetcher import ENGINES
+from cryptonaire_reports.utils.fetcher import THREADS_ENGINE
+from cryptonaire_reports.utils.formats import CSV_FORMAT
+from cryptonaire_reports.utils.formats import REPORT_FORMATS
+from cryptonaire_reports.utils.formats import XLSX_FORMAT
 from cryptonaire_reports.utils.parse_functions import parse_exchanges
 from cryptonaire_reports.utils.parse_functions import parse_networks
 from cryptonaire_reports.utils.logger import LoggerConfig
+from cryptonaire_reports.utils.timings import CONFIG_LOAD
+from cryptonaire_reports.utils.timings import TOTAL
+from cryptonaire_reports.utils.timings import Timings
 
 
 @click.group()
@@ -18,7 +33,7 @@ def crypto_report():
     type=str,
     default=None,
     help="""Networks from which we want to extract balances from (Currently supports:
-    Ethereum). Defaults to None. If set to all, it generates a report with all avaiable 
+    Ethereum, and evm for every other EVM chain of the config file). Defaults to None. If set to all, it generates a report with all avaiable 
     networks in the config file""",
 )
 @click.option(
@@ -41,7 +56,102 @@ def crypto_report():
     "--csv",
     is_flag=True,
     default=False,
-    help="""If set, returns the raw report format rather than the formatted XLSX""",
+    help="""If set, returns the raw report format rather than the formatted XLSX. Same
+    as --format csv""",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(REPORT_FORMATS),
+    default=XLSX_FORMAT,
+    show_default=True,
+    help="""Format of the report. parquet, arrow and jsonl are meant to be loaded by
+    other programs: they keep typed columns (float balances and prices, integer
+    supplies, categorical sources and symbols) and are compressed. parquet and arrow
+    require pyarrow: pip install cryptonaire-reports[arrow]""",
+)
+@click.option(
+    "--max-workers",
+    type=int,
+    default=DEFAULT_MAX_WORKERS,
+    show_default=True,
+    help="""Maximum number of exchanges and networks queried at the same time.""",
+)
+@click.option(
+    "--timeout",
+    type=float,
+    default=DEFAULT_TIMEOUT,
+    show_default=True,
+    help="""Seconds to wait for each exchange or network. Sources that don't answer in
+    time are skipped and the report is generated with the rest of them.""",
+)
+@click.option(
+    "--engine",
+    type=click.Choice(ENGINES),
+    default=THREADS_ENGINE,
+    show_default=True,
+    help="""How the sources are queried. threads runs each exchange and network in its
+    own thread. asyncio runs them in a single event loop, which scales better with many
+    accounts (requires httpx: pip install cryptonaire-reports[async]).""",
+)
+@click.option(
+    "--refresh-cache",
+    is_flag=True,
+    default=False,
+    help="""Ignores the cached CoinMarketCap ids and requests the map of every symbol
+    again, and forgets the cached spam flags of EVM tokens so they're checked again.
+    The caches are updated with the new results.""",
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    default=False,
+    help="""Values the portfolio with the prices stored by previous runs, without
+    calling CoinMarketCap.""",
+)
+@click.option(
+    "--max-price-age",
+    type=float,
+    default=None,
+    help="""Reuses the prices stored by previous runs that are newer than this number
+    of seconds, instead of requesting them again.""",
+)
+@click.option(
+    "--stale-while-revalidate",
+    is_flag=True,
+    default=False,
+    help="""Values the portfolio with the stored prices straight away and refreshes the
+    ones older than --max-price-age in the background, for the next run.""",
+)
+@click.option(
+    "--no-history",
+    is_flag=True,
+    default=False,
+    help="""Doesn't append the balances and prices of this run to the history
+    database.""",
+)
+@click.option(
+    "--no-filters",
+    is_flag=True,
+    default=False,
+    help="""Doesn't apply the rules of the [Filters] section nor skip the tokens that
+    look like spam, so every symbol is included in the report.""",
+)
+@click.option(
+    "--config",
+    "config_path",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="""Path of the config file. Defaults to the CRYPTONAIRE_CONFIG environment
+    variable, or cryptonaire_reports.config in the current directory.""",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="""Profiles the run with cProfile and writes the stats next to the report
+    (open them with python -m pstats <file> or snakeviz). Only the main thread is
+    profiled: with the threads engine, sources show up as time spent waiting.""",
 )
 @click.option(
     "--debug",
@@ -51,17 +161,222 @@ def crypto_report():
     generates a report with the information from all available exchanges (Binance,
     BingX, Gate and ByBit)""",
 )
-def portfolio(networks: str, exchanges: str, include_manual: bool, csv: bool, debug: bool):
+def portfolio(
+    networks: str,
+    exchanges: str,
+    include_manual: bool,
+    csv: bool,
+    output_format: str,
+    max_workers: int,
+    timeout: float,
+    engine: str,
+    refresh_cache: bool,
+    offline: bool,
+    max_price_age: float,
+    stale_while_revalidate: bool,
+    no_history: bool,
+    no_filters: bool,
+    config_path: str,
+    profile: bool,
+    debug: bool,
+):
     LoggerConfig(log_level="debug" if debug else "info")
+    timings = Timings()
+    start = time.perf_counter()
+    profiler = cProfile.Profile() if profile else None
+    if profiler:
+        profiler.enable()
+    # Imported here so pandas is only loaded when a report is actually generated
+    from cryptonaire_reports.reports.portfolio import Portfolio
+
+    with timings.measure(CONFIG_LOAD):
+        load_config(config_path)
     exchanges = parse_exchanges(exchanges) if exchanges else []
     networks = parse_networks(networks) if networks else []
     portfolio = Portfolio(
-        exchanges=exchanges, networks=networks, include_manual=include_manual, raw=csv
+        exchanges=exchanges,
+        networks=networks,
+        include_manual=include_manual,
+        output_format=CSV_FORMAT if csv else output_format,
+        max_workers=max_workers,
+        source_timeout=timeout,
+        refresh_cache=refresh_cache,
+        engine=engine,
+        offline=offline,
+        max_price_age=max_price_age,
+        stale_while_revalidate=stale_while_revalidate,
+        save_history=not no_history,
+        apply_filters=not no_filters,
     )
     portfolio.report()
+    timings.record(TOTAL, "", time.perf_counter() - start)
+    if profiler:
+        profiler.disable()
+        curr_date = datetime.now().strftime("%Y%m%d_%H%M%S")
+        profile_path = (
+            Path("reports/portfolio") / f"crypto_portfolio_{curr_date}.pstats"
+        )
+        profiler.dump_stats(profile_path)
+        click.echo(f"Profile written to {profile_path}")
+    click.echo(f"Timings (seconds):\n{timings.format_summary()}")
+
+
+def validate_timestamp(ctx: click.Context, param: click.Parameter, value: str):
+    """Checks that a date or time option is in ISO 8601 format, before it's used to
+    query the history."""
+    if value is None:
+        return value
+    try:
+        datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise click.BadParameter(
+            f"{value} is not a valid date or time, e.g. 2024-05-01 or 2024-05-01T10:30"
+        )
+    return value
+
+
+@click.group()
+def history():
+    """Loads the snapshots stored by previous portfolio reports."""
+    pass
+
+
+@click.command(name="list")
+@click.option(
+    "--config",
+    "config_path",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="""Path of the config file.""",
+)
+def list_snapshots(config_path: str):
+    """Lists the stored snapshots and their total value."""
+    from cryptonaire_reports.utils.history import HistoryStore
+
+    LoggerConfig(log_level="info")
+    load_config(config_path)
+    click.echo(HistoryStore().list_snapshots().to_string(index=False))
+
+
+@click.command()
+@click.option(
+    "--at",
+    type=str,
+    default=None,
+    callback=validate_timestamp,
+    help="""Shows the last snapshot taken at or before this date or time (e.g.
+    2024-05-01 or 2024-05-01T10:30, in UTC). Defaults to the latest snapshot.""",
+)
+@click.option(
+    "--from",
+    "start",
+    type=str,
+    default=None,
+    callback=validate_timestamp,
+    help="""Shows every snapshot taken since this date or time, instead of a single
+    one.""",
+)
+@click.option(
+    "--to",
+    "end",
+    type=str,
+    default=None,
+    callback=validate_timestamp,
+    help="""Shows every snapshot taken until this date or time (included), instead of
+    a single one.""",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="""Writes the balances to this CSV file instead of printing them.""",
+)
+@click.option(
+    "--config",
+    "config_path",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="""Path of the config file.""",
+)
+def show(at: str, start: str, end: str, output: str, config_path: str):
+    """Shows the balances and prices of a snapshot or a time range."""
+    from cryptonaire_reports.utils.history import HistoryStore
+    from cryptonaire_reports.utils.history import parse_timestamp
+
+    LoggerConfig(log_level="info")
+    load_config(config_path)
+    store = HistoryStore()
+    if start or end:
+        snapshots_pdf = store.load_range(
+            start=parse_timestamp(start) if start else None,
+            end=parse_timestamp(end, end_of_day=True) if end else None,
+        )
+    else:
+        snapshots_pdf = store.load_snapshot(
+            at=parse_timestamp(at, end_of_day=True) if at else None
+        )
+    if output:
+        snapshots_pdf.to_csv(output, index=False, encoding="utf-8")
+        click.echo(f"{len(snapshots_pdf)} rows written to {output}")
+    else:
+        click.echo(snapshots_pdf.to_string(index=False))
+
+
+@click.command()
+@click.argument("old")
+@click.argument("new", required=False)
+@click.option(
+    "--by",
+    type=click.Choice(["symbol", "source"]),
+    default="symbol",
+    show_default=True,
+    help="""Compares the total of each symbol, or each symbol in each source.""",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="""Writes the differences to this CSV file instead of printing them.""",
+)
+@click.option(
+    "--config",
+    "config_path",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="""Path of the config file.""",
+)
+def diff(old: str, new: str, by: str, output: str, config_path: str):
+    """Compares two snapshots. OLD and NEW can be portfolio reports (CSV or XLSX),
+    CSV files exported with history show, or dates / times of the history (the last
+    snapshot at or before them). NEW defaults to the latest snapshot."""
+    from cryptonaire_reports.reports.diff import diff_snapshots
+    from cryptonaire_reports.reports.diff import load_snapshot
+
+    LoggerConfig(log_level="info")
+    load_config(config_path)
+    diff_pdf = diff_snapshots(
+        load_snapshot(old), load_snapshot(new or "9999-12-31"), by=by
+    )
+    status_counts = diff_pdf["status"].value_counts()
+    click.echo(
+        f"Total value: {diff_pdf['total_value_usd_old'].sum():,.2f} -> "
+        f"{diff_pdf['total_value_usd_new'].sum():,.2f} USD "
+        f"({diff_pdf['total_value_usd_change'].sum():+,.2f}). "
+        + ", ".join(f"{count} {status}" for status, count in status_counts.items())
+    )
+    if output:
+        diff_pdf.to_csv(output, index=False, encoding="utf-8")
+        click.echo(f"{len(diff_pdf)} rows written to {output}")
+    else:
+        click.echo(diff_pdf.to_string(index=False))
+
 
+history.add_command(list_snapshots)
+history.add_command(show)
 
 crypto_report.add_command(portfolio)
+crypto_report.add_command(history)
+crypto_report.add_command(diff)
 
 if __name__ == "__main__":
     crypto_report()
@@ -0,0 +1,124 @@
+import asyncio
+import math
+import weakref
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import structlog
+from cryptonaire_reports.exchanges.exchange import Exchange
+from cryptonaire_reports.exchanges.exchange import MAX_CONCURRENT_PAGES
+from cryptonaire_reports.utils.fetcher import AsyncBalanceFetcher
+from cryptonaire_reports.utils.fetcher import untimed
+from cryptonaire_reports.utils.timings import Timings
+from cryptonaire_reports.utils.timings import WALLET_FETCH
+
+logger = structlog.get_logger()
+
+
+class AsyncExchange(Exchange):
+    """Exchange whose wallets are fetched with coroutines instead of threads.
+
+    Wallet methods are declared in wallets like in Exchange, but they are coroutine
+    functions, and get_balances has to be awaited. Limits are still shared by all
+    the accounts of the exchange: requests go through the same rate limiter, and
+    max_concurrent_accounts is enforced with an asyncio.Semaphore.
+    """
+
+    # Event loop -> {exchange name: semaphore}. asyncio primitives belong to the
+    # loop they are used in, so every loop gets its own ones
+    _async_semaphores = weakref.WeakKeyDictionary()
+
+    async def throttle_async(self) -> None:
+        """Same as throttle, but waits without blocking the event loop."""
+        await self._rate_limiters[self.exchange_name].acquire_async()
+
+    async def fetch_all_pages_async(
+        self,
+        fetch_page: Callable[[int], Awaitable[Dict]],
+        page_size: int,
+        rows_key: str = "rows",
+        total_key: str = "total",
+        first_page: int = 1,
+    ) -> List[Dict]:
+        """Same as fetch_all_pages, for an endpoint requested with a coroutine."""
+        await self.throttle_async()
+        response = await fetch_page(first_page)
+        rows = list(response[rows_key])
+        total_pages = math.ceil(int(response[total_key]) / page_size)
+        if total_pages <= 1:
+            return rows
+
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
+
+        async def _fetch_page(page: int) -> List[Dict]:
+            async with semaphore:
+                await self.throttle_async()
+                return (await fetch_page(page))[rows_key]
+
+        pages = await asyncio.gather(
+            *(
+                _fetch_page(page)
+                for page in range(first_page + 1, first_page + total_pages)
+            )
+        )
+        for page_rows in pages:
+            rows.extend(page_rows)
+        return rows
+
+    def _account_semaphore(self) -> asyncio.Semaphore:
+        semaphores = self._async_semaphores.setdefault(asyncio.get_running_loop(), {})
+        if self.exchange_name not in semaphores:
+            semaphores[self.exchange_name] = asyncio.Semaphore(
+                self._account_limits[self.exchange_name]
+            )
+        return semaphores[self.exchange_name]
+
+    async def fetch_balances_async(self) -> List[Tuple[str, str, float]]:
+        """Same as get_balances, but waits if too many accounts of the same exchange
+        are already being fetched. The wait doesn't count against the timeout of the
+        account."""
+        semaphore = self._account_semaphore()
+        with untimed():
+            await semaphore.acquire()
+        try:
+            return await self.get_balances()
+        finally:
+            semaphore.release()
+
+    def fetch_balances(self) -> List[Tuple[str, str, float]]:
+        """Runs the coroutines in an event loop of their own, so async exchanges can
+        also be used by the threaded engine."""
+        results = AsyncBalanceFetcher(timeout=None).fetch(
+            {self.name: self.fetch_balances_async}
+        )
+        return results.get(self.name, [])
+
+    async def get_balances(self) -> List[Tuple[str, str, float]]:
+        """Fetches the balances of all the wallets of the exchange concurrently. A
+        wallet that fails doesn't prevent the others from being reported.
+
+        Returns:
+            List[Tuple[str, str, float]]: List of tuples that contain (source, symbol,
+                balance), in the order the wallets are declared.
+        """
+        if not self.wallets:
+            raise NotImplementedError(
+                f"{type(self).__name__} must declare its wallets or override "
+                f"get_balances"
+            )
+        wallet_fetchers = {
+            f"{self.name} ({wallet})": getattr(self, method)
+            for wallet, method in self.wallets.items()
+        }
+        fetcher = AsyncBalanceFetcher(timeout=None)
+        results = await fetcher.fetch_async(wallet_fetchers)
+        Timings().record_all(WALLET_FETCH, fetcher.timings)
+        balances = []
+        for wallet in wallet_fetchers:
+            if wallet in results:
+                logger.debug(
+                    f"[{wallet.upper()}] {len(results[wallet])} balances fetched in "
+                    f"{fetcher.timings[wallet]:.2f}s"
+                )
+                balances.extend(results[wallet])
+        logger.info(f"[{self.name.upper()}] All balances extracted successfully")
+        return balances
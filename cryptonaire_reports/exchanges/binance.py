@@ -1,54 +1,101 @@
 import structlog
 
-from typing import Tuple, List
+from typing import Tuple, List, Dict, Optional
 from binance.spot import Spot
 from binance.api import API
 from cryptonaire_reports.exchanges.exchange import Exchange
-from cryptonaire_reports.utils.singleton import Singleton
+from cryptonaire_reports.utils.config import ExchangeConfig
 from cryptonaire_reports.utils.symbol_corrector import symbol_corrector
 
 logger = structlog.get_logger()
 
+API_URL = "https://api.binance.com"
+# Maximum page size of the Simple Earn position endpoints
+EARN_PAGE_SIZE = 100
 
-class Binance(Exchange, metaclass=Singleton):
 
-    def __init__(self) -> None:
-        super().__init__("Binance")
+def parse_spot_balances(
+    source_name: str, response: Dict
+) -> List[Tuple[str, str, float]]:
+    """Extracts the balances from the response of the account endpoint.
+
+    Args:
+        source_name (str): Value of the source column of the balances.
+        response (Dict): Response of /api/v3/account.
+
+    Returns:
+        List[Tuple[str, str, float]]: List of tuples that contain (source, symbol,
+            balance)
+    """
+    spot_balances = []
+    for coin_asset in response["balances"]:
+        coin_ticker = symbol_corrector(coin_asset["asset"])
+        if coin_ticker.startswith("LD") and len(coin_ticker) > 4:
+            # This value corresponds to a coin that's stored in Earn - Flexible
+            logger.debug(
+                f"[BINANCE] Found coin {coin_ticker}, skipping. Full info: {coin_asset}"
+            )
+            continue
+        balance = float(coin_asset["free"]) + float(coin_asset["locked"])
+        if not balance > 0:
+            continue
+        spot_balances.append((source_name, coin_ticker, balance))
+    return spot_balances
+
+
+def parse_earn_balances(
+    source_name: str, products: List[Dict], amount_key: str
+) -> List[Tuple[str, str, float]]:
+    """Extracts the balances from the positions of a Simple Earn product.
+
+    Args:
+        source_name (str): Value of the source column of the balances.
+        products (List[Dict]): Rows of the flexible or locked position endpoints.
+        amount_key (str): Key of the amount in each row (totalAmount in flexible
+            positions, amount in locked ones).
+
+    Returns:
+        List[Tuple[str, str, float]]: List of tuples that contain (source, symbol,
+            balance)
+    """
+    earn_balances = []
+    for product in products:
+        coin_ticker = symbol_corrector(product["asset"])
+        balance = float(product[amount_key])
+        if not balance > 0:
+            continue
+        earn_balances.append((source_name, coin_ticker, balance))
+    return earn_balances
+
+
+class Binance(Exchange):
+    wallets = {
+        "Spot": "get_spot_balances",
+        "Flexible Earn": "get_earn_flexible_balances",
+        "Locked Earn": "get_earn_locked_balances",
+    }
+
+    def __init__(self, config: Optional[ExchangeConfig] = None) -> None:
+        super().__init__("Binance", config)
         if not self.active:
             return
-        self.spot_client = Spot(self._api_key, self._secret_key)
+        self.spot_client = Spot(self._api_key, self._secret_key, base_url=API_URL)
         self.api = API(
             api_key=self._api_key,
             api_secret=self._secret_key,
-            base_url="https://api.binance.com",
+            base_url=API_URL,
         )
 
-    @property
-    def name(self) -> str:
-        return "Binance"
-
     def get_spot_balances(self) -> List[Tuple[str, str, float]]:
         logger.info(f"[{self.name.upper()}] Extracting balances from Spot account...")
-        source_name = "Binance (Spot)"
-        spot_balances = []
+        source_name = f"{self.name} (Spot)"
         try:
+            self.throttle()
             response = self.spot_client.account(
                 recvWindow=30000, omitZeroBalances="true"
             )
             logger.debug(f"[{self.name.upper()}] Full response: {response}")
-            for coin_asset in response["balances"]:
-                coin_ticker = symbol_corrector(coin_asset["asset"])
-                if coin_ticker.startswith("LD") and len(coin_ticker) > 4:
-                    # This value corresponds to a coin that's stored in Earn - Flexible
-                    logger.debug(
-                        f"[{self.name.upper()}] Found coin {coin_ticker}, skipping. "
-                        f"Full info: {coin_asset}"
-                    )
-                    continue
-                balance = float(coin_asset["free"]) + float(coin_asset["locked"])
-                if not balance > 0:
-                    continue
-                spot_balances.append((source_name, coin_ticker, balance))
+            spot_balances = parse_spot_balances(source_name, response)
             logger.debug(f"[{self.name.upper()}] Spot balances: \n{spot_balances}")
             return spot_balances
         except Exception as e:
@@ -62,30 +109,22 @@ class Binance(Exchange, metaclass=Singleton):
         logger.info(
             f"[{self.name.upper()}] Extracting balances from flexible earn account..."
         )
-        source_name = "Binance (Flexible Earn)"
-        earn_balances = []
+        source_name = f"{self.name} (Flexible Earn)"
         try:
-            all_products = []
-            retrieved_all = False
-            while not retrieved_all:
-                response = self.spot_client.get_flexible_product_position(
-                    recvWindow=30000, size=100
-                )
-                all_products.extend(response["rows"])
-                total_expected = response["total"]
-                if total_expected == len(all_products):
-                    retrieved_all = True
-                    logger.info(
-                        f"[{self.name.upper()}] Retrieved {total_expected} products "
-                        f"from flexible earn"
-                    )
+            all_products = self.fetch_all_pages(
+                lambda page: self.spot_client.get_flexible_product_position(
+                    recvWindow=30000, current=page, size=EARN_PAGE_SIZE
+                ),
+                page_size=EARN_PAGE_SIZE,
+            )
+            logger.info(
+                f"[{self.name.upper()}] Retrieved {len(all_products)} products from "
+                f"flexible earn"
+            )
             logger.debug(f"[{self.name.upper()}] Full response: {all_products}")
-            for product in response["rows"]:
-                coin_ticker = symbol_corrector(product["asset"])
-                balance = float(product["totalAmount"])
-                if not balance > 0:
-                    continue
-                earn_balances.append((source_name, coin_ticker, balance))
+            earn_balances = parse_earn_balances(
+                source_name, all_products, "totalAmount"
+            )
             logger.debug(
                 f"[{self.name.upper()}] Flexible Earn balances: \n{earn_balances}"
             )
@@ -101,30 +140,20 @@ class Binance(Exchange, metaclass=Singleton):
         logger.info(
             f"[{self.name.upper()}] Extracting balances from locked earn account..."
         )
-        source_name = "Binance (Locked Earn)"
-        earn_balances = []
+        source_name = f"{self.name} (Locked Earn)"
         try:
-            all_products = []
-            retrieved_all = False
-            while not retrieved_all:
-                response = self.spot_client.get_locked_product_position(
-                    recvWindow=30000, size=100
-                )
-                all_products.extend(response["rows"])
-                total_expected = response["total"]
-                if total_expected == len(all_products):
-                    retrieved_all = True
-                    logger.info(
-                        f"[{self.name.upper()}] Retrieved {total_expected} products "
-                        f"from locked earn"
-                    )
+            all_products = self.fetch_all_pages(
+                lambda page: self.spot_client.get_locked_product_position(
+                    recvWindow=30000, current=page, size=EARN_PAGE_SIZE
+                ),
+                page_size=EARN_PAGE_SIZE,
+            )
+            logger.info(
+                f"[{self.name.upper()}] Retrieved {len(all_products)} products from "
+                f"locked earn"
+            )
             logger.debug(f"[{self.name.upper()}] Full response: {all_products}")
-            for product in all_products:
-                coin_ticker = symbol_corrector(product["asset"])
-                balance = float(product["amount"])
-                if not balance > 0:
-                    continue
-                earn_balances.append((source_name, coin_ticker, balance))
+            earn_balances = parse_earn_balances(source_name, all_products, "amount")
             logger.debug(
                 f"[{self.name.upper()}] Locked Earn balances: \n{earn_balances}"
             )
@@ -135,11 +164,3 @@ class Binance(Exchange, metaclass=Singleton):
             )
             logger.debug(f"[{self.name.upper()}] Full exception: {e}")
             return []
-
-    def get_balances(self) -> List[Tuple[str, str, float]]:
-        balances = []
-        balances.extend(self.get_spot_balances())
-        balances.extend(self.get_earn_flexible_balances())
-        balances.extend(self.get_earn_locked_balances())
-        logger.info(f"[{self.name.upper()}] All balances extracted successfully")
-        return balances
@@ -0,0 +1,135 @@
+import hmac
+import time
+from hashlib import sha256
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import structlog
+from cryptonaire_reports.exchanges.async_exchange import AsyncExchange
+from cryptonaire_reports.exchanges.binance import EARN_PAGE_SIZE
+from cryptonaire_reports.exchanges.binance import parse_earn_balances
+from cryptonaire_reports.exchanges.binance import parse_spot_balances
+from cryptonaire_reports.utils.async_http import AsyncHttpClient
+from cryptonaire_reports.utils.config import ExchangeConfig
+
+logger = structlog.get_logger()
+
+API_URL = "https://api.binance.com"
+RECV_WINDOW = 30000
+
+
+class AsyncBinance(AsyncExchange):
+    """Binance adapter for the asyncio engine. It signs the requests itself and sends
+    them with httpx, instead of going through the blocking binance-connector SDK."""
+
+    wallets = {
+        "Spot": "get_spot_balances",
+        "Flexible Earn": "get_earn_flexible_balances",
+        "Locked Earn": "get_earn_locked_balances",
+    }
+
+    def __init__(self, config: Optional[ExchangeConfig] = None) -> None:
+        super().__init__("Binance", config)
+        if not self.active:
+            return
+        self.http = AsyncHttpClient()
+
+    async def _api_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
+        await self.throttle_async()
+        params = {
+            **(params or {}),
+            "recvWindow": RECV_WINDOW,
+            "timestamp": int(time.time() * 1000),
+        }
+        query = urlencode(params)
+        signature = hmac.new(
+            self._secret_key.encode("utf-8"), query.encode("utf-8"), digestmod=sha256
+        ).hexdigest()
+        response = await self.http.get(
+            f"{API_URL}{endpoint}?{query}&signature={signature}",
+            headers={"X-MBX-APIKEY": self._api_key},
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def _get_earn_positions(self, endpoint: str) -> List[Dict]:
+        return await self.fetch_all_pages_async(
+            lambda page: self._api_request(
+                endpoint, {"current": page, "size": EARN_PAGE_SIZE}
+            ),
+            page_size=EARN_PAGE_SIZE,
+        )
+
+    async def get_spot_balances(self) -> List[Tuple[str, str, float]]:
+        logger.info(f"[{self.name.upper()}] Extracting balances from Spot account...")
+        source_name = f"{self.name} (Spot)"
+        try:
+            response = await self._api_request(
+                "/api/v3/account", {"omitZeroBalances": "true"}
+            )
+            logger.debug(f"[{self.name.upper()}] Full response: {response}")
+            spot_balances = parse_spot_balances(source_name, response)
+            logger.debug(f"[{self.name.upper()}] Spot balances: \n{spot_balances}")
+            return spot_balances
+        except Exception as e:
+            logger.error(
+                f"[{self.name.upper()}] Error while retrieving spot balances from Binance"
+            )
+            logger.debug(f"[{self.name.upper()}] Full exception: {e}")
+            return []
+
+    async def get_earn_flexible_balances(self) -> List[Tuple[str, str, float]]:
+        logger.info(
+            f"[{self.name.upper()}] Extracting balances from flexible earn account..."
+        )
+        source_name = f"{self.name} (Flexible Earn)"
+        try:
+            all_products = await self._get_earn_positions(
+                "/sapi/v1/simple-earn/flexible/position"
+            )
+            logger.info(
+                f"[{self.name.upper()}] Retrieved {len(all_products)} products from "
+                f"flexible earn"
+            )
+            logger.debug(f"[{self.name.upper()}] Full response: {all_products}")
+            earn_balances = parse_earn_balances(
+                source_name, all_products, "totalAmount"
+            )
+            logger.debug(
+                f"[{self.name.upper()}] Flexible Earn balances: \n{earn_balances}"
+            )
+            return earn_balances
+        except Exception as e:
+            logger.error(
+                f"[{self.name.upper()}] Error while retrieving flexible balances from "
+                f"Binance"
+            )
+            logger.debug(f"[{self.name.upper()}] Full exception: {e}")
+            return []
+
+    async def get_earn_locked_balances(self) -> List[Tuple[str, str, float]]:
+        logger.info(
+            f"[{self.name.upper()}] Extracting balances from locked earn account..."
+        )
+        source_name = f"{self.name} (Locked Earn)"
+        try:
+            all_products = await self._get_earn_positions(
+                "/sapi/v1/simple-earn/locked/position"
+            )
+            logger.info(
+                f"[{self.name.upper()}] Retrieved {len(all_products)} products from "
+                f"locked earn"
+            )
+            logger.debug(f"[{self.name.upper()}] Full response: {all_products}")
+            earn_balances = parse_earn_balances(source_name, all_products, "amount")
+            logger.debug(
+                f"[{self.name.upper()}] Locked Earn balances: \n{earn_balances}"
+            )
+            return earn_balances
+        except Exception as e:
+            logger.error(
+                f"[{self.name.upper()}] Error while retrieving locked balances from "
+                f"Binance"
+            )
+            logger.debug(f"[{self.name.upper()}] Full exception: {e}")
+            return []
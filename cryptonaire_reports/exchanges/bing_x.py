@@ -1,13 +1,13 @@
 import hmac
 import json
-import requests
 import structlog
 import time
 
 from hashlib import sha256
 from typing import Tuple, List, Dict, Optional
 from cryptonaire_reports.exchanges.exchange import Exchange
-from cryptonaire_reports.utils.singleton import Singleton
+from cryptonaire_reports.utils.config import ExchangeConfig
+from cryptonaire_reports.utils.http import HttpClient
 from cryptonaire_reports.utils.symbol_corrector import symbol_corrector
 
 logger = structlog.get_logger()
@@ -15,53 +15,61 @@ logger = structlog.get_logger()
 API_URL = "https://open-api.bingx.com"
 
 
-class BingX(Exchange, metaclass=Singleton):
+def signed_url(endpoint: str, params: Dict, secret_key: str) -> str:
+    """Builds the URL of a signed request: the parameters sorted by name, followed by
+    the timestamp and the HMAC-SHA256 signature of all of them."""
+    sorted_keys = sorted(params)
+    params_str = "&".join(["%s=%s" % (x, params[x]) for x in sorted_keys])
+    if params_str != "":
+        params_str += "&"
+    params_str += "timestamp=" + str(int(time.time() * 1000))
+    signature = hmac.new(
+        secret_key.encode("utf-8"), params_str.encode("utf-8"), digestmod=sha256
+    ).hexdigest()
+    return "%s%s?%s&signature=%s" % (API_URL, endpoint, params_str, signature)
 
-    def __init__(self) -> None:
-        super().__init__("BingX")
+
+def parse_spot_balances(
+    source_name: str, response: Dict
+) -> List[Tuple[str, str, float]]:
+    """Extracts the balances from the response of the spot balance endpoint."""
+    spot_balances = []
+    for coin_asset in response["data"]["balances"]:
+        coin_ticker = symbol_corrector(coin_asset["asset"])
+        balance = float(coin_asset["free"]) + float(coin_asset["locked"])
+        if not balance > 0:
+            continue
+        spot_balances.append((source_name, coin_ticker, balance))
+    return spot_balances
+
+
+class BingX(Exchange):
+    wallets = {"Spot": "get_spot_balances", "Wealth": "get_wealth_balances"}
+
+    def __init__(self, config: Optional[ExchangeConfig] = None) -> None:
+        super().__init__("BingX", config)
         if not self.active:
             return
-
-    @property
-    def name(self) -> str:
-        return "BingX"
+        self.http = HttpClient()
 
     def _api_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
-        def _parse_param(params_map):
-            sorted_keys = sorted(params_map)
-            params_str = "&".join(["%s=%s" % (x, params_map[x]) for x in sorted_keys])
-            if params_str != "":
-                return params_str + "&timestamp=" + str(int(time.time() * 1000))
-            else:
-                return params_str + "timestamp=" + str(int(time.time() * 1000))
-
-        params = params or {}
+        self.throttle()
         payload = {}
         method = "GET"
-        params = _parse_param(params)
-        signature = hmac.new(
-            self._secret_key.encode("utf-8"), params.encode("utf-8"), digestmod=sha256
-        ).hexdigest()
-        url = "%s%s?%s&signature=%s" % (API_URL, endpoint, params, signature)
+        url = signed_url(endpoint, params or {}, self._secret_key)
         headers = {"X-BX-APIKEY": self._api_key}
-        response = requests.request(method, url, headers=headers, data=payload)
+        response = self.http.request(method, url, headers=headers, data=payload)
         return json.loads(response.text)
 
     def get_spot_balances(self) -> List[Tuple[str, str, float]]:
         logger.info(f"[{self.name.upper()}] Extracting balances from Spot account...")
-        source_name = "BingX (Spot)"
-        spot_balances = []
+        source_name = f"{self.name} (Spot)"
         try:
             spot_acc_balance = self._api_request(
                 endpoint="/openApi/spot/v1/account/balance"
             )
             logger.debug(f"[{self.name.upper()}] Full response: {spot_acc_balance}")
-            for coin_asset in spot_acc_balance["data"]["balances"]:
-                coin_ticker = symbol_corrector(coin_asset["asset"])
-                balance = float(coin_asset["free"]) + float(coin_asset["locked"])
-                if not balance > 0:
-                    continue
-                spot_balances.append((source_name, coin_ticker, balance))
+            spot_balances = parse_spot_balances(source_name, spot_acc_balance)
             logger.debug(f"[{self.name.upper()}] Spot balances: \n{spot_balances}")
             return spot_balances
         except Exception as e:
@@ -77,10 +85,3 @@ class BingX(Exchange, metaclass=Singleton):
             "must be entered manually until the API enables wealth balances."
         )
         return []
-
-    def get_balances(self) -> List[Tuple[str, str, float]]:
-        balances = []
-        balances.extend(self.get_spot_balances())
-        balances.extend(self.get_wealth_balances())
-        logger.info(f"[{self.name.upper()}] All balances extracted successfully")
-        return balances
@@ -0,0 +1,58 @@
+from typing import Dict, List, Optional, Tuple
+
+import structlog
+from cryptonaire_reports.exchanges.async_exchange import AsyncExchange
+from cryptonaire_reports.exchanges.bing_x import parse_spot_balances
+from cryptonaire_reports.exchanges.bing_x import signed_url
+from cryptonaire_reports.utils.async_http import AsyncHttpClient
+from cryptonaire_reports.utils.config import ExchangeConfig
+
+logger = structlog.get_logger()
+
+
+class AsyncBingX(AsyncExchange):
+    """BingX adapter for the asyncio engine. Same signed requests as BingX, sent with
+    httpx."""
+
+    wallets = {"Spot": "get_spot_balances", "Wealth": "get_wealth_balances"}
+
+    def __init__(self, config: Optional[ExchangeConfig] = None) -> None:
+        super().__init__("BingX", config)
+        if not self.active:
+            return
+        self.http = AsyncHttpClient()
+
+    async def _api_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
+        await self.throttle_async()
+        response = await self.http.get(
+            signed_url(endpoint, params or {}, self._secret_key),
+            headers={"X-BX-APIKEY": self._api_key},
+        )
+        return response.json()
+
+    async def get_spot_balances(self) -> List[Tuple[str, str, float]]:
+        logger.info(f"[{self.name.upper()}] Extracting balances from Spot account...")
+        source_name = f"{self.name} (Spot)"
+        try:
+            spot_acc_balance = await self._api_request(
+                endpoint="/openApi/spot/v1/account/balance"
+            )
+            logger.debug(f"[{self.name.upper()}] Full response: {spot_acc_balance}")
+            spot_balances = parse_spot_balances(source_name, spot_acc_balance)
+            logger.debug(f"[{self.name.upper()}] Spot balances: \n{spot_balances}")
+            return spot_balances
+        except Exception as e:
+            logger.error(
+                f"[{self.name.upper()}] Error while retrieving spot balances from "
+                f"{self.name.upper()}"
+            )
+            logger.debug(f"[{self.name.upper()}] Full exception: {e}")
+            return []
+
+    async def get_wealth_balances(self) -> List[Tuple[str, str, float]]:
+        logger.warning(
+            f"[{self.name.upper()}] BingX doesn't provide wealth balances yet. That "
+            "information must be entered manually until the API enables wealth "
+            "balances."
+        )
+        return []
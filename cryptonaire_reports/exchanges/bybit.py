@@ -1,33 +1,31 @@
 import structlog
 
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 from cryptonaire_reports.exchanges.exchange import Exchange
-from cryptonaire_reports.utils.singleton import Singleton
+from cryptonaire_reports.utils.config import ExchangeConfig
 from cryptonaire_reports.utils.symbol_corrector import symbol_corrector
 from pybit.unified_trading import HTTP
 
 logger = structlog.get_logger()
 
 
-class ByBit(Exchange, metaclass=Singleton):
+class ByBit(Exchange):
+    wallets = {"Unified Trading": "get_unified_trading_balances"}
 
-    def __init__(self) -> None:
-        super().__init__("ByBit")
+    def __init__(self, config: Optional[ExchangeConfig] = None) -> None:
+        super().__init__("ByBit", config)
         if not self.active:
             return
         self.client = HTTP(
             testnet=False, api_key=self._api_key, api_secret=self._secret_key
         )
 
-    @property
-    def name(self) -> str:
-        return "ByBit"
-
     def get_unified_trading_balances(self) -> List[Tuple[str, str, float]]:
         logger.info(f"[{self.name.upper()}] Extracting balances from Spot account...")
-        source_name = "ByBit (Unified Trading)"
+        source_name = f"{self.name} (Unified Trading)"
         spot_balances = []
         try:
+            self.throttle()
             unified_account_wallet = self.client.get_wallet_balance(
                 accountType="UNIFIED"
             )
@@ -50,9 +48,3 @@ class ByBit(Exchange, metaclass=Singleton):
             )
             logger.debug(f"[{self.name.upper()}] Full exception: {e}")
             return []
-
-    def get_balances(self) -> List[Tuple[str, str, float]]:
-        balances = []
-        balances.extend(self.get_unified_trading_balances())
-        logger.info(f"[{self.name.upper()}] All balances extracted successfully")
-        return balances
@@ -1,30 +1,184 @@
-import abc
-from typing import Tuple, List
-from configparser import ConfigParser
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple, List
 
 import structlog
+from cryptonaire_reports.utils.config import ExchangeConfig
+from cryptonaire_reports.utils.config import load_config
+from cryptonaire_reports.utils.fetcher import BalanceFetcher
+from cryptonaire_reports.utils.fetcher import to_thread
+from cryptonaire_reports.utils.fetcher import untimed
+from cryptonaire_reports.utils.rate_limiter import RateLimiter
+from cryptonaire_reports.utils.timings import Timings
+from cryptonaire_reports.utils.timings import WALLET_FETCH
 
 logger = structlog.get_logger()
 
+# Pages of the same endpoint requested at the same time by fetch_all_pages
+MAX_CONCURRENT_PAGES = 4
+
 
 class Exchange:
+    # Limits shared by all the accounts of the same exchange. They can be changed with
+    # MAX_CONCURRENT_ACCOUNTS and REQUESTS_PER_MINUTE in the exchange section
+    max_concurrent_accounts: int = 4
+    requests_per_minute: Optional[float] = 120
+    # Wallets of the exchange, mapped to the method that returns their balances. They
+    # are independent requests, so get_balances fetches all of them concurrently
+    wallets: Dict[str, str] = {}
+
+    _limits_lock = threading.Lock()
+    _account_limits: Dict[str, int] = {}
+    _semaphores: Dict[str, threading.BoundedSemaphore] = {}
+    _rate_limiters: Dict[str, RateLimiter] = {}
 
-    def __init__(self, exchange_name: str) -> None:
-        config = ConfigParser()
-        config.read("cryptonaire_reports.config")
-        if exchange_name not in config:
+    def __init__(
+        self, exchange_name: str, config: Optional[ExchangeConfig] = None
+    ) -> None:
+        self.exchange_name = exchange_name
+        if config is None:
+            accounts = load_config().exchange_accounts(exchange_name)
+            config = accounts[0] if accounts else None
+        self.account = config.account if config else None
+        if config is None:
             logger.warning(f"No keys found for {exchange_name}, skipping exchange")
             self.active = False
         else:
-            logger.info(f"API keys found for {exchange_name}")
+            logger.info(f"API keys found for {self.name}")
             self.active = True
-            self._api_key = config.get(exchange_name, "API_KEY")
-            self._secret_key = config.get(exchange_name, "SECRET_KEY")
+            self._api_key = config.api_key
+            self._secret_key = config.secret_key
+            self._init_limits(config)
+
+    @classmethod
+    def from_config(cls) -> List["Exchange"]:
+        """Creates one instance per account configured for the exchange. If the
+        exchange isn't configured, the only instance returned is inactive."""
+        first_account = cls()
+        if not first_account.active:
+            return [first_account]
+        accounts = load_config().exchange_accounts(first_account.exchange_name)
+        return [first_account] + [cls(config=account) for account in accounts[1:]]
 
     @property
     def name(self) -> str:
-        pass
+        """Name of the exchange, followed by the account name if there is one. It's
+        used as the prefix of the source column of the report."""
+        if self.account:
+            return f"{self.exchange_name}:{self.account}"
+        return self.exchange_name
+
+    def _init_limits(self, config: ExchangeConfig) -> None:
+        with self._limits_lock:
+            if self.exchange_name in self._semaphores:
+                return
+            self._account_limits[self.exchange_name] = (
+                config.max_concurrent_accounts or self.max_concurrent_accounts
+            )
+            self._semaphores[self.exchange_name] = threading.BoundedSemaphore(
+                self._account_limits[self.exchange_name]
+            )
+            self._rate_limiters[self.exchange_name] = RateLimiter(
+                requests_per_minute=config.requests_per_minute
+                or self.requests_per_minute,
+                name=self.exchange_name,
+            )
+
+    def throttle(self) -> None:
+        """Waits until a new request can be sent to the exchange without going over
+        the requests per minute shared by all its accounts."""
+        self._rate_limiters[self.exchange_name].acquire()
+
+    def fetch_all_pages(
+        self,
+        fetch_page: Callable[[int], Dict],
+        page_size: int,
+        rows_key: str = "rows",
+        total_key: str = "total",
+        first_page: int = 1,
+    ) -> List[Dict]:
+        """Retrieves every row of a paginated endpoint. The first page tells us the
+        total number of rows, and the rest of the pages are then requested
+        concurrently.
+
+        Args:
+            fetch_page (Callable[[int], Dict]): Function that requests the given page
+                number and returns the response.
+            page_size (int): Number of rows requested per page.
+            rows_key (str): Key of the response that contains the rows.
+            total_key (str): Key of the response that contains the total number of
+                rows.
+            first_page (int): Number of the first page (1 unless the API counts
+                from 0).
+
+        Returns:
+            List[Dict]: Rows of all the pages, in order.
+        """
+        self.throttle()
+        response = fetch_page(first_page)
+        rows = list(response[rows_key])
+        total_pages = math.ceil(int(response[total_key]) / page_size)
+        if total_pages <= 1:
+            return rows
+
+        def _fetch_page(page: int) -> List[Dict]:
+            self.throttle()
+            return fetch_page(page)[rows_key]
+
+        remaining_pages = range(first_page + 1, first_page + total_pages)
+        with ThreadPoolExecutor(
+            max_workers=min(MAX_CONCURRENT_PAGES, len(remaining_pages))
+        ) as executor:
+            for page_rows in executor.map(_fetch_page, remaining_pages):
+                rows.extend(page_rows)
+        return rows
+
+    def fetch_balances(self) -> List[Tuple[str, str, float]]:
+        """Same as get_balances, but waits if too many accounts of the same exchange
+        are already being fetched. The wait doesn't count against the timeout of the
+        account."""
+        semaphore = self._semaphores[self.exchange_name]
+        with untimed():
+            semaphore.acquire()
+        try:
+            return self.get_balances()
+        finally:
+            semaphore.release()
+
+    async def fetch_balances_async(self) -> List[Tuple[str, str, float]]:
+        """Used by the asyncio engine. Exchanges built on a blocking SDK are run in a
+        worker thread, so they don't block the event loop."""
+        return await to_thread(self.fetch_balances)
+
+    def get_balances(self) -> List[Tuple[str, str, float]]:
+        """Fetches the balances of all the wallets of the exchange concurrently. A
+        wallet that fails doesn't prevent the others from being reported.
 
-    @abc.abstractmethod
-    def get_balances(self) -> Tuple[str, str, float]:
-        raise NotImplementedError
+        Returns:
+            List[Tuple[str, str, float]]: List of tuples that contain (source, symbol,
+                balance), in the order the wallets are declared.
+        """
+        if not self.wallets:
+            raise NotImplementedError(
+                f"{type(self).__name__} must declare its wallets or override "
+                f"get_balances"
+            )
+        wallet_fetchers = {
+            f"{self.name} ({wallet})": getattr(self, method)
+            for wallet, method in self.wallets.items()
+        }
+        # The timeout of the whole exchange is already enforced by the portfolio
+        fetcher = BalanceFetcher(max_workers=len(wallet_fetchers), timeout=None)
+        results = fetcher.fetch(wallet_fetchers)
+        Timings().record_all(WALLET_FETCH, fetcher.timings)
+        balances = []
+        for wallet in wallet_fetchers:
+            if wallet in results:
+                logger.debug(
+                    f"[{wallet.upper()}] {len(results[wallet])} balances fetched in "
+                    f"{fetcher.timings[wallet]:.2f}s"
+                )
+                balances.extend(results[wallet])
+        logger.info(f"[{self.name.upper()}] All balances extracted successfully")
+        return balances
@@ -1,8 +1,8 @@
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 
 import structlog
 from cryptonaire_reports.exchanges.exchange import Exchange
-from cryptonaire_reports.utils.singleton import Singleton
+from cryptonaire_reports.utils.config import ExchangeConfig
 from cryptonaire_reports.utils.symbol_corrector import symbol_corrector
 from gate_api import ApiClient, Configuration
 from gate_api.api.spot_api import SpotApi
@@ -15,10 +15,11 @@ logger = structlog.get_logger()
 API_URL = "https://api.gateio.ws/api/v4"
 
 
-class Gate(Exchange, metaclass=Singleton):
+class Gate(Exchange):
+    wallets = {"Spot": "get_spot_balances", "Earn": "get_earn_balances"}
 
-    def __init__(self) -> None:
-        super().__init__("Gate")
+    def __init__(self, config: Optional[ExchangeConfig] = None) -> None:
+        super().__init__("Gate", config)
         if not self.active:
             return
         config = Configuration(key=self._api_key, secret=self._secret_key, host=API_URL)
@@ -26,10 +27,6 @@ class Gate(Exchange, metaclass=Singleton):
         self.spot_api = SpotApi(api_client=self._api_client)
         self.earn_uni_api = EarnUniApi(api_client=self._api_client)
 
-    @property
-    def name(self) -> str:
-        return "Gate"
-
     def get_spot_balances(self) -> List[Tuple[str, str, float]]:
         """Extracts the balance from the spot account on Gate.io
 
@@ -37,10 +34,11 @@ class Gate(Exchange, metaclass=Singleton):
             List[Tuple[str, float]]: List of tuples that cointain (symbol, balance)
         """
         logger.info(f"[{self.name.upper()}] Extracting balances from Spot account...")
-        source_name = "Gate (Spot)"
+        source_name = f"{self.name} (Spot)"
         spot_balances = []
         try:
             coin_asset: SpotAccount
+            self.throttle()
             response = self.spot_api.list_spot_accounts()
             logger.debug(f"[{self.name.upper()}] Full response: {response}")
             for coin_asset in response:
@@ -60,10 +58,11 @@ class Gate(Exchange, metaclass=Singleton):
 
     def get_earn_balances(self) -> List[Tuple[str, str, float]]:
         logger.info(f"[{self.name.upper()}] Extracting balances from Earn account...")
-        source_name = "Gate (Earn)"
+        source_name = f"{self.name} (Earn)"
         earn_balances = []
         try:
             earn_lend: UniLend
+            self.throttle()
             response = self.earn_uni_api.list_user_uni_lends()
             logger.debug(f"[{self.name.upper()}] Full response: {response}")
             for earn_lend in response:
@@ -80,16 +79,3 @@ class Gate(Exchange, metaclass=Singleton):
             )
             logger.debug(f"[{self.name.upper()}] Full exception: {e}")
             return []
-
-    def get_balances(self) -> List[Tuple[str, str, float]]:
-        """Extracts the balances from the following accounts in gate.io:
-        - Spot
-
-        Returns:
-            List[Tuple[str, float]]: List of tuples that cointain (symbol, balance)
-        """
-        balances = []
-        balances.extend(self.get_spot_balances())
-        balances.extend(self.get_earn_balances())
-        logger.info(f"[{self.name.upper()}] All balances extracted successfully")
-        return balances
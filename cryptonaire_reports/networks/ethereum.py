@@ -1,58 +1,108 @@
-import requests
-from typing import List, Tuple
+from decimal import Decimal
+from functools import partial
+from typing import Dict, List, Optional, Tuple
 
 import structlog
-from cryptonaire_reports.networks.network import Network
+from cryptonaire_reports.networks.evm import NATIVE_DECIMALS
+from cryptonaire_reports.networks.evm import EvmNetwork
+from cryptonaire_reports.utils.config import NetworkConfig
+from cryptonaire_reports.utils.http import HttpClient
+from cryptonaire_reports.utils.tokens import TokenCache
+from cryptonaire_reports.utils.tokens import TokenInfo
+from cryptonaire_reports.utils.tokens import is_spam
 
 logger = structlog.get_logger()
 
 API_URL = "https://api.ethplorer.io"
+ETH = TokenInfo("ETH", NATIVE_DECIMALS)
 
 
-class Ethereum(Network):
+class Ethereum(EvmNetwork):
+    """Balances of the configured Ethereum addresses.
 
-    def __init__(self) -> None:
-        super().__init__("ETHEREUM")
+    By default they are read from Ethplorer, one request per address, which also
+    finds every token the address holds. With RPC_URL in the [Ethereum] section they
+    are read from a JSON-RPC node instead, like any other EVM chain. Either way,
+    addresses or batches are fetched concurrently and the ones that fail are left
+    out without losing the rest.
+    """
 
-    @property
-    def name(self) -> str:
-        return "Ethereum"
+    def __init__(self, config: Optional[NetworkConfig] = None) -> None:
+        super().__init__("ETHEREUM", config)
+        self.http = HttpClient()
+
+    @classmethod
+    def from_config(cls) -> List["Ethereum"]:
+        return [cls()]
 
     def get_eth_mainnet_balances(self) -> List[Tuple[str, str, float]]:
         logger.info(
             f"[{self.name.upper()}] Extracting balances from Ethereum Mainnet..."
         )
-        mainnet_balances = []
-        try:
-            for address in self._addresses:
-                source_name = f"Ethereum Wallet"
-                address_info = requests.get(
-                    f"{API_URL}/getAddressInfo/{address}?apiKey=freekey"
-                ).json()
-                # Extract ETH Balance
-                eth_balance = address_info["ETH"]["balance"]
-                mainnet_balances.append((source_name, "ETH", eth_balance))
-                # Extract additional tokens balance
-                for token in address_info["tokens"]:
-                    symbol = token["tokenInfo"]["symbol"]
-                    exploded_balance = int(token["balance"])
-                    decimal_position = token["tokenInfo"]["decimals"]
-                    divider = float("1e+" + decimal_position)
-                    balance = exploded_balance / divider
-                    mainnet_balances.append((source_name, symbol, balance))
-            logger.debug(
-                f"[{self.name.upper()}] Ethereum Mainnet balances: \n{mainnet_balances}"
-            )
-            return mainnet_balances
-        except Exception as e:
-            logger.error(
-                f"[{self.name.upper()}] Error while retrieving balances from {self.name.upper()}"
+        return self.fetch_tasks(
+            {
+                f"{self.name}:{address}": partial(self.get_address_balances, address)
+                for address in self._addresses
+            }
+        )
+
+    def get_address_balances(self, address: str) -> List[Tuple[str, str, float]]:
+        """Gets the ETH and token balances of an address from Ethplorer."""
+        self.rate_limiter.acquire()
+        response = self.http.get(
+            f"{API_URL}/getAddressInfo/{address}",
+            params={"apiKey": self.config.api_key},
+        )
+        response.raise_for_status()
+        address_info = response.json()
+        # Extract ETH Balance. rawBalance is the exact amount in wei
+        eth = address_info["ETH"]
+        if "rawBalance" in eth:
+            eth_balance = ETH.to_float(int(eth["rawBalance"]))
+        else:
+            eth_balance = eth["balance"]
+        balances = [(self.source_name, "ETH", eth_balance)]
+        # Extract additional tokens balance
+        for token in address_info.get("tokens", []):
+            contract = token["tokenInfo"]["address"]
+            if self.is_spam_contract(contract):
+                continue
+            token_info = self.get_token(token["tokenInfo"])
+            if self.is_skipped(contract, token_info):
+                continue
+            # rawBalance is exact, balance can be a float in scientific notation
+            raw_balance = token.get("rawBalance")
+            if raw_balance is not None:
+                units = int(raw_balance)
+            else:
+                units = int(Decimal(str(token["balance"])))
+            balances.append(
+                (self.source_name, token_info.symbol, token_info.to_float(units))
             )
-            logger.debug(f"[{self.name.upper()}] Full exception: {e}")
-            return []
+        return balances
+
+    def get_token(self, token_info: Dict) -> TokenInfo:
+        """Returns the symbol, decimals and spam flag of an Ethplorer tokenInfo. They
+        are parsed the first time the contract is seen and cached afterwards."""
+        contract = token_info["address"]
+        token = TokenCache().get(self.chain_id, contract)
+        if token is None:
+            symbol = token_info.get("symbol") or ""
+            try:
+                decimals = int(token_info.get("decimals") or 0)
+                spam = not symbol or is_spam(symbol)
+            except ValueError:
+                # Without decimals the balance means nothing, so it's always skipped
+                symbol, decimals, spam = "", 0, True
+            token = TokenInfo(symbol, decimals, spam)
+            TokenCache().set(self.chain_id, contract, token)
+        return token
 
     def get_balances(self) -> List[Tuple[str, str, float]]:
+        if self.rpc:
+            return super().get_balances()
         balances = []
         balances.extend(self.get_eth_mainnet_balances())
+        TokenCache().save()
         logger.info(f"[{self.name.upper()}] All balances extracted successfully")
         return balances
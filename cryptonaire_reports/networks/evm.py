@@ -0,0 +1,291 @@
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+import structlog
+from cryptonaire_reports.networks.network import Network
+from cryptonaire_reports.utils.chains import EVM_CHAINS
+from cryptonaire_reports.utils.chains import EvmChain
+from cryptonaire_reports.utils.config import NetworkConfig
+from cryptonaire_reports.utils.config import load_config
+from cryptonaire_reports.utils.evm import DECIMALS_SELECTOR
+from cryptonaire_reports.utils.evm import MULTICALL3_ADDRESS
+from cryptonaire_reports.utils.evm import SYMBOL_SELECTOR
+from cryptonaire_reports.utils.evm import JsonRpcClient
+from cryptonaire_reports.utils.evm import JsonRpcError
+from cryptonaire_reports.utils.evm import balance_of_call
+from cryptonaire_reports.utils.evm import decode_aggregate3
+from cryptonaire_reports.utils.evm import decode_string
+from cryptonaire_reports.utils.evm import decode_uint
+from cryptonaire_reports.utils.evm import encode_aggregate3
+from cryptonaire_reports.utils.fetcher import BalanceFetcher
+from cryptonaire_reports.utils.rate_limiter import RateLimiter
+from cryptonaire_reports.utils.timings import Timings
+from cryptonaire_reports.utils.timings import WALLET_FETCH
+from cryptonaire_reports.utils.tokens import TokenCache
+from cryptonaire_reports.utils.tokens import TokenInfo
+from cryptonaire_reports.utils.tokens import is_spam
+
+logger = structlog.get_logger()
+
+NATIVE_DECIMALS = 18
+# Calls per Multicall3 eth_call, well under the gas cap of an eth_call
+MULTICALL_CHUNK_SIZE = 500
+# Chains read by their own network, which can use other APIs besides a node
+DEDICATED_CHAINS = ["ETHEREUM"]
+
+
+class EvmNetwork(Network):
+    """Balances of the configured addresses on any EVM chain, read from a JSON-RPC
+    node.
+
+    Every chain in [Networks] is an instance: the built-in ones (see EVM_CHAINS) only
+    need their addresses, others also need CHAIN_ID, NATIVE_SYMBOL and RPC_URL in
+    their own section. A node can't list the tokens of an address, so the token
+    contracts to check are given in TOKENS.
+
+    Addresses are split into batches of BATCH_SIZE, and each batch is a single
+    JSON-RPC batch request: the native balance of every address, plus the balanceOf
+    of every token through Multicall3. Batches run concurrently, and a batch that
+    fails is left out without losing the rest. All chains run at the same time, as
+    independent sources of the report.
+
+    Args:
+        network (str): Name of the chain in [Networks], e.g. ARBITRUM.
+        config (Optional[NetworkConfig]): Config of the chain. Read from the config
+            file if not given.
+    """
+
+    def __init__(self, network: str, config: Optional[NetworkConfig] = None) -> None:
+        super().__init__(network.upper(), config)
+        self.chain = EVM_CHAINS.get(network.upper(), EvmChain(network.title(), 0, ""))
+        if not self.active:
+            return
+        self.chain_id = self.config.chain_id or self.chain.chain_id
+        self.native_symbol = self.config.native_symbol or self.chain.native_symbol
+        self.rate_limiter = RateLimiter(
+            requests_per_minute=self.config.requests_per_minute, name=self.name
+        )
+        rpc_url = self.config.rpc_url or self.chain.rpc_url
+        self.rpc = JsonRpcClient(rpc_url) if rpc_url else None
+        filters = load_config().filters
+        self.spam_contracts = set(filters.spam_contracts)
+        self.allow_contracts = set(filters.allow_contracts)
+        self.allow_symbols = set(filters.allow)
+
+    @classmethod
+    def from_config(cls) -> List["EvmNetwork"]:
+        """Creates one instance per EVM chain in [Networks], besides the ones with
+        their own source (Ethereum)."""
+        config = load_config()
+        return [
+            cls(name)
+            for name, network in config.networks.items()
+            if name not in DEDICATED_CHAINS
+            and (name in EVM_CHAINS or network.chain_id is not None)
+        ]
+
+    @property
+    def name(self) -> str:
+        return self.chain.name
+
+    @property
+    def source_name(self) -> str:
+        return f"{self.name} Wallet"
+
+    def get_balances(self) -> List[Tuple[str, str, float]]:
+        if self.rpc is None or not self.native_symbol:
+            logger.error(
+                f"[{self.name.upper()}] RPC_URL, CHAIN_ID and NATIVE_SYMBOL are "
+                f"needed in the [{self.name}] section"
+            )
+            return []
+        logger.info(f"[{self.name.upper()}] Extracting balances from {self.name}...")
+        tokens = self.get_token_info()
+        balances = self.fetch_tasks(
+            {
+                f"{self.name}:batch {index + 1}": partial(
+                    self.get_batch_balances, list(shard), tokens
+                )
+                for index, shard in enumerate(
+                    self._addresses.shards(self.config.batch_size)
+                )
+            }
+        )
+        TokenCache().save()
+        logger.info(f"[{self.name.upper()}] All balances extracted successfully")
+        return balances
+
+    def fetch_tasks(
+        self, tasks: Dict[str, Callable[[], List[Tuple[str, str, float]]]]
+    ) -> List[Tuple[str, str, float]]:
+        """Runs the tasks (addresses or batches of addresses) concurrently and
+        returns their balances, leaving out the tasks that failed or didn't finish
+        before the deadline of the network."""
+        fetcher = BalanceFetcher(max_workers=self.config.max_workers)
+        results = fetcher.fetch(tasks, deadline=self.deadline)
+        Timings().record_all(WALLET_FETCH, fetcher.timings)
+        missing = [task for task in tasks if task not in results]
+        if missing:
+            logger.warning(
+                f"[{self.name.upper()}] {len(missing)} of {len(tasks)} requests failed "
+                f"or didn't finish in time, their addresses are left out of the report"
+            )
+            logger.info(f"[{self.name.upper()}] Missing: {', '.join(missing)}")
+        # Same order as the addresses, whatever the order they finished in
+        balances = [
+            balance for task in tasks if task in results for balance in results[task]
+        ]
+        logger.debug(f"[{self.name.upper()}] {self.name} balances: \n{balances}")
+        return balances
+
+    def get_token_info(self) -> Dict[str, TokenInfo]:
+        """Returns the symbol and decimals of the configured tokens. The ones that
+        aren't in the shared TokenCache yet are read from the node.
+
+        Returns:
+            Dict[str, TokenInfo]: Symbol and decimals of each token contract. Spam
+                tokens (including SPAM_CONTRACTS in [Filters]) and tokens that don't
+                answer both calls are left out.
+        """
+        contracts = [
+            contract
+            for contract in self.config.tokens
+            if not self.is_spam_contract(contract)
+        ]
+        tokens = TokenCache().get_many(self.chain_id, contracts)
+        missing = [contract for contract in contracts if contract not in tokens]
+        if not missing:
+            return self._without_spam(tokens)
+        calls = [
+            (contract, bytes.fromhex(selector))
+            for contract in missing
+            for selector in [SYMBOL_SELECTOR, DECIMALS_SELECTOR]
+        ]
+        try:
+            returns = []
+            for chunk in self._multicall_chunks(calls):
+                self.rate_limiter.acquire()
+                result = self.rpc.call("eth_call", self._multicall_params(chunk))
+                returns += decode_aggregate3(result)
+        except Exception as e:
+            logger.error(f"[{self.name.upper()}] Error while retrieving the tokens")
+            logger.debug(f"[{self.name.upper()}] Full exception: {e}")
+            return self._without_spam(tokens)
+        new_tokens = {}
+        for index, contract in enumerate(missing):
+            symbol = decode_string(returns[2 * index])
+            decimals = decode_uint(returns[2 * index + 1])
+            if symbol is None or decimals is None:
+                logger.warning(
+                    f"[{self.name.upper()}] {contract} is not an ERC-20 token, "
+                    f"skipping it"
+                )
+                # Cached as spam, so it's not looked up again
+                new_tokens[contract] = TokenInfo("", 0, spam=True)
+                continue
+            new_tokens[contract] = TokenInfo(symbol, decimals, is_spam(symbol))
+        TokenCache().update(self.chain_id, new_tokens)
+        return self._without_spam({**tokens, **new_tokens})
+
+    def is_spam_contract(self, contract: str) -> bool:
+        """Whether a token contract is in SPAM_CONTRACTS, so it's never read."""
+        return self.apply_filters and contract.lower() in self.spam_contracts
+
+    def is_skipped(self, contract: str, token: TokenInfo) -> bool:
+        """Whether the balance of a token is left out.
+
+        Tokens without a symbol (not ERC-20, or without decimals) always are. Tokens
+        flagged as spam are too, unless their contract is in ALLOW_CONTRACTS, their
+        symbol is in ALLOW or the filters are disabled.
+        """
+        if not token.symbol:
+            return True
+        if not token.spam or not self.apply_filters:
+            return False
+        return (
+            contract.lower() not in self.allow_contracts
+            and token.symbol.upper() not in self.allow_symbols
+        )
+
+    def _without_spam(self, tokens: Dict[str, TokenInfo]) -> Dict[str, TokenInfo]:
+        spam = {
+            contract
+            for contract, token in tokens.items()
+            if self.is_skipped(contract, token)
+        }
+        if spam:
+            logger.debug(
+                f"[{self.name.upper()}] Skipping {len(spam)} spam tokens: {sorted(spam)}"
+            )
+        return {
+            contract: token
+            for contract, token in tokens.items()
+            if contract not in spam
+        }
+
+    def get_batch_balances(
+        self, addresses: List[str], tokens: Dict[str, TokenInfo]
+    ) -> List[Tuple[str, str, float]]:
+        """Gets the native and token balances of a batch of addresses from the node,
+        in a single JSON-RPC batch request.
+
+        Args:
+            addresses (List[str]): Addresses of the batch.
+            tokens (Dict[str, TokenInfo]): Symbol and decimals of each token
+                contract, as returned by get_token_info.
+
+        Returns:
+            List[Tuple[str, str, float]]: Non-zero balances of the batch.
+        """
+        token_calls = [
+            (contract, balance_of_call(address))
+            for address in addresses
+            for contract in tokens
+        ]
+        chunks = self._multicall_chunks(token_calls)
+        self.rate_limiter.acquire()
+        results = self.rpc.batch(
+            [("eth_getBalance", [address, "latest"]) for address in addresses]
+            + [("eth_call", self._multicall_params(chunk)) for chunk in chunks]
+        )
+        balances = []
+        native = TokenInfo(self.native_symbol, NATIVE_DECIMALS)
+        for address, result in zip(addresses, results):
+            if isinstance(result, JsonRpcError):
+                logger.error(
+                    f"[{self.name.upper()}] Error while retrieving the "
+                    f"{self.native_symbol} balance of {address}"
+                )
+                logger.debug(f"[{self.name.upper()}] Full exception: {result}")
+                continue
+            units = int(result, 16)
+            if units:
+                balances.append(
+                    (self.source_name, self.native_symbol, native.to_float(units))
+                )
+        returns: List[Optional[bytes]] = []
+        for chunk, result in zip(chunks, results[len(addresses) :]):
+            if isinstance(result, JsonRpcError):
+                logger.error(f"[{self.name.upper()}] Error while retrieving tokens")
+                logger.debug(f"[{self.name.upper()}] Full exception: {result}")
+                returns += [None] * len(chunk)
+                continue
+            returns += decode_aggregate3(result)
+        for (contract, _), data in zip(token_calls, returns):
+            units = decode_uint(data)
+            if units:
+                token = tokens[contract]
+                balances.append((self.source_name, token.symbol, token.to_float(units)))
+        return balances
+
+    @staticmethod
+    def _multicall_chunks(calls: List[Tuple[str, bytes]]) -> List[List]:
+        return [
+            calls[index : index + MULTICALL_CHUNK_SIZE]
+            for index in range(0, len(calls), MULTICALL_CHUNK_SIZE)
+        ]
+
+    @staticmethod
+    def _multicall_params(calls: List[Tuple[str, bytes]]) -> List:
+        """Params of an eth_call that runs all the calls through Multicall3."""
+        return [{"to": MULTICALL3_ADDRESS, "data": encode_aggregate3(calls)}, "latest"]
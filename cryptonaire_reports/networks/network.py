@@ -1,18 +1,30 @@
 import abc
-from configparser import ConfigParser
-from typing import Tuple
+import time
+from typing import List, Optional, Tuple
 
 import structlog
+from cryptonaire_reports.utils.addresses import AddressList
+from cryptonaire_reports.utils.config import NetworkConfig
+from cryptonaire_reports.utils.config import load_config
+from cryptonaire_reports.utils.fetcher import to_thread
 
 logger = structlog.get_logger()
 
+# Share of the timeout spent on requests, the rest is left to return the balances
+DEADLINE_RATIO = 0.95
+
 
 class Network:
+    # Whether the [Filters] rules that apply before the balances are aggregated (e.g.
+    # spam tokens) are used. Disabled with --no-filters
+    apply_filters = True
+    # Seconds the report waits for the balances of the network (the source timeout).
+    # Networks that send many requests return the ones that finished by then
+    timeout: Optional[float] = None
+    _started_at: Optional[float] = None
 
-    def __init__(self, network: str) -> None:
-        config = ConfigParser()
-        config.read("cryptonaire_reports.config")
-        if "Networks" not in config:
+    def __init__(self, network: str, config: Optional[NetworkConfig] = None) -> None:
+        if config is None and "Networks" not in load_config():
             logger.warning(
                 f"Network configuration not found. If you want to retrieve balances "
                 f"from {network}, you need to add the following section to your config "
@@ -24,19 +36,47 @@ class Network:
             self.active = False
             return
 
-        if config.get("Networks", network):
-            logger.info(f"Network addresses found for {network}")
+        config = config or load_config().network(network)
+        self.config = config
+        addresses = config.addresses if config else AddressList()
+        # Networks created with a plain list or string of addresses
+        if not isinstance(addresses, AddressList):
+            addresses = AddressList.parse(addresses)
+        if addresses:
+            logger.info(f"{len(addresses)} network addresses found for {network}")
             self.active = True
-            addresses = config.get("Networks", network)
-            self._addresses = addresses if isinstance(addresses, list) else [addresses]
+            self._addresses = addresses
         else:
             logger.warning(f"No addresses found for {network}, skipping network")
             self.active = False
 
+    @classmethod
+    def from_config(cls) -> List["Network"]:
+        """Creates the instances of the network. Networks that cover several chains
+        return one instance per configured chain."""
+        return [cls()]
+
     @property
     def name(self) -> str:
         pass
 
+    @property
+    def deadline(self) -> Optional[float]:
+        """time.monotonic() value at which the network should return the balances it
+        already has, a bit before the report stops waiting for it."""
+        if self.timeout is None or self._started_at is None:
+            return None
+        return self._started_at + self.timeout * DEADLINE_RATIO
+
+    def fetch_balances(self) -> List[Tuple[str, str, float]]:
+        self._started_at = time.monotonic()
+        return self.get_balances()
+
+    async def fetch_balances_async(self) -> List[Tuple[str, str, float]]:
+        """Used by the asyncio engine. The balances are fetched in a worker thread, so
+        they don't block the event loop."""
+        return await to_thread(self.fetch_balances)
+
     @abc.abstractmethod
     def get_balances(self) -> Tuple[str, str, float]:
         raise NotImplementedError
@@ -1,18 +1,17 @@
-from configparser import ConfigParser
-from typing import Tuple, List
+from typing import Optional, Tuple, List
 
 import structlog
 import pandas as pd
+from cryptonaire_reports.utils.config import ManualBalancesConfig
+from cryptonaire_reports.utils.config import load_config
 
 logger = structlog.get_logger()
 
 
 class ManualBalances:
 
-    def __init__(self) -> None:
-        config = ConfigParser()
-        config.read("cryptonaire_reports.config")
-        if "Manual Balances" not in config:
+    def __init__(self, config: Optional[ManualBalancesConfig] = None) -> None:
+        if config is None and "Manual Balances" not in load_config():
             logger.warning(
                 f"Manual balance configuration not found. If you want to add manual "
                 f"balances, you need to add the following section to your config "
@@ -24,8 +23,10 @@ class ManualBalances:
             self.active = False
             return
 
-        if config.get("Manual Balances", "CSV_FILE"):
-            self.csv_file_path = config.get("Manual Balances", "CSV_FILE")
+        config = config or load_config().manual_balances
+        if config:
+            self.active = True
+            self.csv_file_path = config.csv_file
         else:
             logger.warning(
                 f"CSV_FILE configuration not found. Make sure to add the CSV_FILE "
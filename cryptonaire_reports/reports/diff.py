@@ -0,0 +1,170 @@
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import structlog
+from cryptonaire_reports.reports.portfolio import Portfolio
+from cryptonaire_reports.utils.history import HistoryStore
+from cryptonaire_reports.utils.history import parse_timestamp
+
+logger = structlog.get_logger()
+
+SNAPSHOT_COLUMNS = ["source", "symbol", "balance", "price_usd", "total_value_usd"]
+# Rows can be compared per symbol, or per source and symbol
+DIFF_KEYS = {"symbol": ["symbol"], "source": ["source", "symbol"]}
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+
+
+def load_snapshot_file(path: Path) -> pd.DataFrame:
+    """Loads a snapshot from a portfolio report (CSV, XLSX, Parquet, Arrow or JSON
+    Lines) or from a CSV exported with crypto-report history show.
+
+    Portfolio reports only have one row per symbol, with the sources joined by "|",
+    so comparing them per source compares those combinations of sources.
+
+    Args:
+        path (Path): Path of the file.
+
+    Returns:
+        pd.DataFrame: Dataframe with the columns source, symbol, balance, price_usd
+            and total_value_usd.
+    """
+    path = Path(path)
+    suffixes = "".join(path.suffixes).lower()
+    if path.suffix.lower() in [".xlsx", ".xls"]:
+        try:
+            snapshot_pdf = pd.read_excel(path)
+        except ImportError:
+            logger.error(
+                f"Reading Excel reports requires openpyxl. Install it with: "
+                f"pip install cryptonaire-reports[excel]"
+            )
+            exit(1)
+    elif path.suffix.lower() in [".parquet", ".arrow"]:
+        try:
+            if path.suffix.lower() == ".parquet":
+                snapshot_pdf = pd.read_parquet(path)
+            else:
+                snapshot_pdf = pd.read_feather(path)
+        except ImportError:
+            logger.error(
+                f"Reading {path.suffix} reports requires pyarrow. Install it with: "
+                f"pip install cryptonaire-reports[arrow]"
+            )
+            exit(1)
+    elif suffixes.endswith((".jsonl", ".jsonl.gz")):
+        snapshot_pdf = pd.read_json(path, lines=True)
+    else:
+        snapshot_pdf = pd.read_csv(path)
+    # Portfolio reports use the readable column names
+    readable_names = {
+        name: column for column, name in Portfolio.get_rename_map().items()
+    }
+    snapshot_pdf = snapshot_pdf.rename(columns=readable_names)
+    missing = {"symbol", "balance"} - set(snapshot_pdf.columns)
+    if missing:
+        logger.error(f"{path} is not a snapshot. Missing columns: {', '.join(missing)}")
+        exit(1)
+    return snapshot_pdf.reindex(columns=SNAPSHOT_COLUMNS)
+
+
+def load_snapshot(reference: str, store: Optional[HistoryStore] = None) -> pd.DataFrame:
+    """Loads a snapshot given as a file path, or as a date or time of the history
+    store (the last snapshot taken at or before it)."""
+    if Path(reference).is_file():
+        logger.info(f"Loading snapshot from {reference}")
+        return load_snapshot_file(Path(reference))
+    try:
+        timestamp = parse_timestamp(reference, end_of_day=True)
+    except ValueError as e:
+        logger.error(
+            f"{reference} is neither an existing snapshot file nor a valid date or "
+            f"time (e.g. 2024-05-01 or 2024-05-01T10:30)"
+        )
+        logger.debug(f"Full exception: {e}")
+        exit(1)
+    store = store or HistoryStore()
+    snapshot = store.latest_snapshot(timestamp)
+    if snapshot is None:
+        logger.error(f"No snapshot found at or before {reference}")
+        exit(1)
+    logger.info(f"Loading snapshot {snapshot} from the history")
+    return store.load_snapshot(snapshot)[SNAPSHOT_COLUMNS]
+
+
+def diff_snapshots(
+    old_pdf: pd.DataFrame, new_pdf: pd.DataFrame, by: str = "symbol"
+) -> pd.DataFrame:
+    """Compares two snapshots. Both are aggregated by the keys and joined with a
+    single outer merge, so the cost grows linearly with the number of rows.
+
+    Args:
+        old_pdf (pd.DataFrame): Snapshot with the columns source, symbol, balance,
+            price_usd and total_value_usd.
+        new_pdf (pd.DataFrame): Snapshot to compare with, same columns.
+        by (str): "symbol" to compare the total of each symbol, "source" to compare
+            each symbol in each source.
+
+    Returns:
+        pd.DataFrame: One row per key, with the old and new balance, price and value,
+            their changes, and the status of the row (added, removed, changed or
+            unchanged), sorted by the absolute change in value.
+    """
+    keys = DIFF_KEYS[by]
+    old = _aggregate(old_pdf, keys)
+    new = _aggregate(new_pdf, keys)
+    diff_pdf = old.merge(
+        new, how="outer", on=keys, suffixes=("_old", "_new"), indicator=True
+    )
+    # Added and removed rows count as going from or to a zero balance
+    for column in ["balance", "total_value_usd"]:
+        old_values = diff_pdf[f"{column}_old"].fillna(0)
+        diff_pdf[f"{column}_change"] = diff_pdf[f"{column}_new"].fillna(0) - old_values
+    diff_pdf["price_usd_change"] = diff_pdf["price_usd_new"] - diff_pdf["price_usd_old"]
+    diff_pdf["status"] = np.select(
+        [
+            diff_pdf["_merge"] == "right_only",
+            diff_pdf["_merge"] == "left_only",
+            ~np.isclose(diff_pdf["balance_old"], diff_pdf["balance_new"])
+            | ~np.isclose(
+                diff_pdf["price_usd_old"], diff_pdf["price_usd_new"], equal_nan=True
+            ),
+        ],
+        [ADDED, REMOVED, CHANGED],
+        default=UNCHANGED,
+    )
+    diff_pdf = diff_pdf.sort_values(
+        "total_value_usd_change", key=abs, ascending=False, ignore_index=True
+    )
+    return diff_pdf[
+        keys
+        + [
+            "status",
+            "balance_old",
+            "balance_new",
+            "balance_change",
+            "price_usd_old",
+            "price_usd_new",
+            "price_usd_change",
+            "total_value_usd_old",
+            "total_value_usd_new",
+            "total_value_usd_change",
+        ]
+    ]
+
+
+def _aggregate(snapshot_pdf: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    snapshot_pdf = snapshot_pdf.assign(source=snapshot_pdf["source"].fillna(""))
+    aggregated_pdf = snapshot_pdf.groupby(keys, sort=False, as_index=False).agg(
+        balance=("balance", "sum"), price_usd=("price_usd", "first")
+    )
+    # Coins without a price keep an unknown value instead of adding up to 0
+    aggregated_pdf["total_value_usd"] = (
+        aggregated_pdf["balance"] * aggregated_pdf["price_usd"]
+    )
+    return aggregated_pdf
@@ -1,11 +1,35 @@
-from typing import List, Dict, Set, Tuple
+from typing import List, Dict, Optional, Set, Tuple
 from datetime import datetime
 from pathlib import Path
 
 import structlog
 import pandas as pd
 from cryptonaire_reports.reports.report import Report
+from cryptonaire_reports.utils.async_http import require_httpx
 from cryptonaire_reports.utils.coin_market_cap import CoinMarketCap
+from cryptonaire_reports.utils.config import load_config
+from cryptonaire_reports.utils.excel import write_excel
+from cryptonaire_reports.utils.fetcher import ASYNCIO_ENGINE
+from cryptonaire_reports.utils.fetcher import AsyncBalanceFetcher
+from cryptonaire_reports.utils.fetcher import BalanceFetcher
+from cryptonaire_reports.utils.fetcher import DEFAULT_MAX_WORKERS
+from cryptonaire_reports.utils.fetcher import DEFAULT_TIMEOUT
+from cryptonaire_reports.utils.fetcher import THREADS_ENGINE
+from cryptonaire_reports.utils.filters import BalanceFilter
+from cryptonaire_reports.utils.formats import CSV_FORMAT
+from cryptonaire_reports.utils.formats import FILE_EXTENSIONS
+from cryptonaire_reports.utils.formats import TYPED_FORMATS
+from cryptonaire_reports.utils.formats import XLSX_FORMAT
+from cryptonaire_reports.utils.history import HistoryStore
+from cryptonaire_reports.utils.timings import AGGREGATION
+from cryptonaire_reports.utils.timings import FILTER
+from cryptonaire_reports.utils.timings import HISTORY
+from cryptonaire_reports.utils.timings import SOURCE_FETCH
+from cryptonaire_reports.utils.timings import Timings
+from cryptonaire_reports.utils.timings import WRITE
+from cryptonaire_reports.utils.tokens import TokenCache
+from cryptonaire_reports.utils.writers import require_pyarrow
+from cryptonaire_reports.utils.writers import write_typed
 
 pd.options.display.float_format = "{:.2f}".format
 
@@ -19,63 +43,132 @@ class Portfolio(Report):
         exchanges: List[str] = ["all"],
         networks: List[str] = ["all"],
         include_manual: bool = False,
-        raw: bool = False
+        raw: bool = False,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        source_timeout: Optional[float] = DEFAULT_TIMEOUT,
+        refresh_cache: bool = False,
+        engine: str = THREADS_ENGINE,
+        offline: bool = False,
+        max_price_age: Optional[float] = None,
+        stale_while_revalidate: bool = False,
+        save_history: bool = True,
+        apply_filters: bool = True,
+        output_format: str = XLSX_FORMAT,
     ) -> None:
-        super().__init__(exchanges, networks, include_manual)
-        self.coin_market_cap = CoinMarketCap()
-        self.raw_format = raw
+        # Fail before querying the sources if they can't be fetched with the engine
+        # or the report can't be written
+        try:
+            if engine == ASYNCIO_ENGINE:
+                require_httpx()
+            require_pyarrow(output_format)
+        except ImportError as e:
+            logger.error(str(e))
+            exit(1)
+        super().__init__(exchanges, networks, include_manual, engine)
+        # Spam tokens are left out by the networks, before the balances are
+        # aggregated, and networks return the addresses they fetched before timing out
+        for network in self.networks:
+            network.apply_filters = apply_filters
+            network.timeout = source_timeout
+            if network.config is not None:
+                load_config().check_fetch_time(network.config, source_timeout)
+        if refresh_cache:
+            TokenCache().invalidate_spam()
+        history_config = load_config().history
+        self.history = (
+            HistoryStore(history_config)
+            if save_history and history_config.enabled
+            else None
+        )
+        # The value rule reads the prices of the previous runs, even if this one
+        # isn't saved
+        self.balance_filter = (
+            BalanceFilter(
+                load_config().filters,
+                HistoryStore(history_config) if history_config.enabled else None,
+            )
+            if apply_filters
+            else None
+        )
+        self.coin_market_cap = CoinMarketCap(
+            refresh_cache=refresh_cache,
+            offline=offline,
+            max_price_age=max_price_age,
+            stale_while_revalidate=stale_while_revalidate,
+        )
+        # raw is kept for backwards compatibility, it's the same as the csv format
+        self.output_format = CSV_FORMAT if raw else output_format
+        self.max_workers = max_workers
+        self.source_timeout = source_timeout
 
-    def get_balances_from_exchanges(self) -> List[Tuple]:
-        """Gets the balances from all the configured exchanges.
-        If you've got one coin across different exchanges, there will be one row per
-        exchange. If you've got one coin across different wallets within an exchange
-        (for example, having SOL in Spot and Earn), they will be two separate rows.
+    def fetch_balances(self, sources: List) -> List[Tuple]:
+        """Gets the balances from a list of exchanges and/or networks. All sources are
+        queried at the same time, so the total time is set by the slowest one. If a
+        source fails or doesn't answer within the timeout, it's skipped and the
+        balances from the rest of the sources are still returned.
+
+        Args:
+            sources (List): Exchanges and/or networks to extract the balances from.
 
         Returns:
-            pd.DataFrame: Pandas dataframe with the following columns:
-                exchange, symbol, balance
+            List[Tuple]: List of tuples that contain (source, symbol, balance)
         """
+        if self.engine == ASYNCIO_ENGINE:
+            fetcher = AsyncBalanceFetcher(
+                max_workers=self.max_workers, timeout=self.source_timeout
+            )
+            results = fetcher.fetch(
+                {source.name: source.fetch_balances_async for source in sources}
+            )
+        else:
+            fetcher = BalanceFetcher(
+                max_workers=self.max_workers, timeout=self.source_timeout
+            )
+            results = fetcher.fetch(
+                {source.name: source.fetch_balances for source in sources}
+            )
+        Timings().record_all(SOURCE_FETCH, fetcher.timings)
         balances = []
-        for exchange in self.exchanges:
-            exchange_balance = exchange.get_balances()
-            if not exchange_balance:
+        for source in sources:
+            source_balance = results.get(source.name)
+            if not source_balance:
                 logger.debug(
-                    f"[{exchange.name.upper()}] Balance data not found. Skipping."
+                    f"[{source.name.upper()}] Balance data not found. Skipping."
                 )
                 continue
             logger.info(
-                f"[{exchange.name.upper()}] Data collection completed successfully"
+                f"[{source.name.upper()}] Data collection completed successfully in "
+                f"{fetcher.timings[source.name]:.2f}s"
             )
-            balances.extend(exchange_balance)
+            balances.extend(source_balance)
         return balances
 
+    def get_balances_from_exchanges(self) -> List[Tuple]:
+        """Gets the balances from all the configured exchanges.
+        If you've got one coin across different exchanges, there will be one row per
+        exchange. If you've got one coin across different wallets within an exchange
+        (for example, having SOL in Spot and Earn), they will be two separate rows.
+
+        Returns:
+            List[Tuple]: List of tuples that contain (exchange, symbol, balance)
+        """
+        return self.fetch_balances(self.exchanges)
+
     def get_balances_from_networks(self) -> List[Tuple]:
         """Gets the balances from all the configured networks.
         If you've got one coin across different networks, there will be one row per
         network.
 
         Returns:
-            pd.DataFrame: Pandas dataframe with the following columns:
-                network, symbol, balance
+            List[Tuple]: List of tuples that contain (network, symbol, balance)
         """
-        balances = []
-        for network in self.networks:
-            network_balance = network.get_balances()
-            if not network_balance:
-                logger.debug(
-                    f"[{network.name.upper()}] Balance data not found. Skipping."
-                )
-                continue
-            logger.info(
-                f"[{network.name.upper()}] Data collection completed successfully"
-            )
-            balances.extend(network_balance)
-        return balances
+        return self.fetch_balances(self.networks)
 
     def get_balances_from_manual_file(self) -> List[Tuple]:
         if not self.manual:
             return []
-        balances = self.manual.get_balances()
+        with Timings().measure(SOURCE_FETCH, self.manual.name):
+            balances = self.manual.get_balances()
         f"[{self.manual.name.upper()}] Data collection completed successfully"
         return balances
 
@@ -102,14 +195,28 @@ class Portfolio(Report):
         return self.coin_market_cap.get_coin_info(coin_list=symbols)
 
     @staticmethod
-    def combine_balances(row: pd.DataFrame) -> pd.Series:
-        result = {}
-        result["source"] = "|".join(set(row["source"]))
-        result["balance"] = row["balance"].sum()
-        return pd.Series(
-            result,
-            index=["source", "balance"],
+    def aggregate_balances(balances_pdf: pd.DataFrame) -> pd.DataFrame:
+        """Groups the balances by symbol. The balances are added up and the sources
+        that hold each symbol are joined with "|", in alphabetical order.
+
+        Args:
+            balances_pdf (pd.DataFrame): Dataframe with the columns source, symbol and
+                balance, with one row per source and symbol.
+
+        Returns:
+            pd.DataFrame: Dataframe indexed by symbol with the columns source and
+                balance.
+        """
+        # Deduplicating first means the join only runs once per distinct source
+        sources = (
+            balances_pdf[["symbol", "source"]]
+            .drop_duplicates()
+            .sort_values(by=["symbol", "source"])
+            .groupby(by="symbol", sort=True)["source"]
+            .agg("|".join)
         )
+        balances = balances_pdf.groupby(by="symbol", sort=True)["balance"].sum()
+        return pd.DataFrame({"source": sources, "balance": balances})
 
     @staticmethod
     def get_rename_map() -> Dict[str, str]:
@@ -146,55 +253,43 @@ class Portfolio(Report):
         curr_date = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_file_name = f"crypto_portfolio_report_{curr_date}.xlsx"
 
-        writer = pd.ExcelWriter(path / output_file_name, engine='xlsxwriter')
-        report_pdf.to_excel(writer, sheet_name='Portfolio', index=False, header=True)
-        workbook  = writer.book
-        worksheet = writer.sheets['Portfolio']
-
-        # Set column widths to be equal to longest value
-        for idx, col in enumerate(report_pdf):  # loop through all columns
-            series = report_pdf[col]
-            max_len = max(
-                (
-                    series.astype(str).map(len).max(),  # len of largest item
-                    len(str(series.name))  # len of column name/header
-                )
-            ) + 3  # adding a little extra space
-            worksheet.set_column(idx, idx, max_len)  # set column width
-
-        # Format the headers
-        headers = report_pdf.columns
-        header_format = workbook.add_format(
-            {
-                "bold": True,
-                "text_wrap": True,
-                "valign": "top",
-                # "font_color": "white",
-                # "fg_color": "#30353D",
-                "border": 1,
-            }
-        )
-        worksheet.set_row(0, None, header_format)
+        logger.info(f"Writing report to {path / output_file_name}...")
+        write_excel({"Portfolio": report_pdf}, path / output_file_name)
+        logger.info(f"Report generated successfully: {path / output_file_name}")
+
+    def write_typed_report(self, report_pdf: pd.DataFrame, path: Path) -> None:
+        """Writes the report as Parquet, Arrow or JSON Lines, with the original column
+        names and typed columns (see REPORT_SCHEMA), so it can be loaded without
+        parsing numbers from text."""
+        curr_date = datetime.now().strftime("%Y%m%d_%H%M%S")
+        extension = FILE_EXTENSIONS[self.output_format]
+        output_file_name = f"crypto_portfolio_report_{curr_date}.{extension}"
 
-        # Close the Pandas Excel writer and output the Excel file.
-        writer.close()
+        logger.info(f"Writing report to {path / output_file_name}...")
+        write_typed(report_pdf, path / output_file_name, self.output_format)
         logger.info(f"Report generated successfully: {path / output_file_name}")
 
     def report(self):
-        # Extract all the balances from the exchanges and networks
-        exchange_balances = self.get_balances_from_exchanges()
-        network_balances = self.get_balances_from_networks()
+        # Extract all the balances from the exchanges and networks concurrently
+        source_balances = self.fetch_balances(self.exchanges + self.networks)
         manual_balances = self.get_balances_from_manual_file()
-        balances = exchange_balances + network_balances + manual_balances
+        balances = source_balances + manual_balances
         balances_pdf = pd.DataFrame(
             balances,
             columns=["source", "symbol", "balance"],
         )
 
         # Group by ticker symbol and sum the balances
-        groupped_balances_pdf = balances_pdf.groupby(by=["symbol"]).apply(
-            self.combine_balances
-        )
+        with Timings().measure(AGGREGATION):
+            groupped_balances_pdf = self.aggregate_balances(balances_pdf)
+
+        # Leave out dust and unwanted symbols before they are looked up
+        if self.balance_filter:
+            with Timings().measure(FILTER):
+                groupped_balances_pdf = self.balance_filter.apply(groupped_balances_pdf)
+                balances_pdf = balances_pdf[
+                    balances_pdf["symbol"].isin(groupped_balances_pdf.index)
+                ]
 
         # Extract additional information, including latest price, from each coin
         symbols = set(groupped_balances_pdf.index.tolist())
@@ -203,20 +298,41 @@ class Portfolio(Report):
         coin_info_pdf.index.name = "symbol"
 
         # Join the balances with the additional info and calculate total value and percentage
-        report_pdf = groupped_balances_pdf.join(coin_info_pdf)
-        report_pdf["total_value_usd"] = report_pdf["balance"] * report_pdf["price_usd"]
-        report_pdf["portfolio_percentage"] = report_pdf[["total_value_usd"]].apply(
-            lambda x: x / x.sum()
-        )
+        with Timings().measure(AGGREGATION):
+            report_pdf = groupped_balances_pdf.join(coin_info_pdf)
+            if "price_usd" not in report_pdf:
+                # None of the coins has a price, e.g. offline without cached prices
+                report_pdf["price_usd"] = float("nan")
+            report_pdf["total_value_usd"] = (
+                report_pdf["balance"] * report_pdf["price_usd"]
+            )
+            report_pdf["portfolio_percentage"] = (
+                report_pdf["total_value_usd"] / report_pdf["total_value_usd"].sum()
+            )
 
-        # Rename columns to a more readable format
-        report_pdf.reset_index(inplace=True)
-        report_pdf = report_pdf.rename(columns=self.get_rename_map())
+        # Append the balances and prices of this run to the history
+        if self.history:
+            try:
+                with Timings().measure(HISTORY):
+                    self.history.append(balances_pdf, coin_info_pdf)
+            except Exception as e:
+                logger.error(f"[HISTORY] Unable to save the snapshot of this run")
+                logger.debug(f"[HISTORY] Full exception: {e}")
 
-        # Write out Excel file (formatted) or CSV file (raw)
+        report_pdf.reset_index(inplace=True)
         output_dir = Path("reports/portfolio")
         output_dir.mkdir(parents=True, exist_ok=True)
-        if self.raw_format:
-            self.write_csv_report(report_pdf=report_pdf, path=output_dir)
-        else:
-            self.write_excel_report(report_pdf=report_pdf, path=output_dir)
+        with Timings().measure(WRITE, self.output_format):
+            if self.output_format in TYPED_FORMATS:
+                # Parquet, Arrow or JSON Lines keep the original column names
+                self.write_typed_report(report_pdf=report_pdf, path=output_dir)
+            else:
+                # Rename columns to a more readable format
+                report_pdf = report_pdf.rename(columns=self.get_rename_map())
+
+                # Write out Excel file (formatted) or CSV file (raw)
+                if self.output_format == CSV_FORMAT:
+                    self.write_csv_report(report_pdf=report_pdf, path=output_dir)
+                else:
+                    self.write_excel_report(report_pdf=report_pdf, path=output_dir)
+        self.coin_market_cap.wait_for_refresh()
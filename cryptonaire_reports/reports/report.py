@@ -5,8 +5,13 @@ import structlog
 from cryptonaire_reports.other.manual_balances import ManualBalances
 from cryptonaire_reports.exchanges.exchange import Exchange
 from cryptonaire_reports.networks.network import Network
-from cryptonaire_reports.utils.mappings import EXCHANGE_MAP
-from cryptonaire_reports.utils.mappings import NETWORKS_MAP
+from cryptonaire_reports.utils.fetcher import THREADS_ENGINE
+from cryptonaire_reports.utils.registry import EXCHANGES_GROUP
+from cryptonaire_reports.utils.registry import NETWORKS_GROUP
+from cryptonaire_reports.utils.registry import get_source_aliases
+from cryptonaire_reports.utils.registry import load_source
+from cryptonaire_reports.utils.timings import CLIENT_INIT
+from cryptonaire_reports.utils.timings import Timings
 
 
 logger = structlog.get_logger()
@@ -19,7 +24,9 @@ class Report:
         exchanges: List[str] = ["all"],
         networks: List[str] = ["all"],
         include_manual: bool = False,
+        engine: str = THREADS_ENGINE,
     ) -> None:
+        self.engine = engine
         self.exchanges: List[Exchange] = []
         self.networks: List[Network] = []
         self.manual: ManualBalances = None
@@ -34,19 +41,30 @@ class Report:
         logger.info(
             f"Looking for API keys of the following exchanges: {','.join(exchanges)}"
         )
+        exchange_map = get_source_aliases(EXCHANGES_GROUP)
         if "all" in exchanges:
-            for exchange_class in EXCHANGE_MAP:
-                exchange_instance = exchange_class()
-                if exchange_instance.active:
-                    self.exchanges.append(exchange_instance)
+            for exchange_name in exchange_map:
+                with Timings().measure(CLIENT_INIT, exchange_name):
+                    exchange_class = load_source(
+                        EXCHANGES_GROUP, exchange_name, self.engine
+                    )
+                    exchange_instances = exchange_class.from_config()
+                for exchange_instance in exchange_instances:
+                    if exchange_instance.active:
+                        self.exchanges.append(exchange_instance)
         else:
             for exchange in exchanges:
-                for exchange_class, exchange_keys in EXCHANGE_MAP.items():
+                for exchange_name, exchange_keys in exchange_map.items():
                     if exchange in exchange_keys:
-                        exchange_instance = exchange_class()
-                        if exchange_instance.active:
-                            self.exchanges.append(exchange_instance)
+                        with Timings().measure(CLIENT_INIT, exchange_name):
+                            exchange_class = load_source(
+                                EXCHANGES_GROUP, exchange_name, self.engine
+                            )
+                            exchange_instances = exchange_class.from_config()
+                        if exchange_instances[0].active:
+                            self.exchanges.extend(exchange_instances)
                         else:
+                            exchange_instance = exchange_instances[0]
                             logger.warning(
                                 f"Exchange {exchange} API keys were not found in "
                                 "cryptonaire_reports.config file. Add the following line "
@@ -63,18 +81,33 @@ class Report:
         logger.info(
             f"Looking for addresses of the following networks: {','.join(networks)}"
         )
+        networks_map = get_source_aliases(NETWORKS_GROUP)
         if "all" in networks:
-            for network_class in NETWORKS_MAP:
-                network_instance = network_class()
-                if network_instance.active:
-                    self.networks.append(network_instance)
+            for network_name in networks_map:
+                with Timings().measure(CLIENT_INIT, network_name):
+                    network_class = load_source(
+                        NETWORKS_GROUP, network_name, self.engine
+                    )
+                    network_instances = network_class.from_config()
+                for network_instance in network_instances:
+                    if network_instance.active:
+                        self.networks.append(network_instance)
         else:
             for network in networks:
-                for network_class, network_keys in NETWORKS_MAP.items():
+                for network_name, network_keys in networks_map.items():
                     if network in network_keys:
-                        network_instance = network_class()
-                        if network_instance.active:
-                            self.exchanges.append(network_instance)
+                        with Timings().measure(CLIENT_INIT, network_name):
+                            network_class = load_source(
+                                NETWORKS_GROUP, network_name, self.engine
+                            )
+                            network_instances = network_class.from_config()
+                        active_instances = [
+                            instance
+                            for instance in network_instances
+                            if instance.active
+                        ]
+                        if active_instances:
+                            self.networks.extend(active_instances)
                         else:
                             logger.warning(
                                 f"Network {network} was not found in "
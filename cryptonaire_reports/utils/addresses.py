@@ -0,0 +1,160 @@
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Union
+
+import structlog
+from Crypto.Hash import keccak
+
+logger = structlog.get_logger()
+
+ADDRESS_SIZE = 20
+ADDRESS_PATTERN = re.compile(r"^0x[0-9a-fA-F]{40}$")
+# Addresses can be separated by new lines, spaces or commas
+SEPARATORS = re.compile(r"[\s,]+")
+COMMENT = "#"
+
+
+def to_checksum_address(address: str) -> str:
+    """Returns the EIP-55 checksum version of an address (mixed case, where the case
+    of each letter comes from the keccak hash of the lowercase address)."""
+    hex_address = address[2:].lower()
+    digest = keccak.new(digest_bits=256, data=hex_address.encode()).hexdigest()
+    return "0x" + "".join(
+        char.upper() if int(nibble, 16) >= 8 else char
+        for char, nibble in zip(hex_address, digest)
+    )
+
+
+def is_valid_address(address: str) -> bool:
+    """Checks the format of an address and, if it's mixed case, its checksum. All
+    lowercase or all uppercase addresses have no checksum."""
+    if not ADDRESS_PATTERN.match(address):
+        return False
+    hex_address = address[2:]
+    if hex_address.islower() or hex_address.isupper() or hex_address.isdigit():
+        return True
+    return to_checksum_address(address) == address
+
+
+class AddressList:
+    """Deduplicated list of EVM addresses.
+
+    Addresses are kept packed, 20 bytes each, so tens of thousands of them take a
+    few hundred KB and splitting them into shards for the workers is a slice of
+    bytes. They are returned with their EIP-55 checksum.
+
+    Args:
+        packed (bytes): Concatenated 20 byte addresses, without duplicates.
+    """
+
+    def __init__(self, packed: bytes = b"") -> None:
+        self._packed = packed
+
+    @classmethod
+    def parse(cls, value: Union[str, Iterable[str]]) -> "AddressList":
+        """Parses addresses separated by new lines, spaces or commas. Any entry that
+        doesn't start with 0x is read as the path of a text file with more
+        addresses, in the same format. Lines starting with # are ignored.
+
+        Invalid addresses and missing files are logged and skipped, and repeated
+        addresses are only kept once, in the order they first appeared.
+
+        Args:
+            value (Union[str, Iterable[str]]): Addresses as written in the config
+                file, or a list of them.
+
+        Returns:
+            AddressList: Valid addresses.
+        """
+        entries = [value] if isinstance(value, str) else list(value)
+        addresses: Dict[bytes, None] = {}
+        for entry in _split(entries):
+            if entry.lower().startswith("0x"):
+                _add(addresses, entry)
+                continue
+            path = Path(entry).expanduser()
+            try:
+                file_entries = _split(path.read_text().splitlines())
+            except OSError as e:
+                logger.error(f"[ADDRESSES] Unable to read addresses from {path}")
+                logger.debug(f"[ADDRESSES] Full exception: {e}")
+                continue
+            count = len(addresses)
+            for file_entry in file_entries:
+                _add(addresses, file_entry)
+            logger.debug(
+                f"[ADDRESSES] {len(addresses) - count} new addresses read from {path}"
+            )
+        return cls(b"".join(addresses))
+
+    def __len__(self) -> int:
+        return len(self._packed) // ADDRESS_SIZE
+
+    def __iter__(self) -> Iterator[str]:
+        for start in range(0, len(self._packed), ADDRESS_SIZE):
+            yield self._address(start)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, "AddressList"]:
+        if isinstance(index, slice):
+            return AddressList(b"".join(self._raw()[index]))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Address index out of range")
+        return self._address(index * ADDRESS_SIZE)
+
+    def __contains__(self, address: object) -> bool:
+        if not isinstance(address, str) or not ADDRESS_PATTERN.match(address):
+            return False
+        return bytes.fromhex(address[2:]) in self._raw()
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, AddressList) and self._packed == other._packed
+
+    def __hash__(self) -> int:
+        return hash(self._packed)
+
+    def __repr__(self) -> str:
+        return f"AddressList({len(self)} addresses)"
+
+    def shards(self, size: int) -> List["AddressList"]:
+        """Splits the addresses into consecutive shards of at most size addresses."""
+        step = max(1, size) * ADDRESS_SIZE
+        return [
+            AddressList(self._packed[start : start + step])
+            for start in range(0, len(self._packed), step)
+        ]
+
+    def _raw(self) -> List[bytes]:
+        return [
+            self._packed[start : start + ADDRESS_SIZE]
+            for start in range(0, len(self._packed), ADDRESS_SIZE)
+        ]
+
+    def _address(self, start: int) -> str:
+        return to_checksum_address(
+            "0x" + self._packed[start : start + ADDRESS_SIZE].hex()
+        )
+
+
+def _split(entries: Iterable[str]) -> List[str]:
+    """Splits every line into its entries, leaving out comments."""
+    return [
+        entry
+        for line in entries
+        for raw_line in line.splitlines()
+        if not raw_line.strip().startswith(COMMENT)
+        for entry in SEPARATORS.split(raw_line.strip())
+        if entry
+    ]
+
+
+def _add(addresses: Dict[bytes, None], address: str) -> None:
+    if not ADDRESS_PATTERN.match(address):
+        logger.warning(f"[ADDRESSES] {address} is not a valid address, skipping it")
+        return
+    if not is_valid_address(address):
+        # Mixed case addresses carry a checksum, which catches typos
+        logger.warning(f"[ADDRESSES] {address} has a wrong checksum, skipping it")
+        return
+    addresses.setdefault(bytes.fromhex(address[2:]), None)
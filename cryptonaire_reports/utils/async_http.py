@@ -0,0 +1,74 @@
+import asyncio
+import weakref
+from typing import Optional
+
+import structlog
+from cryptonaire_reports.utils.config import HttpConfig
+from cryptonaire_reports.utils.config import load_config
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = structlog.get_logger()
+
+
+def require_httpx() -> None:
+    """Raises ImportError if httpx, needed by the asyncio engine, isn't installed."""
+    if httpx is None:
+        raise ImportError(
+            "httpx is required by the asyncio engine. Install it with: "
+            "pip install cryptonaire-reports[async]"
+        )
+
+
+class AsyncHttpClient:
+    """Shared asynchronous HTTP client for the exchanges that implement AsyncExchange.
+
+    httpx clients can only be used from the event loop they were created in, so there
+    is one client per loop, shared by every exchange and account running in it. Like
+    HttpClient, connections are kept alive and failed connections are retried.
+
+    httpx is an optional dependency: pip install cryptonaire-reports[async]
+    """
+
+    # Event loop -> httpx.AsyncClient
+    _clients = weakref.WeakKeyDictionary()
+
+    def __init__(self, config: Optional[HttpConfig] = None) -> None:
+        require_httpx()
+        self.config = config or load_config().http
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        loop = asyncio.get_running_loop()
+        if loop not in self._clients:
+            pool_size = self.config.pool_size
+            limits = httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            )
+            self._clients[loop] = httpx.AsyncClient(
+                limits=limits,
+                timeout=self.config.timeout,
+                transport=httpx.AsyncHTTPTransport(
+                    limits=limits, retries=self.config.retries
+                ),
+            )
+            logger.debug(
+                f"[HTTP] Async client created with a pool of {pool_size} connections"
+            )
+        return self._clients[loop]
+
+    async def request(self, method: str, url: str, **kwargs) -> "httpx.Response":
+        return await self.client.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> "httpx.Response":
+        return await self.request("GET", url, **kwargs)
+
+    @classmethod
+    async def close_all(cls) -> None:
+        """Closes the client of the running event loop, if one was created."""
+        client = cls._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+CACHE_DIR = Path(".cryptonaire_cache")
+
+
+class JsonCache:
+    """Small persistent key-value store backed by a JSON file in CACHE_DIR.
+
+    Every entry keeps the time it was stored, so entries older than the TTL are
+    treated as missing. Changes are kept in memory until save() is called, which
+    rewrites the whole file atomically.
+    """
+
+    def __init__(
+        self, name: str, ttl: Optional[float] = None, directory: Path = CACHE_DIR
+    ) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.path = Path(directory) / f"{name}.json"
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as cache_file:
+                return json.load(cache_file)
+        except Exception as e:
+            logger.warning(f"[CACHE] Unable to read {self.path}, starting empty")
+            logger.debug(f"[CACHE] Full exception: {e}")
+            return {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the value stored for key, or None if it's missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl is not None and time.time() - entry["timestamp"] > self.ttl:
+            return None
+        return entry["value"]
+
+    def keys(self) -> List[str]:
+        """Returns every stored key, including the expired ones."""
+        with self._lock:
+            return list(self._entries)
+
+    def age(self, key: str) -> Optional[float]:
+        """Returns the seconds since key was stored, or None if it's missing."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return time.time() - entry["timestamp"]
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = {"timestamp": time.time(), "value": value}
+            self._dirty = True
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Removes key from the cache. If no key is given, removes every entry."""
+        with self._lock:
+            if key is None:
+                self._entries = {}
+            else:
+                self._entries.pop(key, None)
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(".json.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as cache_file:
+                    json.dump(self._entries, cache_file, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+                logger.debug(
+                    f"[CACHE] {len(self._entries)} entries saved to {self.path}"
+                )
+            except Exception as e:
+                logger.warning(f"[CACHE] Unable to write {self.path}")
+                logger.debug(f"[CACHE] Full exception: {e}")
@@ -0,0 +1,30 @@
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass(frozen=True)
+class EvmChain:
+    name: str
+    chain_id: int
+    native_symbol: str
+    # Public endpoint used when the chain section has no RPC_URL. Ethereum has none
+    # because it's read from Ethplorer by default
+    rpc_url: Optional[str] = None
+
+
+# Built-in EVM chains, keyed by the name used in [Networks]. Any other chain can be
+# added with CHAIN_ID, NATIVE_SYMBOL and RPC_URL in its own section
+EVM_CHAINS: Dict[str, EvmChain] = {
+    chain.name.upper(): chain
+    for chain in [
+        EvmChain("Ethereum", 1, "ETH"),
+        EvmChain("Arbitrum", 42161, "ETH", "https://arb1.arbitrum.io/rpc"),
+        EvmChain("Avalanche", 43114, "AVAX", "https://api.avax.network/ext/bc/C/rpc"),
+        EvmChain("Base", 8453, "ETH", "https://mainnet.base.org"),
+        EvmChain("BSC", 56, "BNB", "https://bsc-dataseed.bnbchain.org"),
+        EvmChain("Gnosis", 100, "XDAI", "https://rpc.gnosischain.com"),
+        EvmChain("Linea", 59144, "ETH", "https://rpc.linea.build"),
+        EvmChain("Optimism", 10, "ETH", "https://mainnet.optimism.io"),
+        EvmChain("Polygon", 137, "POL", "https://polygon-rpc.com"),
+    ]
+}
@@ -1,34 +1,133 @@
+import math
+import re
+import threading
 import time
-from configparser import ConfigParser
-from typing import List, Dict, Set
+from datetime import datetime, timezone
+from typing import Callable, List, Dict, Optional, Set
 
 import structlog
 from coinmarketcapapi import CoinMarketCapAPI
 from coinmarketcapapi import CoinMarketCapAPIError
 from coinmarketcapapi import Response
+from cryptonaire_reports.utils.cache import JsonCache
+from cryptonaire_reports.utils.config import CoinMarketCapConfig
+from cryptonaire_reports.utils.config import load_config
+from cryptonaire_reports.utils.rate_limiter import RateLimiter
+from cryptonaire_reports.utils.rate_limiter import RateLimitExceeded
+from cryptonaire_reports.utils.rate_limiter import backoff_delay
 from cryptonaire_reports.utils.singleton import Singleton
+from cryptonaire_reports.utils.timings import CMC_MAP
+from cryptonaire_reports.utils.timings import CMC_QUOTES
+from cryptonaire_reports.utils.timings import THROTTLE
+from cryptonaire_reports.utils.timings import Timings
+from requests.exceptions import ConnectionError, Timeout
 
 logger = structlog.get_logger()
 
+# CoinMarketCap charges one credit for every 100 coins returned by the quotes endpoint
+QUOTES_CHUNK_SIZE = 100
+# Symbols sent in each call to the map endpoint, so the URL stays within the length
+# accepted by the API when thousands of symbols are unknown
+MAP_CHUNK_SIZE = 500
+# "Too many requests", per-minute API key limit and per-minute IP limit
+RATE_LIMIT_ERROR_CODES = [429, 1008, 1011]
+
 
 class CoinMarketCap(metaclass=Singleton):
 
-    def __init__(self) -> None:
-        config = ConfigParser()
-        config.read("cryptonaire_reports.config")
-        if "CoinMarketCap" not in config:
+    def __init__(
+        self,
+        refresh_cache: bool = False,
+        config: Optional[CoinMarketCapConfig] = None,
+        offline: bool = False,
+        max_price_age: Optional[float] = None,
+        stale_while_revalidate: bool = False,
+    ) -> None:
+        config = config or load_config().coin_market_cap
+        if config is None:
             logger.error(
                 f"CoinMarketCap configuration missing in cryptonaire_reports.config"
             )
             exit(1)
         try:
-            self.api = CoinMarketCapAPI(api_key=config.get("CoinMarketCap", "API_KEY"))
+            self.api = CoinMarketCapAPI(api_key=config.api_key)
         except:
             logger.error(
                 f"[CoinMarketCap] Error while configuring the CoinMarketCap API. Double"
                 f"check that the API key is valid."
             )
             exit(1)
+        self.refresh_cache = refresh_cache
+        self.offline = offline
+        self.max_price_age = max_price_age
+        self.stale_while_revalidate = stale_while_revalidate
+        # Offline, an expired map is still better than no map at all
+        self.map_cache = JsonCache(
+            "coin_market_cap_map", ttl=None if offline else config.map_cache_ttl
+        )
+        self.unknown_symbols_cache = JsonCache(
+            "coin_market_cap_unknown_symbols", ttl=config.unknown_symbol_cache_ttl
+        )
+        # Credits consumed today are kept on disk so the daily budget is shared by all
+        # the runs of the day
+        self.credits_cache = JsonCache("coin_market_cap_credits", ttl=24 * 60 * 60)
+        # Latest quote of every coin, keyed by CoinMarketCap id. Each entry keeps the
+        # time it was fetched, so it's reused or refreshed depending on its age
+        self.quotes_cache = JsonCache("coin_market_cap_quotes")
+        self._refresh_thread: Optional[threading.Thread] = None
+        self.rate_limiter = RateLimiter(
+            requests_per_minute=config.requests_per_minute,
+            credits_per_day=config.credits_per_day,
+            credits_used=self.credits_cache.get(self._today()) or 0,
+            name="CoinMarketCap",
+        )
+        self.max_retries = config.max_retries
+
+    def _request(self, endpoint: Callable, credits: int, **params) -> Response:
+        """Calls a CoinMarketCap endpoint through the shared rate limiter. If the
+        request is rejected because of the rate limit or a network error, it's retried
+        with a jittered exponential backoff up to max_retries times.
+
+        Args:
+            endpoint (Callable): Method of the CoinMarketCap API client to call.
+            credits (int): Credits that the call is expected to consume.
+
+        Raises:
+            CoinMarketCapAPIError: If the API returns an error that can't be retried,
+                or it keeps returning a rate limit error after all the retries.
+            RateLimitExceeded: If the call would go over the daily credit budget.
+
+        Returns:
+            Response: API response
+        """
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire(credits)
+            try:
+                response: Response = endpoint(**params)
+                self.rate_limiter.record(response.credit_count or credits)
+                self.credits_cache.set(self._today(), self.rate_limiter.credits_used)
+                return response
+            except (CoinMarketCapAPIError, ConnectionError, Timeout) as e:
+                retryable = (
+                    not isinstance(e, CoinMarketCapAPIError)
+                    or e.rep.error_code in RATE_LIMIT_ERROR_CODES
+                )
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                self.rate_limiter.drain()
+                delay = backoff_delay(attempt)
+                attempt += 1
+                logger.warning(
+                    f"[CoinMarketCap] Request failed ({e}). Retrying in {delay:.1f} "
+                    f"seconds ({attempt}/{self.max_retries})..."
+                )
+                Timings().record(THROTTLE, "CoinMarketCap (retries)", delay)
+                time.sleep(delay)
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
     def extract_cryptocurrency_map_from_api(self, coin_list: Set[str]) -> List[Dict]:
         """Calls the cryptocurrency_map endpoint from CoinMarketCap API and retrieves
@@ -42,8 +141,8 @@ class CoinMarketCap(metaclass=Singleton):
             List[Dict]: List that contains the cryptocurrency map for all coins
         """
         try:
-            coin_market_cap_map_response: Response = self.api.cryptocurrency_map(
-                symbol=",".join(coin_list)
+            coin_market_cap_map_response: Response = self._request(
+                self.api.cryptocurrency_map, credits=1, symbol=",".join(coin_list)
             )
             logger.info(
                 f"[CoinMarketCap] Cryptocurrency map information for "
@@ -53,32 +152,54 @@ class CoinMarketCap(metaclass=Singleton):
                 f"[CoinMarketCap] Full response: {coin_market_cap_map_response}"
             )
             return coin_market_cap_map_response.data
+        except RateLimitExceeded as e:
+            logger.error(
+                f"[CoinMarketCap] {e}. Cryptocurrency map info will be missing for "
+                f"{','.join(coin_list)}"
+            )
+            return []
         except CoinMarketCapAPIError as e:
             error_response: Response = e.rep
             logger.debug(f"[CoinMarketCap] Full error: {error_response}")
             if error_response.error_code == 400:
-                # Bad request, one or more coins were not found. Try one by one
+                # Bad request, one or more coins were not found
                 if len(coin_list) == 1:
                     # This particular coin was not found, return []
+                    symbol = next(iter(coin_list))
                     logger.error(
-                        f"[CoinMarketCap] The coin {next(iter(coin_list))} was not "
-                        f"found in CoinMarketCap. All the information will be missing."
+                        f"[CoinMarketCap] The coin {symbol} was not found in "
+                        f"CoinMarketCap. All the information will be missing."
                     )
+                    self.unknown_symbols_cache.set(symbol.upper(), True)
                     return []
-                else:
+                invalid_symbols = self._parse_invalid_symbols(error_response, coin_list)
+                if invalid_symbols:
+                    # CoinMarketCap told us which ones are wrong, skip them
                     logger.warning(
-                        f"[CoinMarketCap] Failed to fetch cryptocurrency map info for "
-                        "all the coins in one API call. Trying making one call per coin"
+                        f"[CoinMarketCap] The following coins were not found in "
+                        f"CoinMarketCap: {','.join(invalid_symbols)}. All the "
+                        f"information will be missing."
                     )
-                    batch_responses = []
-                    for symbol in coin_list:
-                        res = self.extract_cryptocurrency_map_from_api(
-                            coin_list={symbol}
-                        )
-                        print(res)
-                        batch_responses.extend(res)
-                    return batch_responses
-
+                    for symbol in invalid_symbols:
+                        self.unknown_symbols_cache.set(symbol.upper(), True)
+                    valid_symbols = coin_list - invalid_symbols
+                    if not valid_symbols:
+                        return []
+                    return self.extract_cryptocurrency_map_from_api(valid_symbols)
+                # Split the coins in two halves and try again with each of them, so a
+                # few bad symbols are isolated in O(k log n) calls
+                logger.warning(
+                    f"[CoinMarketCap] Failed to fetch cryptocurrency map info for "
+                    f"{len(coin_list)} coins in one API call. Splitting them in halves"
+                )
+                sorted_coins = sorted(coin_list)
+                middle = len(sorted_coins) // 2
+                batch_responses = []
+                for half in (sorted_coins[:middle], sorted_coins[middle:]):
+                    batch_responses.extend(
+                        self.extract_cryptocurrency_map_from_api(coin_list=set(half))
+                    )
+                return batch_responses
             elif error_response.error_code in [401, 403]:
                 # Forbidden or unauthorized access
                 logger.error(
@@ -86,13 +207,14 @@ class CoinMarketCap(metaclass=Singleton):
                     f"cryptocurrency map is forbidden or unauthorized"
                 )
                 exit(1)
-            elif error_response.error_code in [429, 1008]:
-                # Request limit reached
-                logger.warning(
-                    f"[CoinMarketCap] API limit reached. Waiting 60 seconds to resume..."
+            elif error_response.error_code in RATE_LIMIT_ERROR_CODES:
+                # Request limit reached, even after retrying
+                logger.error(
+                    f"[CoinMarketCap] API limit reached after {self.max_retries} "
+                    f"retries. Cryptocurrency map info will be missing for "
+                    f"{','.join(coin_list)}"
                 )
-                time.sleep(61)
-                return self.extract_cryptocurrency_map_from_api(coin_list=coin_list)
+                return []
             elif error_response.error_code == 500:
                 # Internal server error
                 logger.error(
@@ -109,26 +231,65 @@ class CoinMarketCap(metaclass=Singleton):
                 )
                 exit(1)
 
-    def extract_quotes_latest_from_api(self, id: str) -> List[Dict]:
+    @staticmethod
+    def _parse_invalid_symbols(
+        error_response: Response, coin_list: Set[str]
+    ) -> Set[str]:
+        """CoinMarketCap usually lists the rejected symbols in the error message, e.g.
+        'Invalid values for "symbol": "FOO,BAR"'. Returns the ones that were part of
+        the request, or an empty set if the message doesn't mention any."""
+        match = re.search(r'"symbol":\s*"([^"]+)"', error_response.error_message or "")
+        if not match:
+            return set()
+        invalid = {symbol.strip().upper() for symbol in match.group(1).split(",")}
+        return {coin for coin in coin_list if coin.upper() in invalid}
+
+    def extract_quotes_latest_from_api(self, ids: List[str]) -> Dict[str, Dict]:
         """Calls the cryptocurrency_quotes_latest endpoint from CoinMarketCap API and
-        retrieves the latest price data from a given coin.
+        retrieves the latest price data from a list of coins. The ids are requested
+        in chunks of QUOTES_CHUNK_SIZE, which is the number of coins CoinMarketCap
+        bills as a single credit, so we make one API call per chunk instead of one per
+        coin.
 
         Args:
-            coin_list (Set[str]): CoinMarketCap coin id
+            ids (List[str]): CoinMarketCap coin ids
 
         Returns:
-            List[Dict]: Price info for the requested id
+            Dict[str, Dict]: Price info for the requested ids, keyed by id
         """
+        latest_quotes = {}
+        for start in range(0, len(ids), QUOTES_CHUNK_SIZE):
+            chunk = ids[start : start + QUOTES_CHUNK_SIZE]
+            latest_quotes.update(self._extract_quotes_chunk_from_api(ids=chunk))
+        return latest_quotes
+
+    def _extract_quotes_chunk_from_api(self, ids: List[str]) -> Dict[str, Dict]:
         try:
-            latest_quote = self.api.cryptocurrency_quotes_latest(id=id).data.get(id)
-            return latest_quote
+            latest_quotes = self._request(
+                self.api.cryptocurrency_quotes_latest,
+                credits=math.ceil(len(ids) / QUOTES_CHUNK_SIZE),
+                id=",".join(ids),
+                skip_invalid="true",
+            ).data
+            logger.info(
+                f"[CoinMarketCap] Latest quotes for {len(ids)} coins successfully "
+                f"extracted from API"
+            )
+            return latest_quotes
+        except RateLimitExceeded as e:
+            logger.error(
+                f"[CoinMarketCap] {e}. Latest quotes will be missing for {','.join(ids)}"
+            )
+            return {}
         except CoinMarketCapAPIError as e:
             error_response: Response = e.rep
             logger.debug(f"[CoinMarketCap] Full error: {error_response}")
             if error_response.error_code == 400:
-                # Bad request, coin not found.
-                logger.error(f"[CoinMarketCap] Latest quote not found for {id}")
-                return []
+                # Bad request, coins not found.
+                logger.error(
+                    f"[CoinMarketCap] Latest quotes not found for {','.join(ids)}"
+                )
+                return {}
             elif error_response.error_code in [401, 403]:
                 # Forbidden or unauthorized access
                 logger.error(
@@ -136,13 +297,13 @@ class CoinMarketCap(metaclass=Singleton):
                     f"cryptocurrency map is forbidden or unauthorized"
                 )
                 exit(1)
-            elif error_response.error_code in [429, 1008]:
-                # Request limit reached
-                logger.warning(
-                    f"[CoinMarketCap] API limit reached. Waiting 60 seconds to resume..."
+            elif error_response.error_code in RATE_LIMIT_ERROR_CODES:
+                # Request limit reached, even after retrying
+                logger.error(
+                    f"[CoinMarketCap] API limit reached after {self.max_retries} "
+                    f"retries. Latest quotes will be missing for {','.join(ids)}"
                 )
-                time.sleep(61)
-                return self.extract_quotes_latest_from_api(id=id)
+                return {}
             elif error_response.error_code == 500:
                 # Internal server error
                 logger.error(
@@ -159,30 +320,164 @@ class CoinMarketCap(metaclass=Singleton):
                 )
                 exit(1)
 
-    def get_coin_info(self, coin_list: Set[str]) -> List[Dict]:
-        """Given a list of coins / ticker symbols, extracts additional information
-        using the CoinMarketCap API.
+    def get_latest_quotes(self, ids: List[str]) -> Dict[str, Dict]:
+        """Returns the latest quote of every id, reusing the quotes stored by previous
+        runs when possible:
+        - offline: only stored quotes are used, no matter how old they are.
+        - max_price_age: stored quotes newer than max_price_age seconds are reused,
+          the rest are requested to the API.
+        - stale_while_revalidate: stored quotes are returned straight away, and the
+          ones older than max_price_age (or all of them, if it isn't set) are
+          refreshed in the background for the next run. Only the ids that were never
+          stored are requested before returning.
 
         Args:
-            coin_list (Set[str]): List of all the coins we want to extract info from.
+            ids (List[str]): CoinMarketCap coin ids
 
         Returns:
-            List[Dict]: Dictionary where the keys are the ticker symbols and the value
-                is a dictionary with all the requested information
+            Dict[str, Dict]: Price info for the requested ids, keyed by id
         """
-        cryptocurrency_map = self.extract_cryptocurrency_map_from_api(coin_list)
+        latest_quotes = {}
+        stale_ids = []
+        missing_ids = []
+        for coin_id in ids:
+            cached_quote = self.quotes_cache.get(coin_id)
+            if cached_quote is None:
+                missing_ids.append(coin_id)
+                continue
+            age = self.quotes_cache.age(coin_id)
+            if self.max_price_age is not None and age <= self.max_price_age:
+                latest_quotes[coin_id] = cached_quote
+            elif self.offline or self.stale_while_revalidate:
+                latest_quotes[coin_id] = cached_quote
+                stale_ids.append(coin_id)
+            else:
+                missing_ids.append(coin_id)
+        logger.info(
+            f"[CoinMarketCap] {len(latest_quotes)} quotes found in the price cache, "
+            f"{len(missing_ids)} will be requested to the API"
+        )
+        if self.offline:
+            if missing_ids:
+                logger.warning(
+                    f"[CoinMarketCap] Offline mode, there are no cached prices for "
+                    f"{len(missing_ids)} coins. Their value will be missing."
+                )
+            if stale_ids:
+                logger.warning(
+                    f"[CoinMarketCap] Offline mode, using the last known price of "
+                    f"{len(stale_ids)} coins"
+                )
+            return latest_quotes
+
+        latest_quotes.update(self._fetch_and_store_quotes(missing_ids))
+        if self.stale_while_revalidate and stale_ids:
+            logger.info(
+                f"[CoinMarketCap] Refreshing {len(stale_ids)} stale quotes in the "
+                f"background"
+            )
+            self._refresh_thread = threading.Thread(
+                target=self._fetch_and_store_quotes,
+                args=(stale_ids,),
+                name="quotes-refresh",
+            )
+            self._refresh_thread.start()
+        return latest_quotes
 
+    def _fetch_and_store_quotes(self, ids: List[str]) -> Dict[str, Dict]:
+        if not ids:
+            return {}
+        latest_quotes = self.extract_quotes_latest_from_api(ids=ids)
+        for coin_id, latest_quote in latest_quotes.items():
+            self.quotes_cache.set(str(coin_id), latest_quote)
+        self.quotes_cache.save()
+        self.credits_cache.save()
+        return latest_quotes
+
+    def wait_for_refresh(self) -> None:
+        """Waits until the quotes refreshed in the background are stored."""
+        if self._refresh_thread is not None:
+            self._refresh_thread.join()
+            self._refresh_thread = None
+            logger.info(f"[CoinMarketCap] Stale quotes refreshed")
+
+    def get_cryptocurrency_map(self, coin_list: Set[str]) -> Dict[str, Dict]:
+        """Resolves each ticker symbol to its CoinMarketCap id, name and rank. Symbols
+        found in the local map cache are not requested again, so only the unknown or
+        expired ones are sent to the cryptocurrency_map endpoint.
+
+        Args:
+            coin_list (Set[str]): List of all the coins we want to resolve.
+
+        Returns:
+            Dict[str, Dict]: Dictionary where the keys are the ticker symbols and the
+                values contain the id, name and rank of the coin.
+        """
+        coin_map_info = {}
+        unknown_symbols = set()
+        known_unknown_symbols = set()
+        for symbol in {coin.upper() for coin in coin_list}:
+            if not self.refresh_cache and symbol in self.unknown_symbols_cache:
+                known_unknown_symbols.add(symbol)
+                continue
+            cached_map = None if self.refresh_cache else self.map_cache.get(symbol)
+            if cached_map is None:
+                unknown_symbols.add(symbol)
+            else:
+                coin_map_info[symbol] = dict(cached_map)
+        if known_unknown_symbols:
+            logger.info(
+                f"[CoinMarketCap] Skipping symbols that weren't found in previous "
+                f"runs: {','.join(sorted(known_unknown_symbols))}"
+            )
+        logger.info(
+            f"[CoinMarketCap] {len(coin_map_info)} symbols found in the map cache, "
+            f"{len(unknown_symbols)} will be requested to the API"
+        )
+        if not unknown_symbols:
+            return coin_map_info
+        if self.offline:
+            logger.warning(
+                f"[CoinMarketCap] Offline mode, the following symbols are not in the "
+                f"map cache and will be missing: {','.join(sorted(unknown_symbols))}"
+            )
+            return coin_map_info
+
+        coin_maps = []
+        sorted_symbols = sorted(unknown_symbols)
+        for start in range(0, len(sorted_symbols), MAP_CHUNK_SIZE):
+            chunk = set(sorted_symbols[start : start + MAP_CHUNK_SIZE])
+            coin_maps.extend(self.extract_cryptocurrency_map_from_api(chunk))
         # Results can contain duplicates. We only want to keep the first instance of
         # each symbol
-        coin_info = {}
-        for coin_map in cryptocurrency_map:
-            if coin_map["symbol"].upper() in coin_info:
+        for coin_map in coin_maps:
+            symbol = coin_map["symbol"].upper()
+            if symbol in coin_map_info:
                 continue
-            coin_info[coin_map["symbol"].upper()] = {
+            coin_map_info[symbol] = {
                 "id": coin_map.get("id"),
                 "name": coin_map.get("name"),
                 "rank": int(coin_map.get("rank") or -1),
             }
+            self.map_cache.set(symbol, dict(coin_map_info[symbol]))
+            self.unknown_symbols_cache.invalidate(symbol)
+        self.map_cache.save()
+        self.unknown_symbols_cache.save()
+        return coin_map_info
+
+    def get_coin_info(self, coin_list: Set[str]) -> List[Dict]:
+        """Given a list of coins / ticker symbols, extracts additional information
+        using the CoinMarketCap API.
+
+        Args:
+            coin_list (Set[str]): List of all the coins we want to extract info from.
+
+        Returns:
+            List[Dict]: Dictionary where the keys are the ticker symbols and the value
+                is a dictionary with all the requested information
+        """
+        with Timings().measure(CMC_MAP):
+            coin_info = self.get_cryptocurrency_map(coin_list)
         not_found = set([coin.upper() for coin in coin_list]) - set(coin_info.keys())
         if not_found:
             logger.warning(
@@ -192,12 +487,19 @@ class CoinMarketCap(metaclass=Singleton):
             logger.info(
                 f"[CoinMarketCap] Basic information found for: {', '.join(coin_list)}"
             )
+        with Timings().measure(CMC_QUOTES):
+            latest_quotes = self.get_latest_quotes(
+                ids=[str(crypto_map["id"]) for crypto_map in coin_info.values()]
+            )
         for symbol, crypto_map in coin_info.items():
-            latest_quote = self.extract_quotes_latest_from_api(id=str(crypto_map["id"]))
+            latest_quote = latest_quotes.get(str(crypto_map["id"]))
             if not latest_quote:
                 logger.warning(f"[CoinMarketCap] Price data not found for {symbol}")
             else:
                 logger.info(f"[CoinMarketCap] Price data found for {symbol}")
+                if latest_quote.get("cmc_rank"):
+                    # The rank in the map cache can be outdated
+                    coin_info[symbol]["rank"] = int(latest_quote.get("cmc_rank"))
                 coin_info[symbol]["price_usd"] = float(
                     latest_quote.get("quote").get("USD").get("price")
                 )
@@ -214,4 +516,8 @@ class CoinMarketCap(metaclass=Singleton):
                     latest_quote.get("quote").get("USD").get("market_cap") or -1
                 )
         logger.debug(f"[CoinMarketCap] Additional Info Extracted: {coin_info}")
+        logger.info(
+            f"[CoinMarketCap] {self.rate_limiter.credits_used:g} credits used today"
+        )
+        self.credits_cache.save()
         return coin_info
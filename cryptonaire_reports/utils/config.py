@@ -0,0 +1,402 @@
+import math
+import os
+from configparser import ConfigParser
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import structlog
+from cryptonaire_reports.utils.addresses import AddressList
+from cryptonaire_reports.utils.chains import EVM_CHAINS
+
+logger = structlog.get_logger()
+
+CONFIG_FILE = "cryptonaire_reports.config"
+# Environment variable with the path of the config file
+CONFIG_PATH_ENV = "CRYPTONAIRE_CONFIG"
+# Any option can be overridden with CRYPTONAIRE_<SECTION>_<OPTION>, for example
+# CRYPTONAIRE_BINANCE_API_KEY or CRYPTONAIRE_MANUAL_BALANCES_CSV_FILE
+ENV_PREFIX = "CRYPTONAIRE_"
+
+EXCHANGE_SECTIONS = ["Binance", "BingX", "ByBit", "Gate"]
+# Optional settings of each network, besides its addresses in [Networks]
+NETWORK_SECTIONS = [chain.name for chain in EVM_CHAINS.values()]
+# Several accounts of the same exchange can be added as [Binance:<account name>]
+ACCOUNT_SEPARATOR = ":"
+
+KNOWN_SECTIONS = [
+    "CoinMarketCap",
+    *EXCHANGE_SECTIONS,
+    "Networks",
+    *NETWORK_SECTIONS,
+    "Manual Balances",
+    "HTTP",
+    "History",
+    "Filters",
+]
+
+
+@dataclass(frozen=True)
+class ExchangeConfig:
+    name: str
+    api_key: str
+    secret_key: str
+    account: Optional[str] = None
+    # Limits shared by all the accounts of the exchange. If not set, the defaults of
+    # the exchange class are used
+    max_concurrent_accounts: Optional[int] = None
+    requests_per_minute: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class NetworkConfig:
+    name: str
+    addresses: AddressList
+    # Ethplorer API key. The free one is limited to a few requests per second
+    api_key: str = "freekey"
+    # If set, balances are read from this JSON-RPC node instead of Ethplorer. A
+    # node can't list the tokens of an address, so the contracts to check are
+    # given in tokens
+    rpc_url: Optional[str] = None
+    tokens: Tuple[str, ...] = ()
+    # Addresses fetched at the same time, and addresses per JSON-RPC batch
+    max_workers: int = 8
+    batch_size: int = 100
+    # 0 disables the rate limiter
+    requests_per_minute: float = 60
+    # Chains that aren't built in need their chain id and native coin
+    chain_id: Optional[int] = None
+    native_symbol: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ManualBalancesConfig:
+    csv_file: str
+
+
+@dataclass(frozen=True)
+class CoinMarketCapConfig:
+    api_key: str
+    # Symbol to id mappings barely change, so they are cached for a week by default
+    map_cache_ttl: float = 7 * 24 * 60 * 60
+    # Symbols that weren't found are retried after a day, in case they get listed
+    unknown_symbol_cache_ttl: float = 24 * 60 * 60
+    # Basic plan limit. Paid plans can raise it with REQUESTS_PER_MINUTE
+    requests_per_minute: float = 30
+    credits_per_day: Optional[float] = None
+    max_retries: int = 5
+
+
+@dataclass(frozen=True)
+class HttpConfig:
+    pool_size: int = 20
+    timeout: float = 30.0
+    retries: int = 3
+
+
+@dataclass(frozen=True)
+class HistoryConfig:
+    # SQLite database where every portfolio run is appended
+    path: str = "reports/history.sqlite"
+    enabled: bool = True
+
+
+@dataclass(frozen=True)
+class FiltersConfig:
+    # Symbols with a smaller total balance, across all sources, are left out
+    min_balance: float = 0
+    # Symbols that are always kept, and symbols that are always left out
+    allow: Tuple[str, ...] = ()
+    deny: Tuple[str, ...] = ()
+    # Token contracts that are never read, on any EVM chain, and token contracts
+    # that are always read, even if they look like spam
+    spam_contracts: Tuple[str, ...] = ()
+    allow_contracts: Tuple[str, ...] = ()
+    # Symbols worth less than this at their last price in the history are left out
+    min_value_usd: Optional[float] = None
+
+
+class ConfigError(Exception):
+    """Raised when the config file has a missing or invalid option."""
+
+
+class Config:
+    """Parsed and validated cryptonaire_reports.config.
+
+    The file is read once and every source gets its own typed section from here, so
+    creating sources doesn't touch the disk again.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = Path(path or os.environ.get(CONFIG_PATH_ENV) or CONFIG_FILE)
+        self._parser = ConfigParser()
+        if self.path.exists():
+            self._parser.read(self.path)
+            logger.debug(f"[CONFIG] Configuration loaded from {self.path}")
+        else:
+            logger.warning(f"[CONFIG] Configuration file {self.path} not found")
+        self._apply_env_overrides()
+
+        self.exchanges: Dict[str, List[ExchangeConfig]] = {}
+        self.networks: Dict[str, NetworkConfig] = {}
+        self.manual_balances: Optional[ManualBalancesConfig] = None
+        self.coin_market_cap: Optional[CoinMarketCapConfig] = None
+        self.http = HttpConfig()
+        self.history = HistoryConfig()
+        self.filters = FiltersConfig()
+        self._validate()
+
+    def __contains__(self, section: str) -> bool:
+        return section in self._parser
+
+    def _apply_env_overrides(self) -> None:
+        sections = set(KNOWN_SECTIONS) | set(self._parser.sections())
+        # Longest names first, so CRYPTONAIRE_MANUAL_BALANCES_... doesn't match a
+        # section called "Manual"
+        prefixes = sorted(
+            ((self._env_name(section), section) for section in sections),
+            key=lambda prefix: len(prefix[0]),
+            reverse=True,
+        )
+        for variable, value in os.environ.items():
+            if not variable.startswith(ENV_PREFIX):
+                continue
+            for prefix, section in prefixes:
+                if variable.startswith(prefix + "_"):
+                    if section not in self._parser:
+                        self._parser.add_section(section)
+                    option = variable[len(prefix) + 1 :]
+                    self._parser.set(section, option, value)
+                    logger.debug(f"[CONFIG] {section}.{option} set from {variable}")
+                    break
+
+    @staticmethod
+    def _env_name(section: str) -> str:
+        return ENV_PREFIX + section.upper().replace(" ", "_").replace(":", "_")
+
+    def _get(self, section: str, option: str, convert: type = str, **kwargs):
+        try:
+            if convert is str:
+                return self._parser.get(section, option, **kwargs)
+            if convert is bool:
+                return self._parser.getboolean(section, option, **kwargs)
+            if convert is int:
+                return self._parser.getint(section, option, **kwargs)
+            return self._parser.getfloat(section, option, **kwargs)
+        except ValueError as e:
+            raise ConfigError(f"Invalid value for {option} in [{section}]: {e}")
+        except Exception:
+            raise ConfigError(f"Missing {option} in [{section}]")
+
+    def _get_list(self, section: str, option: str) -> Tuple[str, ...]:
+        """Reads an option with several values, separated by commas or spaces."""
+        return tuple(self._get(section, option, fallback="").replace(",", " ").split())
+
+    def _validate(self) -> None:
+        try:
+            for exchange in EXCHANGE_SECTIONS:
+                self.exchange_accounts(exchange)
+            if "Networks" in self._parser:
+                for network, addresses in self._parser.items("Networks"):
+                    self.networks[network.upper()] = self._network(network, addresses)
+            if self._parser.get("Manual Balances", "CSV_FILE", fallback=None):
+                self.manual_balances = ManualBalancesConfig(
+                    csv_file=self._get("Manual Balances", "CSV_FILE")
+                )
+            if "CoinMarketCap" in self._parser:
+                defaults = CoinMarketCapConfig(api_key="")
+                self.coin_market_cap = CoinMarketCapConfig(
+                    api_key=self._get("CoinMarketCap", "API_KEY"),
+                    map_cache_ttl=self._get(
+                        "CoinMarketCap",
+                        "MAP_CACHE_TTL",
+                        float,
+                        fallback=defaults.map_cache_ttl,
+                    ),
+                    unknown_symbol_cache_ttl=self._get(
+                        "CoinMarketCap",
+                        "UNKNOWN_SYMBOL_CACHE_TTL",
+                        float,
+                        fallback=defaults.unknown_symbol_cache_ttl,
+                    ),
+                    requests_per_minute=self._get(
+                        "CoinMarketCap",
+                        "REQUESTS_PER_MINUTE",
+                        float,
+                        fallback=defaults.requests_per_minute,
+                    ),
+                    credits_per_day=self._get(
+                        "CoinMarketCap",
+                        "CREDITS_PER_DAY",
+                        float,
+                        fallback=defaults.credits_per_day,
+                    ),
+                    max_retries=self._get(
+                        "CoinMarketCap",
+                        "MAX_RETRIES",
+                        int,
+                        fallback=defaults.max_retries,
+                    ),
+                )
+            defaults = HttpConfig()
+            self.http = HttpConfig(
+                pool_size=self._get(
+                    "HTTP", "POOL_SIZE", int, fallback=defaults.pool_size
+                ),
+                timeout=self._get("HTTP", "TIMEOUT", float, fallback=defaults.timeout),
+                retries=self._get("HTTP", "RETRIES", int, fallback=defaults.retries),
+            )
+            defaults = HistoryConfig()
+            self.history = HistoryConfig(
+                path=self._get("History", "PATH", fallback=defaults.path),
+                enabled=self._get(
+                    "History", "ENABLED", bool, fallback=defaults.enabled
+                ),
+            )
+            defaults = FiltersConfig()
+            self.filters = FiltersConfig(
+                min_balance=self._get(
+                    "Filters", "MIN_BALANCE", float, fallback=defaults.min_balance
+                ),
+                allow=tuple(
+                    symbol.upper() for symbol in self._get_list("Filters", "ALLOW")
+                ),
+                deny=tuple(
+                    symbol.upper() for symbol in self._get_list("Filters", "DENY")
+                ),
+                spam_contracts=tuple(
+                    contract.lower()
+                    for contract in self._get_list("Filters", "SPAM_CONTRACTS")
+                ),
+                allow_contracts=tuple(
+                    contract.lower()
+                    for contract in self._get_list("Filters", "ALLOW_CONTRACTS")
+                ),
+                min_value_usd=self._get(
+                    "Filters", "MIN_VALUE_USD", float, fallback=defaults.min_value_usd
+                ),
+            )
+        except ConfigError as e:
+            logger.error(f"[CONFIG] Error in {self.path}: {e}")
+            exit(1)
+
+    def _network(self, name: str, addresses: str) -> NetworkConfig:
+        """Parses the addresses of a network and reads its optional [<Network>]
+        section, e.g. [Ethereum] or [Arbitrum]."""
+        addresses = AddressList.parse(addresses)
+        defaults = NetworkConfig(name=name.upper(), addresses=addresses)
+        # Any case is accepted, e.g. [BSC] or [Bsc]
+        sections = [s for s in self._parser.sections() if s.upper() == name.upper()]
+        if not sections:
+            return defaults
+        section = sections[0]
+        return NetworkConfig(
+            name=defaults.name,
+            addresses=addresses,
+            api_key=self._get(section, "API_KEY", fallback=defaults.api_key),
+            rpc_url=self._get(section, "RPC_URL", fallback=defaults.rpc_url),
+            tokens=self._get_list(section, "TOKENS"),
+            max_workers=self._get(
+                section, "MAX_WORKERS", int, fallback=defaults.max_workers
+            ),
+            batch_size=self._get(
+                section, "BATCH_SIZE", int, fallback=defaults.batch_size
+            ),
+            requests_per_minute=self._get(
+                section,
+                "REQUESTS_PER_MINUTE",
+                float,
+                fallback=defaults.requests_per_minute,
+            ),
+            chain_id=self._get(section, "CHAIN_ID", int, fallback=defaults.chain_id),
+            native_symbol=self._get(
+                section, "NATIVE_SYMBOL", fallback=defaults.native_symbol
+            ),
+        )
+
+    @staticmethod
+    def check_fetch_time(network: NetworkConfig, timeout: Optional[float]) -> None:
+        """Warns if the rate limit of a network doesn't leave time to fetch all its
+        addresses within the source timeout. Ethplorer takes a request per address, a
+        JSON-RPC node a request per batch of addresses.
+
+        Args:
+            network (NetworkConfig): Config of the network.
+            timeout (Optional[float]): Seconds a source is waited for. None waits
+                forever.
+        """
+        if not network.requests_per_minute or timeout is None:
+            return
+        chain = EVM_CHAINS.get(network.name)
+        if network.rpc_url is None and chain is not None and chain.rpc_url is None:
+            requests = len(network.addresses)
+            hint = "raise REQUESTS_PER_MINUTE, set RPC_URL or use --timeout"
+        else:
+            requests = math.ceil(len(network.addresses) / max(1, network.batch_size))
+            hint = "raise REQUESTS_PER_MINUTE or BATCH_SIZE, or use --timeout"
+        seconds = requests / network.requests_per_minute * 60
+        if seconds > timeout:
+            logger.warning(
+                f"[CONFIG] {network.name} needs about {seconds:.0f}s for "
+                f"{len(network.addresses)} addresses at {network.requests_per_minute:g} "
+                f"requests per minute, more than the {timeout:g}s timeout of a "
+                f"source. The addresses that don't finish in time are left out: {hint}"
+            )
+
+    def exchange_accounts(self, name: str) -> List[ExchangeConfig]:
+        """Returns the config of every account of an exchange: the [<name>] section
+        and every [<name>:<account>] section, in the order they appear in the file.
+
+        Args:
+            name (str): Name of the exchange, as used in the config sections.
+
+        Returns:
+            List[ExchangeConfig]: Config of each account. Empty if the exchange isn't
+                configured.
+        """
+        if name not in self.exchanges:
+            accounts = []
+            for section in self._parser.sections():
+                exchange, _, account = section.partition(ACCOUNT_SEPARATOR)
+                if exchange != name:
+                    continue
+                accounts.append(
+                    ExchangeConfig(
+                        name=name,
+                        api_key=self._get(section, "API_KEY"),
+                        secret_key=self._get(section, "SECRET_KEY"),
+                        account=account.strip() or None,
+                        max_concurrent_accounts=self._get(
+                            section, "MAX_CONCURRENT_ACCOUNTS", int, fallback=None
+                        ),
+                        requests_per_minute=self._get(
+                            section, "REQUESTS_PER_MINUTE", float, fallback=None
+                        ),
+                    )
+                )
+            self.exchanges[name] = accounts
+        return self.exchanges[name]
+
+    def network(self, name: str) -> Optional[NetworkConfig]:
+        return self.networks.get(name.upper())
+
+
+_config: Optional[Config] = None
+
+
+def load_config(path: Optional[str] = None) -> Config:
+    """Returns the parsed configuration. The file is only read the first time, or
+    again when an explicit path is given.
+
+    Args:
+        path (Optional[str]): Path of the config file. Defaults to the value of the
+            CRYPTONAIRE_CONFIG environment variable, or cryptonaire_reports.config in
+            the current directory.
+
+    Returns:
+        Config: Parsed configuration
+    """
+    global _config
+    if _config is None or path is not None:
+        _config = Config(path)
+    return _config
@@ -0,0 +1,158 @@
+from itertools import count
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import structlog
+from cryptonaire_reports.utils.http import HttpClient
+
+logger = structlog.get_logger()
+
+# Multicall3 is deployed at the same address on Ethereum and most EVM chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# First 4 bytes of the keccak hash of each function signature
+AGGREGATE3_SELECTOR = "82ad56cb"  # aggregate3((address,bool,bytes)[])
+BALANCE_OF_SELECTOR = "70a08231"  # balanceOf(address)
+DECIMALS_SELECTOR = "313ce567"  # decimals()
+SYMBOL_SELECTOR = "95d89b41"  # symbol()
+
+WORD_SIZE = 32
+
+
+class JsonRpcError(Exception):
+    """Raised when the node answers a JSON-RPC call with an error."""
+
+
+def _word(value: int) -> bytes:
+    return value.to_bytes(WORD_SIZE, "big")
+
+
+def _pad(data: bytes) -> bytes:
+    return data + b"\x00" * (-len(data) % WORD_SIZE)
+
+
+def encode_address(address: str) -> bytes:
+    return bytes.fromhex(address[2:].rjust(2 * WORD_SIZE, "0"))
+
+
+def balance_of_call(address: str) -> bytes:
+    """Call data of balanceOf(address)."""
+    return bytes.fromhex(BALANCE_OF_SELECTOR) + encode_address(address)
+
+
+def encode_aggregate3(calls: Sequence[Tuple[str, bytes]]) -> str:
+    """Encodes a call to Multicall3.aggregate3. Every call is allowed to fail, so a
+    token that reverts doesn't fail the rest of the batch.
+
+    Args:
+        calls (Sequence[Tuple[str, bytes]]): (target contract, call data) of every
+            call.
+
+    Returns:
+        str: Hex call data for eth_call.
+    """
+    encoded_calls = [
+        encode_address(target) + _word(1)
+        # The bytes are stored after the 3 words of the head of the tuple
+        + _word(3 * WORD_SIZE) + _word(len(call_data)) + _pad(call_data)
+        for target, call_data in calls
+    ]
+    offsets, position = [], len(calls) * WORD_SIZE
+    for encoded_call in encoded_calls:
+        offsets.append(_word(position))
+        position += len(encoded_call)
+    data = (
+        _word(WORD_SIZE)
+        + _word(len(calls))
+        + b"".join(offsets)
+        + b"".join(encoded_calls)
+    )
+    return "0x" + AGGREGATE3_SELECTOR + data.hex()
+
+
+def decode_aggregate3(result: str) -> List[Optional[bytes]]:
+    """Decodes the (bool success, bytes returnData)[] returned by aggregate3.
+
+    Returns:
+        List[Optional[bytes]]: Return data of every call, or None if it failed.
+    """
+    data = bytes.fromhex(result[2:])
+    array = _read_uint(data, 0)
+    length = _read_uint(data, array)
+    results = []
+    for index in range(length):
+        item = array + WORD_SIZE + _read_uint(data, array + WORD_SIZE * (index + 1))
+        success = _read_uint(data, item)
+        return_data = item + _read_uint(data, item + WORD_SIZE)
+        size = _read_uint(data, return_data)
+        start = return_data + WORD_SIZE
+        results.append(data[start : start + size] if success else None)
+    return results
+
+
+def _read_uint(data: bytes, position: int) -> int:
+    return int.from_bytes(data[position : position + WORD_SIZE], "big")
+
+
+def decode_uint(data: Optional[bytes]) -> Optional[int]:
+    if not data or len(data) < WORD_SIZE:
+        return None
+    return _read_uint(data, 0)
+
+
+def decode_string(data: Optional[bytes]) -> Optional[str]:
+    """Decodes the result of symbol(). A few old tokens (e.g. MKR) return a bytes32
+    instead of a string."""
+    if not data:
+        return None
+    if len(data) == WORD_SIZE:
+        return data.rstrip(b"\x00").decode("utf-8", errors="ignore") or None
+    size = _read_uint(data, _read_uint(data, 0))
+    start = _read_uint(data, 0) + WORD_SIZE
+    return data[start : start + size].decode("utf-8", errors="ignore") or None
+
+
+class JsonRpcClient:
+    """Minimal JSON-RPC client for an EVM node. Calls are sent as batches, so a
+    whole set of addresses is resolved in a single HTTP request."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.http = HttpClient()
+        self._ids = count(1)
+
+    def batch(self, calls: Sequence[Tuple[str, List]]) -> List:
+        """Sends every (method, params) in one request.
+
+        Returns:
+            List: Result of every call, in the same order. Calls that failed are
+                returned as JsonRpcError instances instead of raising, so the
+                caller can skip them and keep the rest.
+        """
+        if not calls:
+            return []
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "id": next(self._ids),
+                "method": method,
+                "params": params,
+            }
+            for method, params in calls
+        ]
+        response = self.http.request("POST", self.url, json=payload)
+        response.raise_for_status()
+        answers: Dict[int, Dict] = {answer["id"]: answer for answer in response.json()}
+        results = []
+        for request in payload:
+            answer = answers.get(request["id"], {})
+            if "result" in answer:
+                results.append(answer["result"])
+            else:
+                results.append(JsonRpcError(answer.get("error", "No answer")))
+        return results
+
+    def call(self, method: str, params: List):
+        result = self.batch([(method, params)])[0]
+        if isinstance(result, JsonRpcError):
+            raise result
+        return result
@@ -0,0 +1,59 @@
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+import xlsxwriter
+
+# Extra characters added to the longest value of each column
+COLUMN_PADDING = 3
+
+HEADER_FORMAT = {
+    "bold": True,
+    "text_wrap": True,
+    "valign": "top",
+    "border": 1,
+}
+
+
+def write_excel(sheets: Dict[str, pd.DataFrame], path: Path) -> None:
+    """Writes each dataframe to its own sheet of an XLSX file.
+
+    XlsxWriter runs in constant_memory mode, so every row is flushed to disk as soon
+    as it's written and memory doesn't grow with the number of rows. The width of
+    each column is computed in the same pass that writes the rows.
+
+    Args:
+        sheets (Dict[str, pd.DataFrame]): Dataframes keyed by sheet name.
+        path (Path): Path of the XLSX file.
+    """
+    workbook = xlsxwriter.Workbook(
+        path, {"constant_memory": True, "nan_inf_to_errors": True}
+    )
+    try:
+        header_format = workbook.add_format(HEADER_FORMAT)
+        for sheet_name, sheet_pdf in sheets.items():
+            worksheet = workbook.add_worksheet(sheet_name)
+            widths = _write_rows(worksheet, sheet_pdf, header_format)
+            # Set column widths to be equal to longest value
+            for column, width in enumerate(widths):
+                worksheet.set_column(column, column, width + COLUMN_PADDING)
+    finally:
+        workbook.close()
+
+
+def _write_rows(
+    worksheet: "xlsxwriter.worksheet.Worksheet",
+    sheet_pdf: pd.DataFrame,
+    header_format: "xlsxwriter.format.Format",
+) -> List[int]:
+    headers = [str(column) for column in sheet_pdf.columns]
+    worksheet.write_row(0, 0, headers, header_format)
+    widths = [len(header) for header in headers]
+    for row, values in enumerate(sheet_pdf.itertuples(index=False, name=None), 1):
+        for column, value in enumerate(values):
+            if pd.isna(value):
+                # Missing values are left empty, like pandas does
+                continue
+            worksheet.write(row, column, value)
+            widths[column] = max(widths[column], len(str(value)))
+    return widths
@@ -0,0 +1,323 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_TIMEOUT = 120.0
+
+# The threads engine runs every source in its own thread. The asyncio engine runs
+# them all in one event loop, using the native async implementation of the sources
+# that have one, and worker threads for the rest
+THREADS_ENGINE = "threads"
+ASYNCIO_ENGINE = "asyncio"
+ENGINES = [THREADS_ENGINE, ASYNCIO_ENGINE]
+
+
+class TaskClock:
+    """Running time of a fetch task, used for its timeout. The time the task spends
+    waiting for a limit shared with other tasks (see untimed) doesn't count, the same
+    as the time it waits in the queue before it starts."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self._paused = 0.0
+        self._paused_at: Optional[float] = None
+        self._pauses = 0
+
+    def elapsed(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            paused = self._paused
+            if self._paused_at is not None:
+                paused += now - self._paused_at
+            return now - self.started_at - paused
+
+    def pause(self) -> Callable[[], None]:
+        """Stops counting until the returned function is called. Pauses can overlap,
+        and calling the function more than once has no effect."""
+        with self._lock:
+            if not self._pauses:
+                self._paused_at = time.monotonic()
+            self._pauses += 1
+        resumed = []
+
+        def resume() -> None:
+            with self._lock:
+                if resumed:
+                    return
+                resumed.append(True)
+                self._pauses -= 1
+                if not self._pauses:
+                    self._paused += time.monotonic() - self._paused_at
+                    self._paused_at = None
+
+        return resume
+
+
+# Clock of the task that is running, in its thread or coroutine
+_task_clock: ContextVar[Optional[TaskClock]] = ContextVar("task_clock", default=None)
+
+
+@contextmanager
+def untimed() -> Iterator[None]:
+    """Time spent in the block doesn't count against the timeout of the fetch task
+    running it. Used to wait for the limits shared by several tasks, e.g. the
+    accounts of an exchange that can be fetched at the same time, so queued accounts
+    don't time out before they start."""
+    clock = _task_clock.get()
+    if clock is None:
+        yield
+        return
+    resume = clock.pause()
+    try:
+        yield
+    finally:
+        resume()
+
+
+async def to_thread(function: Callable[[], Any]) -> Any:
+    """Same as asyncio.to_thread, but the time waiting for a free worker thread
+    doesn't count against the timeout of the task."""
+    clock = _task_clock.get()
+    if clock is None:
+        return await asyncio.to_thread(function)
+    resume = clock.pause()
+
+    def _run() -> Any:
+        resume()
+        return function()
+
+    try:
+        return await asyncio.to_thread(_run)
+    finally:
+        resume()
+
+
+class BalanceFetcher:
+    """Runs a set of independent fetch tasks on a bounded thread pool.
+
+    Every task gets its own timeout, counted from the moment it actually starts
+    running (not from the moment it was queued), and without the time it spends in
+    untimed blocks. Tasks that fail or time out are
+    logged and left out of the results, so the caller always gets the partial
+    results of the tasks that did complete. An optional deadline for the whole set
+    of tasks gives up on the ones that are still running or queued by then.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.timings: Dict[str, float] = {}
+
+    def fetch(
+        self, tasks: Dict[str, Callable[[], Any]], deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Executes all the tasks concurrently and waits for them to finish, fail or
+        time out.
+
+        Args:
+            tasks (Dict[str, Callable[[], Any]]): Mapping between the name of the task
+                (used for logging) and the function to call.
+            deadline (Optional[float]): time.monotonic() value after which the tasks
+                that haven't finished are left out. Defaults to no deadline.
+
+        Returns:
+            Dict[str, Any]: Results of the tasks that completed successfully, keyed
+                by task name. Failed or timed out tasks are not included.
+        """
+        if not tasks:
+            return {}
+
+        clocks: Dict[str, TaskClock] = {}
+
+        def _run(name: str, task: Callable[[], Any]) -> Any:
+            clocks[name] = TaskClock()
+            token = _task_clock.set(clocks[name])
+            try:
+                return task()
+            finally:
+                _task_clock.reset(token)
+
+        results = {}
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(tasks)),
+            thread_name_prefix="fetcher",
+        )
+        pending: Dict[Future, str] = {
+            executor.submit(_run, name, task): name for name, task in tasks.items()
+        }
+        try:
+            while pending:
+                timeout = self._next_deadline(pending, clocks)
+                if deadline is not None:
+                    remaining = max(0.0, deadline - time.monotonic())
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    self.timings[name] = self._wall_time(name, clocks)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        logger.error(f"[{name.upper()}] Error while fetching balances")
+                        logger.debug(f"[{name.upper()}] Full exception: {e}")
+                for future, name in list(pending.items()):
+                    if self._timed_out(name, clocks):
+                        logger.error(
+                            f"[{name.upper()}] No response after {self.timeout} "
+                            f"seconds. Skipping."
+                        )
+                        self.timings[name] = self._wall_time(name, clocks)
+                        future.cancel()
+                        del pending[future]
+                if deadline is not None and time.monotonic() >= deadline:
+                    logger.debug(
+                        f"[FETCHER] Deadline reached, {len(pending)} tasks not finished"
+                    )
+                    break
+        finally:
+            # Timed out tasks cannot be interrupted, so we don't wait for them
+            executor.shutdown(wait=False, cancel_futures=True)
+        return results
+
+    @staticmethod
+    def _wall_time(name: str, clocks: Dict[str, TaskClock]) -> float:
+        if name not in clocks:
+            return 0.0
+        return time.monotonic() - clocks[name].started_at
+
+    def _timed_out(self, name: str, clocks: Dict[str, TaskClock]) -> bool:
+        if self.timeout is None or name not in clocks:
+            return False
+        return clocks[name].elapsed() >= self.timeout
+
+    def _next_deadline(
+        self, pending: Dict[Future, str], clocks: Dict[str, TaskClock]
+    ) -> Optional[float]:
+        """Returns how long we can wait before one of the running tasks times out.
+        Queued or paused tasks don't get closer to their timeout, so we poll every
+        second until they run."""
+        if self.timeout is None:
+            return None
+        remaining = [
+            self.timeout - clocks[name].elapsed()
+            for name in pending.values()
+            if name in clocks
+        ]
+        remaining.append(1.0)
+        return max(0.0, min(remaining))
+
+
+class AsyncBalanceFetcher:
+    """Same as BalanceFetcher, but the tasks are coroutines that share one event loop,
+    so thousands of them can wait on the network without one thread each.
+
+    Blocking work that the tasks offload with to_thread (or asyncio.to_thread) runs
+    on a pool of max_workers threads.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.timings: Dict[str, float] = {}
+
+    def fetch(self, tasks: Dict[str, Callable[[], Awaitable[Any]]]) -> Dict[str, Any]:
+        """Runs all the tasks in a new event loop and waits for them to finish, fail
+        or time out.
+
+        Args:
+            tasks (Dict[str, Callable[[], Awaitable[Any]]]): Mapping between the name
+                of the task (used for logging) and the coroutine function to call.
+
+        Returns:
+            Dict[str, Any]: Results of the tasks that completed successfully, keyed
+                by task name. Failed or timed out tasks are not included.
+        """
+        # Imported here so httpx is only loaded if an async exchange is used
+        from cryptonaire_reports.utils.async_http import AsyncHttpClient
+
+        if not tasks:
+            return {}
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(
+            ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="fetcher"
+            )
+        )
+        try:
+            return loop.run_until_complete(self.fetch_async(tasks))
+        finally:
+            loop.run_until_complete(AsyncHttpClient.close_all())
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            # Unlike asyncio.run, closing the loop doesn't wait for the threads of
+            # the tasks that timed out
+            loop.close()
+
+    async def fetch_async(
+        self, tasks: Dict[str, Callable[[], Awaitable[Any]]]
+    ) -> Dict[str, Any]:
+        """Same as fetch, from a coroutine that is already running in an event loop."""
+        outcomes = await asyncio.gather(
+            *(self._run(name, task) for name, task in tasks.items())
+        )
+        return {
+            name: result for name, (success, result) in zip(tasks, outcomes) if success
+        }
+
+    async def _run(
+        self, name: str, task: Callable[[], Awaitable[Any]]
+    ) -> Tuple[bool, Any]:
+        clock = TaskClock()
+        try:
+            token = _task_clock.set(clock)
+            try:
+                # The new asyncio task gets a copy of the context, with its clock
+                running = asyncio.ensure_future(task())
+            finally:
+                _task_clock.reset(token)
+            return True, await self._wait(running, clock)
+        except asyncio.TimeoutError:
+            logger.error(
+                f"[{name.upper()}] No response after {self.timeout} seconds. Skipping."
+            )
+        except Exception as e:
+            logger.error(f"[{name.upper()}] Error while fetching balances")
+            logger.debug(f"[{name.upper()}] Full exception: {e}")
+        finally:
+            self.timings[name] = time.monotonic() - clock.started_at
+        return False, None
+
+    async def _wait(self, running: asyncio.Future, clock: TaskClock) -> Any:
+        """Waits for the task like asyncio.wait_for, but the timeout is checked
+        against its clock, which stops while the task is in an untimed block."""
+        try:
+            while self.timeout is not None:
+                remaining = self.timeout - clock.elapsed()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                done, _ = await asyncio.wait({running}, timeout=remaining)
+                if done:
+                    break
+            return await running
+        finally:
+            running.cancel()
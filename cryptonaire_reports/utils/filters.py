@@ -0,0 +1,95 @@
+from typing import Optional
+
+import pandas as pd
+import structlog
+from cryptonaire_reports.utils.config import FiltersConfig
+from cryptonaire_reports.utils.config import load_config
+from cryptonaire_reports.utils.history import HistoryStore
+
+logger = structlog.get_logger()
+
+
+class BalanceFilter:
+    """Leaves dust and unwanted symbols out of the report, after the balances are
+    aggregated and before they are enriched with CoinMarketCap, so they don't cost
+    any request.
+
+    The rules of the [Filters] section are applied in this order:
+    - DENY: symbols that are always left out.
+    - MIN_BALANCE: symbols whose total balance, across all sources, is smaller.
+    - MIN_VALUE_USD: symbols whose balance is worth less at the last price they had
+      in the history. Symbols that were never priced are kept, so new coins are
+      still looked up.
+
+    Symbols in ALLOW are never left out. ALLOW and DENY are case insensitive. Spam
+    tokens are skipped by the EVM networks themselves, before the balances are
+    aggregated: the contracts in SPAM_CONTRACTS, and tokens that look like spam
+    unless their symbol is in ALLOW or their contract in ALLOW_CONTRACTS.
+
+    Args:
+        config (Optional[FiltersConfig]): Rules to apply. Read from the config file
+            if not given.
+        history (Optional[HistoryStore]): History with the prices of the previous
+            runs, needed by MIN_VALUE_USD.
+    """
+
+    def __init__(
+        self,
+        config: Optional[FiltersConfig] = None,
+        history: Optional[HistoryStore] = None,
+    ) -> None:
+        self.config = config or load_config().filters
+        self.history = history
+        if self.config.min_value_usd is not None and self.history is None:
+            logger.warning(
+                "[FILTERS] MIN_VALUE_USD needs the history, which is disabled. "
+                "Symbols won't be filtered by value"
+            )
+
+    def apply(self, balances_pdf: pd.DataFrame) -> pd.DataFrame:
+        """Filters the aggregated balances.
+
+        Args:
+            balances_pdf (pd.DataFrame): Balances indexed by symbol, with a balance
+                column, as returned by Portfolio.aggregate_balances.
+
+        Returns:
+            pd.DataFrame: Rows of the symbols that are kept.
+        """
+        balances = balances_pdf["balance"]
+        # Token symbols can be mixed case (e.g. stETH), the lists are upper case
+        symbols = balances.index.astype(str).str.upper()
+        rules = {
+            "deny list": symbols.isin(self.config.deny),
+            "min balance": balances < self.config.min_balance,
+        }
+        prices = self.last_prices()
+        if prices is not None:
+            value = balances * prices.reindex(balances.index)
+            # NaN (never priced) compares as False, so those symbols are kept
+            rules["min value"] = value < self.config.min_value_usd
+        allowed = symbols.isin(self.config.allow)
+        dropped = pd.Series(False, index=balances.index)
+        for rule, matches in rules.items():
+            matches = pd.Series(matches, index=balances.index) & ~allowed & ~dropped
+            if matches.any():
+                logger.debug(
+                    f"[FILTERS] Left out by {rule}: {matches[matches].index.tolist()}"
+                )
+            dropped |= matches
+        logger.info(
+            f"[FILTERS] {int(dropped.sum())} of {len(balances)} symbols left out, "
+            f"{len(balances) - int(dropped.sum())} kept"
+        )
+        return balances_pdf[~dropped]
+
+    def last_prices(self) -> Optional[pd.Series]:
+        """Last known price of each symbol, or None if there's no value rule."""
+        if self.config.min_value_usd is None or self.history is None:
+            return None
+        try:
+            return self.history.latest_prices()
+        except Exception as e:
+            logger.error("[FILTERS] Unable to read the prices from the history")
+            logger.debug(f"[FILTERS] Full exception: {e}")
+            return None
@@ -0,0 +1,42 @@
+from typing import Dict
+
+# Only names and types here, no third-party imports: the CLI needs the formats for
+# its options, and pandas and pyarrow are loaded by writers when a report is written
+XLSX_FORMAT = "xlsx"
+CSV_FORMAT = "csv"
+PARQUET_FORMAT = "parquet"
+ARROW_FORMAT = "arrow"
+JSONL_FORMAT = "jsonl"
+REPORT_FORMATS = [XLSX_FORMAT, CSV_FORMAT, PARQUET_FORMAT, ARROW_FORMAT, JSONL_FORMAT]
+
+# Formats meant to be loaded by other programs. They keep the original column names
+# and the types of REPORT_SCHEMA instead of the readable names of XLSX and CSV
+TYPED_FORMATS = [PARQUET_FORMAT, ARROW_FORMAT, JSONL_FORMAT]
+# Formats written with pyarrow, an optional dependency
+PYARROW_FORMATS = [PARQUET_FORMAT, ARROW_FORMAT]
+
+FILE_EXTENSIONS = {
+    XLSX_FORMAT: "xlsx",
+    CSV_FORMAT: "csv",
+    PARQUET_FORMAT: "parquet",
+    ARROW_FORMAT: "arrow",
+    JSONL_FORMAT: "jsonl.gz",
+}
+
+# Supplies, market cap and rank are whole numbers, but coins without CoinMarketCap
+# data leave them empty, so they use the nullable integer type
+REPORT_SCHEMA: Dict[str, str] = {
+    "symbol": "category",
+    "source": "category",
+    "id": "Int64",
+    "name": "string",
+    "rank": "Int64",
+    "market_cap": "Int64",
+    "max_supply": "Int64",
+    "total_supply": "Int64",
+    "circulating_supply": "Int64",
+    "balance": "float64",
+    "price_usd": "float64",
+    "total_value_usd": "float64",
+    "portfolio_percentage": "float64",
+}
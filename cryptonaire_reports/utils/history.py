@@ -0,0 +1,223 @@
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+import structlog
+from cryptonaire_reports.utils.config import HistoryConfig
+from cryptonaire_reports.utils.config import load_config
+
+logger = structlog.get_logger()
+
+# Snapshots are identified by their UTC time. ISO 8601 strings sort like the dates
+# they represent, so ranges can be queried directly on the text column
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    timestamp TEXT PRIMARY KEY,
+    total_value_usd REAL
+);
+CREATE TABLE IF NOT EXISTS balances (
+    timestamp TEXT NOT NULL,
+    source TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    balance REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS balances_timestamp_source_symbol
+    ON balances (timestamp, source, symbol);
+CREATE INDEX IF NOT EXISTS balances_symbol_timestamp
+    ON balances (symbol, timestamp);
+CREATE TABLE IF NOT EXISTS prices (
+    timestamp TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    cmc_id INTEGER,
+    price_usd REAL,
+    market_cap REAL
+);
+CREATE INDEX IF NOT EXISTS prices_timestamp_symbol ON prices (timestamp, symbol);
+CREATE INDEX IF NOT EXISTS prices_symbol_timestamp ON prices (symbol, timestamp);
+"""
+
+SNAPSHOT_QUERY = """
+SELECT b.timestamp, b.source, b.symbol, b.balance, p.price_usd,
+       b.balance * p.price_usd AS total_value_usd
+FROM balances b
+LEFT JOIN prices p ON p.timestamp = b.timestamp AND p.symbol = b.symbol
+"""
+
+
+def format_timestamp(timestamp: datetime) -> str:
+    return timestamp.astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def parse_timestamp(value: str, end_of_day: bool = False) -> str:
+    """Normalises a date or datetime given in the CLI (e.g. 2024-05-01 or
+    2024-05-01T10:30) to the format of the stored timestamps. Values without a time
+    zone are taken as UTC.
+
+    Args:
+        value (str): Date or datetime in ISO 8601 format.
+        end_of_day (bool): If value is just a date, returns the last second of the
+            day instead of the first one. Used for the end of time ranges.
+
+    Returns:
+        str: Timestamp in TIMESTAMP_FORMAT
+    """
+    timestamp = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if end_of_day and len(value) == len("YYYY-MM-DD"):
+        timestamp = timestamp.replace(hour=23, minute=59, second=59)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return format_timestamp(timestamp)
+
+
+class HistoryStore:
+    """Local SQLite database with the balances and prices of every portfolio run.
+
+    Each run is appended as a snapshot, identified by its UTC timestamp. Rows are
+    indexed by (timestamp, source, symbol), so loading one snapshot or a time range
+    doesn't read the rest of the history.
+    """
+
+    def __init__(self, config: Optional[HistoryConfig] = None) -> None:
+        config = config or load_config().history
+        self.path = Path(config.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def append(
+        self,
+        balances_pdf: pd.DataFrame,
+        prices_pdf: pd.DataFrame,
+        timestamp: Optional[datetime] = None,
+    ) -> str:
+        """Stores a new snapshot in a single transaction.
+
+        Args:
+            balances_pdf (pd.DataFrame): Balances with the columns source, symbol and
+                balance, one row per source and symbol.
+            prices_pdf (pd.DataFrame): Coin info indexed by symbol, with the columns
+                id, price_usd and market_cap (missing columns are stored as NULL).
+            timestamp (Optional[datetime]): Time of the snapshot. Defaults to now.
+
+        Returns:
+            str: Timestamp of the snapshot
+        """
+        snapshot = format_timestamp(timestamp or datetime.now(timezone.utc))
+        balances = balances_pdf[["source", "symbol", "balance"]].copy()
+        balances.insert(0, "timestamp", snapshot)
+        prices = (
+            prices_pdf.reindex(columns=["id", "price_usd", "market_cap"])
+            .rename_axis("symbol")
+            .reset_index()
+        )
+        prices.insert(0, "timestamp", snapshot)
+        total_value_usd = (
+            balances.groupby("symbol")["balance"].sum()
+            * prices.set_index("symbol")["price_usd"]
+        ).sum()
+        with closing(self._connect()) as connection, connection:
+            # Runs in the same second replace each other instead of mixing their rows
+            for table in ["balances", "prices"]:
+                connection.execute(
+                    f"DELETE FROM {table} WHERE timestamp = ?", (snapshot,)
+                )
+            connection.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?)",
+                (snapshot, float(total_value_usd)),
+            )
+            connection.executemany(
+                "INSERT INTO balances VALUES (?, ?, ?, ?)", self._rows(balances)
+            )
+            connection.executemany(
+                "INSERT INTO prices VALUES (?, ?, ?, ?, ?)", self._rows(prices)
+            )
+        logger.info(f"[HISTORY] Snapshot {snapshot} saved to {self.path}")
+        return snapshot
+
+    @staticmethod
+    def _rows(pdf: pd.DataFrame):
+        """Rows of the dataframe as tuples of Python values, with NaN as NULL."""
+        return (
+            pdf.astype(object)
+            .where(pdf.notna(), None)
+            .itertuples(index=False, name=None)
+        )
+
+    def list_snapshots(self) -> pd.DataFrame:
+        """Returns the timestamp and total value of every stored snapshot."""
+        with closing(self._connect()) as connection:
+            return pd.read_sql_query(
+                "SELECT timestamp, total_value_usd FROM snapshots ORDER BY timestamp",
+                connection,
+            )
+
+    def latest_snapshot(self, at: Optional[str] = None) -> Optional[str]:
+        """Returns the timestamp of the last snapshot taken at or before at (or the
+        last one overall), or None if there isn't any."""
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT MAX(timestamp) FROM snapshots WHERE timestamp <= ?",
+                (at or "9999",),
+            ).fetchone()
+        return row[0]
+
+    def load_snapshot(self, at: Optional[str] = None) -> pd.DataFrame:
+        """Loads the balances and prices of a single snapshot.
+
+        Args:
+            at (Optional[str]): Timestamp in TIMESTAMP_FORMAT. The last snapshot taken
+                at or before it is returned. Defaults to the latest snapshot.
+
+        Returns:
+            pd.DataFrame: One row per source and symbol, with the columns timestamp,
+                source, symbol, balance, price_usd and total_value_usd. Empty if
+                there is no snapshot.
+        """
+        snapshot = self.latest_snapshot(at)
+        with closing(self._connect()) as connection:
+            return pd.read_sql_query(
+                SNAPSHOT_QUERY + "WHERE b.timestamp = ? ORDER BY b.symbol, b.source",
+                connection,
+                params=(snapshot,),
+            )
+
+    def load_range(
+        self, start: Optional[str] = None, end: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Loads every snapshot taken between start and end, both included. Same
+        columns as load_snapshot."""
+        with closing(self._connect()) as connection:
+            return pd.read_sql_query(
+                SNAPSHOT_QUERY
+                + "WHERE b.timestamp BETWEEN ? AND ? "
+                + "ORDER BY b.timestamp, b.symbol, b.source",
+                connection,
+                params=(start or "0000", end or "9999"),
+            )
+
+    def latest_prices(self) -> pd.Series:
+        """Returns the last known price of every symbol in the history.
+
+        Returns:
+            pd.Series: Price in USD indexed by symbol, from the last snapshot where
+                the symbol had a price. NaN for symbols that were never priced.
+        """
+        with closing(self._connect()) as connection:
+            # With MAX, SQLite takes the other columns from the row with the maximum
+            prices = pd.read_sql_query(
+                "SELECT symbol, price_usd, MAX(timestamp) FROM prices "
+                "WHERE price_usd IS NOT NULL GROUP BY symbol",
+                connection,
+            )
+            symbols = pd.read_sql_query(
+                "SELECT DISTINCT symbol FROM prices", connection
+            )
+        return prices.set_index("symbol")["price_usd"].reindex(symbols["symbol"])
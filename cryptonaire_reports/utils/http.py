@@ -0,0 +1,48 @@
+from typing import Optional
+
+import requests
+import structlog
+from cryptonaire_reports.utils.config import HttpConfig
+from cryptonaire_reports.utils.config import load_config
+from cryptonaire_reports.utils.singleton import Singleton
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = structlog.get_logger()
+
+
+class HttpClient(metaclass=Singleton):
+    """Shared HTTP session for the exchanges and networks that don't use an SDK.
+
+    Reusing the same session keeps the connections alive between requests, so we
+    only pay for the TCP and TLS handshakes once per host. Idempotent requests that
+    fail with a connection error or a 5xx status are retried with backoff.
+    """
+
+    def __init__(self, config: Optional[HttpConfig] = None) -> None:
+        config = config or load_config().http
+        pool_size = config.pool_size
+        self.timeout = config.timeout
+        retries = Retry(
+            total=config.retries,
+            backoff_factor=0.5,
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=["GET"],
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        logger.debug(
+            f"[HTTP] Session created with a pool of {pool_size} connections per host"
+        )
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
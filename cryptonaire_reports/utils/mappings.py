@@ -1,16 +1,14 @@
-from cryptonaire_reports.exchanges.binance import Binance
-from cryptonaire_reports.exchanges.bing_x import BingX
-from cryptonaire_reports.exchanges.bybit import ByBit
-from cryptonaire_reports.exchanges.gate import Gate
-from cryptonaire_reports.networks.ethereum import Ethereum
-
+# Codes accepted by the CLI for each source. The keys are the source names used in
+# cryptonaire_reports.utils.registry
 EXCHANGE_MAP = {
-    Binance: ["binance"],
-    BingX: ["bing-x", "bingx", "bing_x"],
-    ByBit: ["bybit", "by-bit"],
-    Gate: ["gate", "gate-io", "gate_io"],
+    "binance": ["binance"],
+    "bing_x": ["bing-x", "bingx", "bing_x"],
+    "bybit": ["bybit", "by-bit"],
+    "gate": ["gate", "gate-io", "gate_io"],
 }
 
 NETWORKS_MAP = {
-    Ethereum: ["ethereum", "eth"],
+    "ethereum": ["ethereum", "eth"],
+    # Every other EVM chain of the config file
+    "evm": ["evm"],
 }
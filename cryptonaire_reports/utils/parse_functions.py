@@ -1,15 +1,17 @@
 from typing import Set
 
 import structlog
-from cryptonaire_reports.utils.mappings import EXCHANGE_MAP, NETWORKS_MAP
+from cryptonaire_reports.utils.registry import EXCHANGES_GROUP, NETWORKS_GROUP
+from cryptonaire_reports.utils.registry import get_source_aliases
 
 logger = structlog.get_logger()
 
 
 def parse_exchanges(exchanges_input: str) -> Set[str]:
     exchange_set: Set = {x.lower() for x in exchanges_input.split(",")}
+    exchange_map = get_source_aliases(EXCHANGES_GROUP)
     flat_list = ["all"]
-    [flat_list.extend(x) for x in EXCHANGE_MAP.values()]
+    [flat_list.extend(x) for x in exchange_map.values()]
     supported_exchanges_codes = set(flat_list)
     if not exchange_set <= supported_exchanges_codes:
         not_supported = []
@@ -18,7 +20,7 @@ def parse_exchanges(exchanges_input: str) -> Set[str]:
                 not_supported.append(exchange)
         logger.error(
             f"The following exchange codes are not supported: {','.join(not_supported)}.\n"
-            f"\t\t\t\tCurrently supported exchanges are {', '.join(SUPPORTED_EXCHANGES)}.\n"
+            f"\t\t\t\tCurrently supported exchanges are {', '.join(exchange_map)}.\n"
             f"\t\t\t\tPlease use one of the following: {', '.join(flat_list)}."
         )
         exit(1)
@@ -28,8 +30,9 @@ def parse_exchanges(exchanges_input: str) -> Set[str]:
 
 def parse_networks(networks_input: str) -> Set[str]:
     network_set: Set = {x.lower() for x in networks_input.split(",")}
+    networks_map = get_source_aliases(NETWORKS_GROUP)
     flat_list = ["all"]
-    [flat_list.extend(x) for x in NETWORKS_MAP.values()]
+    [flat_list.extend(x) for x in networks_map.values()]
     supported_networks = set(flat_list)
     if not network_set <= supported_networks:
         not_supported = []
@@ -38,7 +41,7 @@ def parse_networks(networks_input: str) -> Set[str]:
                 not_supported.append(network)
         logger.error(
             f"The following networks are not supported: {','.join(not_supported)}.\n"
-            f"\t\t\t\tCurrently supported networks are {', '.join(NETWORKS_MAP)}.\n"
+            f"\t\t\t\tCurrently supported networks are {', '.join(networks_map)}.\n"
             f"\t\t\t\tPlease use one of the following: {', '.join(flat_list)}."
         )
         exit(1)
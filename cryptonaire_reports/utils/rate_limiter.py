@@ -0,0 +1,111 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+
+import structlog
+from cryptonaire_reports.utils.timings import THROTTLE
+from cryptonaire_reports.utils.timings import Timings
+
+logger = structlog.get_logger()
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request would go over the daily budget of the rate limiter."""
+
+
+class RateLimiter:
+    """Client side token bucket shared by every thread that calls the same API.
+
+    Requests are paced ahead of time so we stay under requests_per_minute instead of
+    waiting for the server to reject us. On top of that, the credits consumed by
+    each call are added up and checked against an optional daily budget.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        credits_per_day: Optional[float] = None,
+        credits_used: float = 0,
+        name: str = "",
+    ) -> None:
+        # Name of the API, used to report the time spent waiting for it
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.credits_per_day = credits_per_day
+        self.credits_used = credits_used
+        # A full bucket plus what refills in a minute must not go over the limit, so
+        # a quarter of it can be used as an initial burst and the rest is paced
+        self._capacity = max(1.0, (requests_per_minute or 0) / 4)
+        self._refill_rate = max(1.0, (requests_per_minute or 0) - self._capacity) / 60
+        self._tokens = self._capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, credits: float = 1) -> None:
+        """Blocks until a new request can be made without going over the per-minute
+        limit.
+
+        Args:
+            credits (float): Credits that the request is expected to consume.
+
+        Raises:
+            RateLimitExceeded: If the request would go over the daily credit budget.
+        """
+        wait_time = self._reserve(credits)
+        if wait_time > 0:
+            logger.debug(f"[RATE LIMITER] Waiting {wait_time:.2f}s before next request")
+            Timings().record(THROTTLE, self.name, wait_time)
+            time.sleep(wait_time)
+
+    async def acquire_async(self, credits: float = 1) -> None:
+        """Same as acquire, but waits without blocking the event loop."""
+        wait_time = self._reserve(credits)
+        if wait_time > 0:
+            logger.debug(f"[RATE LIMITER] Waiting {wait_time:.2f}s before next request")
+            Timings().record(THROTTLE, self.name, wait_time)
+            await asyncio.sleep(wait_time)
+
+    def _reserve(self, credits: float) -> float:
+        """Takes a slot from the bucket and returns how long to wait before using it."""
+        with self._lock:
+            if (
+                self.credits_per_day is not None
+                and self.credits_used + credits > self.credits_per_day
+            ):
+                raise RateLimitExceeded(
+                    f"Daily budget of {self.credits_per_day} credits reached "
+                    f"({self.credits_used} used)"
+                )
+            if not self.requests_per_minute:
+                return 0
+            self._refill()
+            # Tokens can go negative: that reserves our slot and tells us how long
+            # we have to wait for it
+            self._tokens -= 1
+            return -self._tokens / self._refill_rate
+
+    def record(self, credits: float) -> None:
+        """Adds the credits actually consumed by a request to the daily usage."""
+        with self._lock:
+            self.credits_used += credits
+
+    def drain(self) -> None:
+        """Empties the bucket after the server rejected a request, so every thread
+        slows down instead of retrying straight away."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(self._capacity, self._tokens + elapsed * self._refill_rate)
+
+
+def backoff_delay(attempt: int, base: float = 2.0, cap: float = 60.0) -> float:
+    """Exponential backoff with full jitter: a random delay between 0 and
+    base * 2^attempt seconds, capped at cap seconds."""
+    return random.uniform(0, min(cap, base * 2**attempt))
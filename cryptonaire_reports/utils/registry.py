@@ -0,0 +1,82 @@
+import functools
+import importlib
+from importlib.metadata import entry_points
+from typing import Dict, List
+
+import structlog
+from cryptonaire_reports.utils.fetcher import ASYNCIO_ENGINE
+from cryptonaire_reports.utils.fetcher import THREADS_ENGINE
+from cryptonaire_reports.utils.mappings import EXCHANGE_MAP
+from cryptonaire_reports.utils.mappings import NETWORKS_MAP
+
+logger = structlog.get_logger()
+
+EXCHANGES_GROUP = "cryptonaire_reports.exchanges"
+NETWORKS_GROUP = "cryptonaire_reports.networks"
+
+# Sources are referenced by import path and only imported when they are selected,
+# so running a single exchange doesn't load the SDKs of all the others
+BUILTIN_SOURCES = {
+    EXCHANGES_GROUP: {
+        "binance": "cryptonaire_reports.exchanges.binance:Binance",
+        "bing_x": "cryptonaire_reports.exchanges.bing_x:BingX",
+        "bybit": "cryptonaire_reports.exchanges.bybit:ByBit",
+        "gate": "cryptonaire_reports.exchanges.gate:Gate",
+    },
+    NETWORKS_GROUP: {
+        "ethereum": "cryptonaire_reports.networks.ethereum:Ethereum",
+        "evm": "cryptonaire_reports.networks.evm:EvmNetwork",
+    },
+}
+
+# Native asyncio implementations, loaded instead of the ones above when the asyncio
+# engine is used. Sources without one are run in worker threads
+BUILTIN_ASYNC_SOURCES = {
+    EXCHANGES_GROUP: {
+        "binance": "cryptonaire_reports.exchanges.binance_async:AsyncBinance",
+        "bing_x": "cryptonaire_reports.exchanges.bing_x_async:AsyncBingX",
+    },
+    NETWORKS_GROUP: {},
+}
+
+BUILTIN_ALIASES = {
+    EXCHANGES_GROUP: EXCHANGE_MAP,
+    NETWORKS_GROUP: NETWORKS_MAP,
+}
+
+
+@functools.cache
+def get_sources(group: str) -> Dict[str, str]:
+    """Returns the import path of every source in group. Besides the built-in ones,
+    other packages can register their own exchanges or networks as entry points of
+    the cryptonaire_reports.exchanges and cryptonaire_reports.networks groups.
+
+    Args:
+        group (str): EXCHANGES_GROUP or NETWORKS_GROUP
+
+    Returns:
+        Dict[str, str]: Dictionary where the keys are the source names and the values
+            are the import paths, in "module:Class" format.
+    """
+    sources = dict(BUILTIN_SOURCES[group])
+    for entry_point in entry_points(group=group):
+        sources.setdefault(entry_point.name, entry_point.value)
+    return sources
+
+
+def get_source_aliases(group: str) -> Dict[str, List[str]]:
+    """Returns the codes that can be used in the CLI to select each source."""
+    return {
+        name: BUILTIN_ALIASES[group].get(name, [name]) for name in get_sources(group)
+    }
+
+
+def load_source(group: str, name: str, engine: str = THREADS_ENGINE) -> type:
+    """Imports the module of the source and returns its class. With the asyncio
+    engine, the native async implementation is returned if there is one."""
+    import_path = get_sources(group)[name]
+    if engine == ASYNCIO_ENGINE:
+        import_path = BUILTIN_ASYNC_SOURCES[group].get(name, import_path)
+    module_name, class_name = import_path.split(":")
+    logger.debug(f"Loading {class_name} from {module_name}")
+    return getattr(importlib.import_module(module_name), class_name)
@@ -0,0 +1,103 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+import structlog
+from cryptonaire_reports.utils.singleton import Singleton
+
+logger = structlog.get_logger()
+
+# Stages of a portfolio report, in the order they run
+CONFIG_LOAD = "config_load"
+CLIENT_INIT = "client_init"
+SOURCE_FETCH = "source_fetch"
+WALLET_FETCH = "wallet_fetch"
+THROTTLE = "throttle"
+FILTER = "filter"
+CMC_MAP = "cmc_map"
+CMC_QUOTES = "cmc_quotes"
+AGGREGATION = "aggregation"
+HISTORY = "history"
+WRITE = "write"
+TOTAL = "total"
+
+
+class Timings(metaclass=Singleton):
+    """Collects how long each stage of a run takes.
+
+    Every measure is logged as a structured event (stage, name and seconds) at debug
+    level, and kept so a summary of the whole run can be shown at the end. Sources,
+    wallets and throttled requests run concurrently, so their times overlap and don't
+    add up to the total.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.records: List[Tuple[str, str, float]] = []
+
+    def record(self, stage: str, name: str, seconds: float) -> None:
+        """Stores the time spent in a stage.
+
+        Args:
+            stage (str): Stage of the run, e.g. source_fetch.
+            name (str): What ran in that stage, e.g. the name of the exchange. Empty
+                for the stages that only run once.
+            seconds (float): Elapsed time in seconds.
+        """
+        with self._lock:
+            self.records.append((stage, name, seconds))
+        logger.debug("[TIMINGS] Stage timing", stage=stage, name=name, seconds=seconds)
+
+    def record_all(self, stage: str, timings: Dict[str, float]) -> None:
+        """Stores the timings of a BalanceFetcher, including the tasks that failed or
+        timed out."""
+        for name, seconds in timings.items():
+            self.record(stage, name, seconds)
+
+    @contextmanager
+    def measure(self, stage: str, name: str = "") -> Iterator[None]:
+        """Records the time spent in the with block, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, name, time.perf_counter() - start)
+
+    def summary(self) -> List[Tuple[str, str, int, float]]:
+        """Adds up the records of each stage and name, in the order in which they
+        were first recorded.
+
+        Returns:
+            List[Tuple[str, str, int, float]]: One (stage, name, calls, seconds) row
+                per stage and name.
+        """
+        rows: Dict[Tuple[str, str], List] = {}
+        with self._lock:
+            for stage, name, seconds in self.records:
+                row = rows.setdefault((stage, name), [0, 0.0])
+                row[0] += 1
+                row[1] += seconds
+        stage_order = {}
+        for stage, _ in rows:
+            stage_order.setdefault(stage, len(stage_order))
+        # Group the rows of each stage together, even if they were recorded apart
+        keys = sorted(rows, key=lambda key: stage_order[key[0]])
+        return [(stage, name, *rows[(stage, name)]) for stage, name in keys]
+
+    def format_summary(self) -> str:
+        """Returns the summary as a text table."""
+        rows = [("Stage", "Name", "Calls", "Seconds")] + [
+            (stage, name, str(calls), f"{seconds:.3f}")
+            for stage, name, calls, seconds in self.summary()
+        ]
+        widths = [max(len(row[column]) for row in rows) for column in range(4)]
+        return "\n".join(
+            f"{stage:<{widths[0]}}  {name:<{widths[1]}}  "
+            f"{calls:>{widths[2]}}  {seconds:>{widths[3]}}"
+            for stage, name, calls, seconds in rows
+        )
+
+    def reset(self) -> None:
+        with self._lock:
+            self.records = []
@@ -0,0 +1,108 @@
+import functools
+import re
+import time
+from typing import Dict, Iterable, NamedTuple, Optional
+
+import structlog
+from cryptonaire_reports.utils.cache import JsonCache
+from cryptonaire_reports.utils.singleton import Singleton
+
+logger = structlog.get_logger()
+
+# Airdropped spam tokens advertise a website or a claim in their symbol, which is
+# what wallets and explorers show. Names are left out: real projects are named
+# after their domain, e.g. yearn.finance
+SPAM_PATTERN = re.compile(
+    r"https?:|www\.|\.(com|io|org|net|xyz|site|app|finance|link)\b|claim|visit",
+    re.IGNORECASE,
+)
+
+# Spam flags are guesses, so they are checked again after a week. Symbol and decimals
+# never change and don't expire
+SPAM_TOKEN_TTL = 7 * 24 * 60 * 60
+
+
+class TokenInfo(NamedTuple):
+    symbol: str
+    decimals: int
+    # Spam tokens are left out of the balances, before they reach CoinMarketCap
+    spam: bool = False
+
+    def to_float(self, units: int) -> float:
+        """Converts an amount in the smallest unit of the token (e.g. wei) to
+        tokens. The division of two integers is exact up to the final rounding to
+        float, unlike dividing by a float power of ten."""
+        return units / _divisor(self.decimals)
+
+
+@functools.lru_cache(maxsize=None)
+def _divisor(decimals: int) -> int:
+    return 10**decimals
+
+
+def is_spam(symbol: Optional[str]) -> bool:
+    """Guesses if a token is airdrop spam from its symbol."""
+    return symbol is not None and bool(
+        SPAM_PATTERN.search(symbol) or not symbol.isprintable()
+    )
+
+
+class TokenCache(metaclass=Singleton):
+    """Symbol, decimals and spam flag of the ERC-20 tokens of every EVM chain, keyed
+    by chain id and contract.
+
+    They never change for a contract, so they are kept on disk without expiring,
+    and every chain and batch of addresses shares the same cache. Each token is
+    only looked up (or parsed from Ethplorer) the first time it's seen. Tokens
+    flagged as spam are looked up again after SPAM_TOKEN_TTL, or on the next run
+    after invalidate_spam.
+    """
+
+    def __init__(self) -> None:
+        self._cache = JsonCache("evm_tokens")
+
+    @staticmethod
+    def _key(chain_id: int, contract: str) -> str:
+        return f"{chain_id}:{contract.lower()}"
+
+    def get(self, chain_id: int, contract: str) -> Optional[TokenInfo]:
+        key = self._key(chain_id, contract)
+        token = self._cache.get(key)
+        if token is None:
+            return None
+        token = TokenInfo(*token)
+        if token.spam and self._cache.age(key) > SPAM_TOKEN_TTL:
+            return None
+        return token
+
+    def get_many(self, chain_id: int, contracts: Iterable[str]) -> Dict[str, TokenInfo]:
+        """Returns the cached tokens among contracts. The ones that aren't cached are
+        left out."""
+        tokens = {}
+        for contract in contracts:
+            token = self.get(chain_id, contract)
+            if token is not None:
+                tokens[contract] = token
+        return tokens
+
+    def set(self, chain_id: int, contract: str, token: TokenInfo) -> None:
+        self._cache.set(self._key(chain_id, contract), list(token))
+
+    def update(self, chain_id: int, tokens: Dict[str, TokenInfo]) -> None:
+        for contract, token in tokens.items():
+            self.set(chain_id, contract, token)
+        logger.debug(f"[TOKENS] {len(tokens)} tokens of chain {chain_id} cached")
+
+    def invalidate_spam(self) -> None:
+        """Forgets every token flagged as spam, so they are checked again."""
+        spam = []
+        for key in self._cache.keys():
+            token = self._cache.get(key)
+            if token is not None and TokenInfo(*token).spam:
+                spam.append(key)
+        for key in spam:
+            self._cache.invalidate(key)
+        logger.debug(f"[TOKENS] {len(spam)} spam tokens will be checked again")
+
+    def save(self) -> None:
+        self._cache.save()
@@ -0,0 +1,83 @@
+import gzip
+import json
+from pathlib import Path
+
+import pandas as pd
+from cryptonaire_reports.utils.formats import ARROW_FORMAT
+from cryptonaire_reports.utils.formats import JSONL_FORMAT
+from cryptonaire_reports.utils.formats import PARQUET_FORMAT
+from cryptonaire_reports.utils.formats import PYARROW_FORMATS
+from cryptonaire_reports.utils.formats import REPORT_SCHEMA
+
+try:
+    import pyarrow
+    import pyarrow.feather
+except ImportError:
+    pyarrow = None
+
+COMPRESSION = "zstd"
+
+
+def require_pyarrow(output_format: str) -> None:
+    """Raises ImportError if the format is written with pyarrow and it isn't
+    installed."""
+    if output_format in PYARROW_FORMATS and pyarrow is None:
+        raise ImportError(
+            f"pyarrow is required to write {output_format} reports. Install it with: "
+            "pip install cryptonaire-reports[arrow]"
+        )
+
+
+def apply_schema(report_pdf: pd.DataFrame) -> pd.DataFrame:
+    """Casts the columns of the portfolio report to the types of REPORT_SCHEMA.
+    Columns that aren't in the schema are left as they are."""
+    dtypes = {}
+    for column, dtype in REPORT_SCHEMA.items():
+        if column not in report_pdf:
+            continue
+        if dtype == "Int64":
+            # Values come as floats when some of them are missing
+            report_pdf = report_pdf.assign(
+                **{column: pd.to_numeric(report_pdf[column]).round()}
+            )
+        dtypes[column] = dtype
+    return report_pdf.astype(dtypes)
+
+
+def write_typed(report_pdf: pd.DataFrame, path: Path, output_format: str) -> None:
+    """Writes the report with the types of REPORT_SCHEMA.
+
+    Parquet and Arrow (IPC file format, also readable as Feather v2) are compressed
+    with zstd and JSON Lines with gzip.
+
+    Args:
+        report_pdf (pd.DataFrame): Portfolio report, with the original column names.
+        path (Path): Path of the output file.
+        output_format (str): One of TYPED_FORMATS.
+    """
+    require_pyarrow(output_format)
+    report_pdf = apply_schema(report_pdf.reset_index(drop=True))
+    if output_format == PARQUET_FORMAT:
+        report_pdf.to_parquet(
+            path, engine="pyarrow", compression=COMPRESSION, index=False
+        )
+    elif output_format == ARROW_FORMAT:
+        pyarrow.feather.write_feather(report_pdf, path, compression=COMPRESSION)
+    elif output_format == JSONL_FORMAT:
+        _write_jsonl(report_pdf, path)
+    else:
+        raise ValueError(f"{output_format} is not a typed format")
+
+
+def _write_jsonl(report_pdf: pd.DataFrame, path: Path) -> None:
+    # DataFrame.to_json keeps at most 15 decimals, which rounds the price of the
+    # cheapest coins. json writes the shortest repr that reads back as the same double
+    columns = report_pdf.columns.tolist()
+    rows = (
+        report_pdf.astype(object)
+        .where(report_pdf.notna(), None)
+        .itertuples(index=False, name=None)
+    )
+    with gzip.open(path, "wt", encoding="utf-8") as output_file:
+        for row in rows:
+            output_file.write(json.dumps(dict(zip(columns, row))) + "\n")
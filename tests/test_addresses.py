@@ -0,0 +1,67 @@
+from cryptonaire_reports.utils.addresses import AddressList
+from cryptonaire_reports.utils.addresses import is_valid_address
+from cryptonaire_reports.utils.addresses import to_checksum_address
+
+# Test vectors of EIP-55
+CHECKSUMMED = [
+    "0x52908400098527886E0F7030069857D2E4169EE7",
+    "0x8617E340B3D01FA5F11F306F4090FD50E238070D",
+    "0xde709f2102306220921060314715629080e2fb77",
+    "0x27b1fdb04752bbc536007a920d24acb045561c26",
+    "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed",
+    "0xfB6916095ca1df60bB79Ce92cE3Ea74c37c5d359",
+    "0xdbF03B407c01E7cD3CBea99509d93f8DDDC8C6FB",
+    "0xD1220A0cf47c7B9Be7A2E6BA89F429762e7b9aDb",
+]
+FIRST, SECOND = CHECKSUMMED[4], CHECKSUMMED[5]
+
+
+def test_to_checksum_address():
+    for address in CHECKSUMMED:
+        assert to_checksum_address(address.lower()) == address
+        assert to_checksum_address("0x" + address[2:].upper()) == address
+
+
+def test_is_valid_address():
+    for address in CHECKSUMMED:
+        assert is_valid_address(address)
+        # All lowercase or all uppercase addresses have no checksum
+        assert is_valid_address(address.lower())
+        assert is_valid_address("0x" + address[2:].upper())
+    # One letter with the wrong case
+    assert not is_valid_address("0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAeD")
+    assert not is_valid_address("0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeA")
+    assert not is_valid_address("0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAeZ")
+
+
+def test_parse():
+    addresses = AddressList.parse(f"""
+        # Comments are ignored
+        {FIRST}, {SECOND.lower()}
+        {FIRST.lower()}
+        0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAeD
+        0x1234
+        """)
+    # Repeated, invalid and wrongly checksummed addresses are skipped
+    assert list(addresses) == [FIRST, SECOND]
+
+
+def test_parse_file(tmp_path):
+    path = tmp_path / "addresses.txt"
+    path.write_text(f"# Cold wallets\n{SECOND}\n{CHECKSUMMED[6]}\n")
+    addresses = AddressList.parse([FIRST, str(path), str(tmp_path / "missing.txt")])
+    assert list(addresses) == [FIRST, SECOND, CHECKSUMMED[6]]
+
+
+def test_list_operations():
+    addresses = AddressList.parse(CHECKSUMMED[4:])
+    assert len(addresses) == 4
+    assert addresses[0] == FIRST
+    assert addresses[-1] == CHECKSUMMED[-1]
+    assert list(addresses[1:3]) == CHECKSUMMED[5:7]
+    assert SECOND.lower() in addresses
+    assert CHECKSUMMED[0] not in addresses
+    assert [list(shard) for shard in addresses.shards(3)] == [
+        CHECKSUMMED[4:7],
+        CHECKSUMMED[7:],
+    ]
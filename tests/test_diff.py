@@ -0,0 +1,68 @@
+import math
+
+import pandas as pd
+from cryptonaire_reports.reports.diff import diff_snapshots
+
+OLD = pd.DataFrame(
+    {
+        "source": ["Binance", "Kraken", "Binance", "ETHEREUM", "Binance"],
+        "symbol": ["BTC", "BTC", "ETH", "USDC", "DOGE"],
+        "balance": [1.0, 0.5, 2.0, 100.0, 500.0],
+        "price_usd": [60000.0, 60000.0, 3000.0, 1.0, 0.1],
+    }
+)
+NEW = pd.DataFrame(
+    {
+        "source": ["Binance", "Kraken", "Binance", "ETHEREUM", "Kraken"],
+        "symbol": ["BTC", "BTC", "ETH", "USDC", "SOL"],
+        "balance": [1.0, 1.0, 2.0, 100.0, 10.0],
+        "price_usd": [60000.0, 60000.0, 3500.0, 1.0, None],
+    }
+)
+
+
+def _rows(diff_pdf: pd.DataFrame, keys):
+    return {tuple(row[key] for key in keys): row for _, row in diff_pdf.iterrows()}
+
+
+def test_diff_by_symbol():
+    diff_pdf = diff_snapshots(OLD, NEW)
+    rows = _rows(diff_pdf, ["symbol"])
+    assert {key: row["status"] for key, row in rows.items()} == {
+        ("BTC",): "changed",
+        ("ETH",): "changed",
+        ("USDC",): "unchanged",
+        ("DOGE",): "removed",
+        ("SOL",): "added",
+    }
+    btc = rows[("BTC",)]
+    assert (btc["balance_old"], btc["balance_new"]) == (1.5, 2.0)
+    assert btc["total_value_usd_change"] == 30000.0
+    eth = rows[("ETH",)]
+    assert eth["price_usd_change"] == 500.0
+    assert eth["total_value_usd_change"] == 1000.0
+    # Removed rows go to a zero balance
+    doge = rows[("DOGE",)]
+    assert doge["balance_change"] == -500.0
+    assert doge["total_value_usd_change"] == -50.0
+    # Coins without a price have an unknown value
+    sol = rows[("SOL",)]
+    assert sol["balance_change"] == 10.0
+    assert math.isnan(sol["total_value_usd_new"])
+    # Sorted by the absolute change in value
+    assert list(diff_pdf["symbol"][:3]) == ["BTC", "ETH", "DOGE"]
+
+
+def test_diff_by_source():
+    rows = _rows(diff_snapshots(OLD, NEW, by="source"), ["source", "symbol"])
+    assert rows[("Binance", "BTC")]["status"] == "unchanged"
+    assert rows[("Kraken", "BTC")]["status"] == "changed"
+    assert rows[("Kraken", "BTC")]["balance_change"] == 0.5
+    assert rows[("Kraken", "SOL")]["status"] == "added"
+    assert rows[("Binance", "DOGE")]["status"] == "removed"
+
+
+def test_diff_of_identical_snapshots():
+    diff_pdf = diff_snapshots(OLD, OLD)
+    assert set(diff_pdf["status"]) == {"unchanged"}
+    assert (diff_pdf["total_value_usd_change"] == 0).all()
@@ -0,0 +1,74 @@
+from cryptonaire_reports.utils.evm import balance_of_call
+from cryptonaire_reports.utils.evm import decode_aggregate3
+from cryptonaire_reports.utils.evm import decode_string
+from cryptonaire_reports.utils.evm import decode_uint
+from cryptonaire_reports.utils.evm import encode_aggregate3
+
+TOKEN = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+HOLDER = "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed"
+
+
+def _words(*words: str) -> str:
+    """Concatenates 32 byte words written as hex, left padded with zeros."""
+    return "".join(word.rjust(64, "0") for word in words)
+
+
+def test_balance_of_call():
+    assert balance_of_call(HOLDER).hex() == "70a08231" + _words(HOLDER[2:].lower())
+
+
+def test_encode_aggregate3():
+    call_data = balance_of_call(HOLDER).hex()
+    expected = "0x82ad56cb" + _words(
+        "20",  # offset of the calls array
+        "1",  # number of calls
+        "20",  # offset of the first call, from the start of the offsets
+        TOKEN[2:].lower(),  # target
+        "1",  # allowFailure
+        "60",  # offset of callData, from the start of the call
+        "24",  # length of callData
+        call_data[:64],
+        call_data[64:].ljust(64, "0"),
+    )
+    assert encode_aggregate3([(TOKEN, balance_of_call(HOLDER))]) == expected
+
+
+def test_decode_aggregate3():
+    # (bool success, bytes returnData)[] of a call that returned 1000 and a call
+    # that reverted without data
+    result = "0x" + _words(
+        "20",  # offset of the results array
+        "2",  # number of results
+        "40",  # offset of the first result
+        "c0",  # offset of the second result
+        "1",  # success
+        "40",  # offset of returnData
+        "20",  # length of returnData
+        "3e8",  # 1000
+        "0",  # failure
+        "40",  # offset of returnData
+        "0",  # length of returnData
+    )
+    results = decode_aggregate3(result)
+    assert len(results) == 2
+    assert decode_uint(results[0]) == 1000
+    assert results[1] is None
+
+
+def test_decode_uint():
+    assert decode_uint(bytes.fromhex(_words("6"))) == 6
+    assert decode_uint(b"") is None
+    assert decode_uint(None) is None
+
+
+def test_decode_string():
+    usdc = _words("20", "4", "USDC".encode().hex().ljust(64, "0"))
+    assert decode_string(bytes.fromhex(usdc)) == "USDC"
+
+
+def test_decode_bytes32_string():
+    # MKR returns its symbol as a bytes32
+    mkr = "MKR".encode().hex().ljust(64, "0")
+    assert decode_string(bytes.fromhex(mkr)) == "MKR"
+    assert decode_string(bytes(32)) is None
+    assert decode_string(None) is None
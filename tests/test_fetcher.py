@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+from cryptonaire_reports.exchanges.async_exchange import AsyncExchange
+from cryptonaire_reports.exchanges.exchange import Exchange
+from cryptonaire_reports.utils.config import ExchangeConfig
+from cryptonaire_reports.utils.fetcher import AsyncBalanceFetcher
+from cryptonaire_reports.utils.fetcher import BalanceFetcher
+from cryptonaire_reports.utils.fetcher import untimed
+
+FETCH_SECONDS = 0.2
+TIMEOUT = 0.5
+ACCOUNTS = 10
+MAX_CONCURRENT_ACCOUNTS = 2
+
+
+class SlowAsyncExchange(AsyncExchange):
+    async def get_balances(self):
+        await asyncio.sleep(FETCH_SECONDS)
+        return [(self.name, "BTC", 1.0)]
+
+
+class SlowExchange(Exchange):
+    def get_balances(self):
+        time.sleep(FETCH_SECONDS)
+        return [(self.name, "BTC", 1.0)]
+
+
+def _accounts(exchange_class, exchange_name):
+    return [
+        exchange_class(
+            exchange_name,
+            ExchangeConfig(
+                name=exchange_name,
+                api_key="key",
+                secret_key="secret",
+                account=f"account {index}",
+                max_concurrent_accounts=MAX_CONCURRENT_ACCOUNTS,
+                requests_per_minute=0,
+            ),
+        )
+        for index in range(ACCOUNTS)
+    ]
+
+
+def test_async_accounts_waiting_for_a_slot_dont_time_out():
+    accounts = _accounts(SlowAsyncExchange, "SlowAsync")
+    fetcher = AsyncBalanceFetcher(max_workers=ACCOUNTS, timeout=TIMEOUT)
+    results = fetcher.fetch(
+        {account.name: account.fetch_balances_async for account in accounts}
+    )
+    assert sorted(results) == sorted(account.name for account in accounts)
+
+
+def test_threaded_accounts_waiting_for_a_slot_dont_time_out():
+    accounts = _accounts(SlowExchange, "Slow")
+    fetcher = BalanceFetcher(max_workers=ACCOUNTS, timeout=TIMEOUT)
+    results = fetcher.fetch(
+        {account.name: account.fetch_balances for account in accounts}
+    )
+    assert sorted(results) == sorted(account.name for account in accounts)
+
+
+def test_blocking_accounts_in_the_asyncio_engine_dont_time_out():
+    accounts = _accounts(SlowExchange, "SlowBlocking")
+    fetcher = AsyncBalanceFetcher(max_workers=ACCOUNTS, timeout=TIMEOUT)
+    results = fetcher.fetch(
+        {account.name: account.fetch_balances_async for account in accounts}
+    )
+    assert len(results) == ACCOUNTS
+
+
+def test_running_tasks_still_time_out():
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def waits_then_hangs():
+        with untimed():
+            await asyncio.sleep(0.2)
+        await asyncio.sleep(1)
+
+    fetcher = AsyncBalanceFetcher(timeout=0.3)
+    assert fetcher.fetch({"slow": slow, "hangs": waits_then_hangs}) == {}
+    assert fetcher.timings["hangs"] < 1
+
+
+def test_threaded_tasks_still_time_out():
+    fetcher = BalanceFetcher(timeout=0.3)
+    results = fetcher.fetch({"slow": lambda: time.sleep(1), "fast": lambda: "done"})
+    assert results == {"fast": "done"}
@@ -0,0 +1,48 @@
+import pandas as pd
+from cryptonaire_reports.utils.config import FiltersConfig
+from cryptonaire_reports.utils.filters import BalanceFilter
+
+
+class FakeHistory:
+    def latest_prices(self) -> pd.Series:
+        return pd.Series({"BTC": 60000.0, "PEPE": 0.00001, "DUST": 0.5, "ETH": 3000.0})
+
+
+# symbol: (balance, kept)
+BALANCES = {
+    "BTC": (0.0005, True),  # under MIN_BALANCE, but allowed
+    "ETH": (2.0, True),
+    "DUST": (1.5, False),  # worth 0.75 USD
+    "PEPE": (1000000.0, True),  # worth 10 USD
+    "NEW": (5.0, True),  # never priced
+    "SCAM": (1000.0, False),  # denied
+    "scam": (1000.0, False),  # denied, lists are case insensitive
+    "TINY": (0.0001, False),  # under MIN_BALANCE
+}
+
+CONFIG = FiltersConfig(
+    min_balance=0.001, allow=("BTC",), deny=("SCAM",), min_value_usd=1.0
+)
+
+
+def _balances() -> pd.DataFrame:
+    return pd.DataFrame(
+        {"balance": [balance for balance, _ in BALANCES.values()]},
+        index=pd.Index(list(BALANCES), name="symbol"),
+    )
+
+
+def test_apply():
+    kept = BalanceFilter(CONFIG, FakeHistory()).apply(_balances())
+    assert list(kept.index) == [symbol for symbol, (_, k) in BALANCES.items() if k]
+
+
+def test_apply_without_history():
+    kept = BalanceFilter(CONFIG, None).apply(_balances())
+    # Without prices, only DENY and MIN_BALANCE are applied
+    assert list(kept.index) == ["BTC", "ETH", "DUST", "PEPE", "NEW"]
+
+
+def test_apply_without_rules():
+    kept = BalanceFilter(FiltersConfig(), None).apply(_balances())
+    assert list(kept.index) == list(BALANCES)
@@ -0,0 +1,92 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from cryptonaire_reports.utils import rate_limiter
+from cryptonaire_reports.utils.rate_limiter import RateLimitExceeded
+from cryptonaire_reports.utils.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    """Replaces the time module of the rate limiter, so waiting only moves the
+    clock forward."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.waits = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.waits.append(seconds)
+        self.now += seconds
+
+    async def sleep_async(self, seconds: float) -> None:
+        self.sleep(seconds)
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    monkeypatch.setattr(
+        rate_limiter, "asyncio", SimpleNamespace(sleep=clock.sleep_async)
+    )
+    return clock
+
+
+def test_disabled(clock):
+    for requests_per_minute in [None, 0]:
+        limiter = RateLimiter(requests_per_minute)
+        for _ in range(1000):
+            limiter.acquire()
+    assert clock.waits == []
+
+
+def test_burst_then_paced(clock):
+    # A quarter of the limit is a burst, the rest is paced over the minute
+    limiter = RateLimiter(120)
+    for _ in range(30):
+        limiter.acquire()
+    assert clock.waits == []
+    limiter.acquire()
+    assert clock.waits == [pytest.approx(60 / 90)]
+
+
+def test_never_over_the_limit(clock):
+    limiter = RateLimiter(120)
+    timestamps = []
+    while clock.now < 180:
+        limiter.acquire()
+        timestamps.append(clock.now)
+    # Any 121 consecutive requests span at least a minute
+    spans = [end - start for start, end in zip(timestamps, timestamps[120:])]
+    assert min(spans) >= 60
+
+
+def test_acquire_async(clock):
+    limiter = RateLimiter(4)
+
+    async def acquire_all():
+        for _ in range(3):
+            await limiter.acquire_async()
+
+    asyncio.run(acquire_all())
+    # 1 request of burst, then one every 20 seconds
+    assert clock.waits == [pytest.approx(20), pytest.approx(20)]
+
+
+def test_drain(clock):
+    limiter = RateLimiter(120)
+    limiter.drain()
+    limiter.acquire()
+    assert clock.waits == [pytest.approx(60 / 90)]
+
+
+def test_daily_budget(clock):
+    limiter = RateLimiter(credits_per_day=10, credits_used=8)
+    limiter.acquire(credits=2)
+    limiter.record(2)
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire()